@@ -50,11 +50,17 @@ INSTALLED_APPS = [
     'courses',
     'attendance',
     'dashboard',
+    'notifications',
 ]
 
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
+# Loads the student/lecturer profile with the user in one query. ModelBackend
+# stays listed for one release so sessions stored with its path keep working;
+# drop it once those sessions have expired.
+AUTHENTICATION_BACKENDS = ['accounts.backends.ProfileBackend', 'django.contrib.auth.backends.ModelBackend']
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -62,6 +68,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.profiles.ProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,6 +91,16 @@ TEMPLATES = [
     },
 ]
 
+if not DEBUG:
+    # Compile each template once per process in production
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'StuQRCOde.wsgi.application'
 
 
@@ -99,6 +116,50 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Production needs Redis (REDIS_URL, requires the redis package): sessions, user
+# snapshots, report versions and dashboard snapshots are read on most requests,
+# and only Redis serves those reads without a database round trip. The cache must
+# be shared: management commands and other workers invalidate report, schedule
+# and user entries through it, which a per-process cache would never see.
+# CACHE_LOCATION (a file-based cache for the workers of one host) and the
+# database table used otherwise (created by `manage.py createcachetable`) are
+# fallbacks for development and small installs; `manage.py check --deploy`
+# warns about them. Both cull a third of their entries once CACHE_MAX_ENTRIES
+# is reached, so it must hold a session and a user snapshot per active user.
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 100000))
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+elif os.environ.get('CACHE_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_LOCATION'],
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.environ.get('CACHE_TABLE', 'stuqrcode_cache'),
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    }
+
+# Sessions are read from the cache and only hit the database on a miss; the
+# logged-in user and its profile are cached too (accounts/snapshot.py).
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+USER_SNAPSHOT_TTL = int(os.environ.get('USER_SNAPSHOT_TTL', 300))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -143,10 +204,43 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Email configuration
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Use console for development; change to smtp.EmailBackend for production
-EMAIL_HOST = 'smtp.gmail.com'  # Example: Gmail SMTP
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
-EMAIL_HOST_USER = 'your-email@gmail.com'  # Replace with actual email
-EMAIL_HOST_PASSWORD = 'your-app-password'  # Replace with app password
-DEFAULT_FROM_EMAIL = 'StuAttend <noreply@stuattend.com>'
+# Set EMAIL_BACKEND=django.core.mail.backends.smtp.EmailBackend in production. For a local
+# SMTP stand-in run `python -m aiosmtpd -n -l localhost:1025` with EMAIL_HOST=localhost,
+# EMAIL_PORT=1025 and EMAIL_USE_TLS=False.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 30))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'StuAttend <noreply@stuattend.com>')
+
+# Outbox delivery (python manage.py send_outbox)
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 100))  # Messages claimed per batch
+OUTBOX_RATE_LIMIT = float(os.environ.get('OUTBOX_RATE_LIMIT', 10))  # Messages per second; 0 disables the limit
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))  # Deliveries tried before a message is marked failed
+OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get('OUTBOX_RETRY_BASE_SECONDS', 60))  # First retry delay, doubled per attempt
+OUTBOX_RETRY_MAX_SECONDS = int(os.environ.get('OUTBOX_RETRY_MAX_SECONDS', 3600))  # Upper bound on the retry delay
+OUTBOX_PRODUCERS = ['accounts.password_resets.queue_password_resets']  # Called by send_outbox before each delivery pass
+
+# Notification digest (python manage.py send_notification_digest)
+NOTIFICATION_EVENT_MAX_AGE_DAYS = int(os.environ.get('NOTIFICATION_EVENT_MAX_AGE_DAYS', 14))  # Days an event waits for its course's first enrollment
+
+# Password reset requests
+PASSWORD_RESET_RATE_LIMIT = int(os.environ.get('PASSWORD_RESET_RATE_LIMIT', 5))  # Requests per email and per client IP in a window; 0 disables the limit
+PASSWORD_RESET_RATE_WINDOW = int(os.environ.get('PASSWORD_RESET_RATE_WINDOW', 3600))  # Seconds
+# META key holding the client address, e.g. HTTP_X_FORWARDED_FOR behind Railway's proxy (its last entry is
+# used) or REMOTE_ADDR without a proxy. Unset, reset requests are only limited per email: behind a proxy
+# REMOTE_ADDR is the proxy's, and limiting it would limit the whole site.
+CLIENT_IP_HEADER = os.environ.get('CLIENT_IP_HEADER', '')
+
+# Reports
+ATTENDANCE_EXPORT_WORKERS = int(os.environ.get('ATTENDANCE_EXPORT_WORKERS', 4))  # Threads used to build semester workbooks
+REPORT_CACHE_TIMEOUT = int(os.environ.get('REPORT_CACHE_TIMEOUT', 3600))  # Seconds; entries are also invalidated by data version
+DASHBOARD_SNAPSHOT_TTL = int(os.environ.get('DASHBOARD_SNAPSHOT_TTL', 60))  # Seconds a lecturer dashboard snapshot is reused
+ATTENDANCE_AT_RISK_THRESHOLD = float(os.environ.get('ATTENDANCE_AT_RISK_THRESHOLD', 75))  # Students below this attendance percentage count as at risk
+ATTENDANCE_REQUIRE_ENROLLMENT = os.environ.get('ATTENDANCE_REQUIRE_ENROLLMENT', 'False') == 'True'  # Refuse scans from students not enrolled; turn on once rosters are imported
+ATTENDANCE_LATE_GRACE_MINUTES = int(os.environ.get('ATTENDANCE_LATE_GRACE_MINUTES', 10))  # Scans later than this after class start are marked late
+ATTENDANCE_ARCHIVE_DIR = os.environ.get('ATTENDANCE_ARCHIVE_DIR', BASE_DIR / 'archives')  # Compressed exports written by archive_semester
+ATTENDANCE_LIST_COUNT_MODE = os.environ.get('ATTENDANCE_LIST_COUNT_MODE', 'estimate')  # exact, estimate or none for record and QR code list totals
@@ -1,6 +1,15 @@
-from django.contrib import admin
+import os
+import tempfile
+
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Student, Lecturer
+from django.core.exceptions import PermissionDenied
+from django.db import DatabaseError
+from django.template.response import TemplateResponse
+from django.urls import path
+from .forms import UserImportForm
+from .imports import import_users, read_rows
+from .models import User, Student, Lecturer, PasswordResetRequest
 
 class CustomUserAdmin(UserAdmin):
     """Custom User Admin with role-based fields"""
@@ -21,6 +30,63 @@ class CustomUserAdmin(UserAdmin):
             'fields': ('role', 'phone'),
         }),
     )
+    change_list_template = 'admin/accounts/user/change_list.html'
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='accounts_user_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """
+        Bulk create students or lecturers from an uploaded CSV/XLSX file.
+
+        Password hashing would hold the request for minutes on a large file, so
+        users created here get a set-password link instead; files with passwords
+        go through the import_users command.
+        """
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        result = None
+        if request.method == 'POST':
+            form = UserImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                upload = form.cleaned_data['file']
+                suffix = os.path.splitext(upload.name)[1].lower()
+                with tempfile.NamedTemporaryFile(suffix=suffix) as f:
+                    for chunk in upload.chunks():
+                        f.write(chunk)
+                    f.flush()
+                    try:
+                        result = import_users(
+                            read_rows(f.name),
+                            form.cleaned_data['role'],
+                            send_reset_links=True,
+                            ignore_passwords=True,
+                        )
+                    except (OSError, ValueError) as e:
+                        messages.error(request, f'Could not read {upload.name}: {e}')
+                    except DatabaseError as e:
+                        # Batches already written stay; the failing one was rolled back
+                        messages.error(request, f'Import of {upload.name} stopped: {e}')
+                if result is not None:
+                    messages.success(
+                        request,
+                        f"Created {result['created']} users from {result['rows']} rows; {len(result['errors'])} rows rejected."
+                    )
+        else:
+            form = UserImportForm()
+        return TemplateResponse(request, 'admin/accounts/user/import_users.html', self._import_context(request, form, result))
+
+    def _import_context(self, request, form, result=None):
+        return {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import users',
+            'form': form,
+            'result': result,
+        }
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
@@ -36,4 +102,10 @@ class LecturerAdmin(admin.ModelAdmin):
     list_filter = ['department', 'hire_date']
     readonly_fields = ['hire_date']
 
+@admin.register(PasswordResetRequest)
+class PasswordResetRequestAdmin(admin.ModelAdmin):
+    list_display = ['email', 'created_at']
+    search_fields = ['email']
+    readonly_fields = ['email', 'created_at']
+
 admin.site.register(User, CustomUserAdmin)
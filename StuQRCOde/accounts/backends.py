@@ -0,0 +1,13 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .snapshot import get_user_snapshot
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend that loads the user's student or lecturer profile with it, from the snapshot cache"""
+
+    def get_user(self, user_id):
+        user = get_user_snapshot(user_id)
+        if user is None:
+            return None
+        return user if self.user_can_authenticate(user) else None
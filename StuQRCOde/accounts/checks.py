@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Sessions and user snapshots are read from the cache on every request, which only Redis serves cheaply"""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend.endswith('RedisCache'):
+        return []
+    return [Warning(
+        f'The default cache is {backend}: every session and user snapshot read is a disk or database round trip.',
+        hint='Set REDIS_URL in production; the database and file caches are development fallbacks.',
+        id='accounts.W001',
+    )]
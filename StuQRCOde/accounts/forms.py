@@ -87,3 +87,15 @@ class PasswordResetConfirmForm(SetPasswordForm):
     class Meta:
         model = User
         fields = ['new_password1', 'new_password2']
+
+
+class UserImportForm(forms.Form):
+    """Upload form for the bulk user import admin page"""
+    file = forms.FileField(help_text='CSV or XLSX with a header row')
+    role = forms.ChoiceField(choices=[('student', 'Students'), ('lecturer', 'Lecturers')])
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Upload a .csv or .xlsx file.')
+        return upload
@@ -0,0 +1,275 @@
+"""
+Bulk import of students and lecturers from CSV or XLSX files.
+
+The file is streamed and handled in batches. Each batch is validated: field
+checks in Python, including the model fields' own validators, then uniqueness against the rows seen so far and against
+the database, with one query per unique column. Its valid rows are then
+written with bulk_create, users and profiles in one transaction. Passwords
+given in the file are hashed in a process pool. Rows without a password get
+an unusable one and, if asked, a password reset link through the outbox.
+The admin upload page ignores passwords, so a web request never hashes.
+"""
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_date
+from openpyxl import load_workbook
+
+from notifications.outbox import enqueue_messages
+from .models import User, Student, Lecturer
+from .password_resets import reset_url
+
+BATCH_SIZE = 1000
+
+REQUIRED_COLUMNS = {
+    'student': ['email', 'first_name', 'last_name', 'student_id'],
+    'lecturer': ['email', 'first_name', 'last_name', 'employee_id', 'department', 'qualification'],
+}
+
+# Column that must be unique for each role's profile
+PROFILE_KEYS = {
+    'student': 'student_id',
+    'lecturer': 'employee_id',
+}
+
+GENDERS = [value for value, _ in Student.GENDER_CHOICES]
+
+
+class UserImportError(Exception):
+    pass
+
+
+def read_rows(path):
+    """Yield (line number, {column: text}) for each data row of a .csv or .xlsx file"""
+    if os.path.splitext(path)[1].lower() == '.xlsx':
+        workbook = load_workbook(path, read_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell or '').strip().lower() for cell in next(rows, [])]
+            for line, values in enumerate(rows, 2):
+                if any(value not in (None, '') for value in values):
+                    yield line, {name: _text(value) for name, value in zip(header, values)}
+        finally:
+            workbook.close()
+        return
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        for line, row in enumerate(reader, 2):
+            yield line, {name: (value or '').strip() for name, value in row.items() if name}
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def clean_row(row, role):
+    """Return (data, None) for a valid row or (None, error message)"""
+    missing = [name for name in REQUIRED_COLUMNS[role] if not row.get(name)]
+    if missing:
+        return None, f"Missing {', '.join(missing)}"
+
+    email = row['email'].lower()
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None, f'Invalid email {email}'
+
+    data = {
+        'email': email,
+        'username': row.get('username') or email,
+        'first_name': row['first_name'][:150],
+        'last_name': row['last_name'][:150],
+        'phone': row.get('phone') or None,
+        'password': row.get('password', ''),
+    }
+    error = _field_error(User, data, exclude=['password'])
+    if error:
+        return None, error
+    if role == 'lecturer':
+        profile = {
+            'employee_id': row['employee_id'],
+            'department': row['department'],
+            'qualification': row['qualification'],
+        }
+        error = _field_error(Lecturer, profile)
+        if error:
+            return None, error
+        data.update(profile)
+        return data, None
+
+    try:
+        level = int(row.get('level') or 1)
+        enrollment_year = int(row['enrollment_year']) if row.get('enrollment_year') else None
+        date_of_birth = parse_date(row['date_of_birth']) if row.get('date_of_birth') else None
+    except ValueError as e:
+        return None, str(e)
+    if not 1 <= level <= 4:
+        return None, f'Level must be between 1 and 4, got {level}'
+    if row.get('date_of_birth') and date_of_birth is None:
+        return None, f"Invalid date_of_birth {row['date_of_birth']} (expected YYYY-MM-DD)"
+    gender = row.get('gender', '').capitalize() or None
+    if gender is not None and gender not in GENDERS:
+        return None, f"Gender must be one of {', '.join(GENDERS)}"
+    profile = {
+        'student_id': row['student_id'],
+        'program': row.get('program', ''),
+        'level': level,
+        'enrollment_year': enrollment_year,
+        'date_of_birth': date_of_birth,
+        'gender': gender,
+        'address': row.get('address') or None,
+    }
+    error = _field_error(Student, profile)
+    if error:
+        return None, error
+    data.update(profile)
+    return data, None
+
+
+def _field_error(model, values, exclude=()):
+    """Return the first value failing its model field's validators, e.g. max_length, as a message"""
+    for name, value in values.items():
+        if name in exclude:
+            continue
+        try:
+            model._meta.get_field(name).run_validators(value)
+        except ValidationError as e:
+            return f"Invalid {name} {value}: {' '.join(e.messages)}"
+    return None
+
+
+def _init_worker():
+    # Needed when processes are spawned rather than forked
+    django.setup()
+
+
+def import_users(rows, role, batch_size=BATCH_SIZE, workers=1, send_reset_links=False,
+                 ignore_passwords=False, progress=None):
+    """
+    Create users with a `role` profile from (line, row) pairs, e.g. read_rows(path).
+
+    With `ignore_passwords` every user gets an unusable password, as if the file
+    had no password column. Returns {'rows', 'created', 'errors'}, errors being
+    (line, message) pairs for every rejected row. `progress` is called as
+    progress(rows seen, created).
+    """
+    if role not in REQUIRED_COLUMNS:
+        raise UserImportError(f'Cannot import users with role {role}')
+
+    totals = {'rows': 0, 'created': 0, 'errors': []}
+    seen = {'email': set(), 'username': set(), PROFILE_KEYS[role]: set()}
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
+    try:
+        batch = []
+        for line, row in rows:
+            totals['rows'] += 1
+            if ignore_passwords:
+                row.pop('password', None)
+            data, error = clean_row(row, role)
+            if error:
+                totals['errors'].append((line, error))
+                continue
+            batch.append((line, data))
+            if len(batch) >= batch_size:
+                totals['created'] += _import_batch(batch, role, seen, executor, send_reset_links, totals['errors'])
+                batch = []
+                if progress is not None:
+                    progress(totals['rows'], totals['created'])
+        if batch:
+            totals['created'] += _import_batch(batch, role, seen, executor, send_reset_links, totals['errors'])
+            if progress is not None:
+                progress(totals['rows'], totals['created'])
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    totals['errors'].sort()
+    return totals
+
+
+def _import_batch(batch, role, seen, executor, send_reset_links, errors):
+    profile_key = PROFILE_KEYS[role]
+    profile_model = Student if role == 'student' else Lecturer
+    taken = {
+        # Stored emails keep their case, so compare them lowercased like the file's
+        'email': set(User.objects.annotate(email_lower=Lower('email')).filter(
+            email_lower__in=[data['email'] for _, data in batch]
+        ).values_list('email_lower', flat=True)),
+        'username': set(User.objects.filter(username__in=[data['username'] for _, data in batch]).values_list('username', flat=True)),
+        profile_key: set(profile_model.objects.filter(
+            **{f'{profile_key}__in': [data[profile_key] for _, data in batch]}
+        ).values_list(profile_key, flat=True)),
+    }
+
+    valid = []
+    for line, data in batch:
+        duplicate = next((name for name in seen if data[name] in seen[name] or data[name] in taken[name]), None)
+        if duplicate:
+            errors.append((line, f'{duplicate} {data[duplicate]} already exists'))
+            continue
+        for name in seen:
+            seen[name].add(data[name])
+        valid.append(data)
+    if not valid:
+        return 0
+
+    passwords = [data['password'] for data in valid]
+    given = [password for password in passwords if password]
+    if given:
+        # PBKDF2 dominates the import time, so hashing is spread over processes
+        hashed = iter(executor.map(make_password, given, chunksize=50) if executor else map(make_password, given))
+        passwords = [next(hashed) if password else make_password(None) for password in passwords]
+    else:
+        passwords = [make_password(None) for _ in valid]
+
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(
+                email=data['email'],
+                username=data['username'],
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                phone=data['phone'],
+                role=role,
+                password=password,
+            )
+            for data, password in zip(valid, passwords)
+        ])
+        profile_fields = [name for name in valid[0] if name not in ('email', 'username', 'first_name', 'last_name', 'phone', 'password')]
+        profile_model.objects.bulk_create([
+            profile_model(user_id=user.pk, **{name: data[name] for name in profile_fields})
+            for user, data in zip(users, valid)
+        ])
+        if send_reset_links:
+            enqueue_messages(
+                _reset_link_email(user)
+                for user, data in zip(users, valid)
+                if not data['password']
+            )
+    return len(users)
+
+
+def _reset_link_email(user):
+    link = reset_url(user)
+    body = (
+        f'Hi {user.get_full_name()},\n\nAn account has been created for you on StuAttend. '
+        f'Set your password using the link below:\n\n{link}\n\nBest regards,\nStuAttend Team'
+    )
+    return user.email, 'Your StuAttend account', body
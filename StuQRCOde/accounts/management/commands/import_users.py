@@ -0,0 +1,46 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.imports import BATCH_SIZE, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk create students or lecturers from a CSV or XLSX file with a header row'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='.csv or .xlsx file')
+        parser.add_argument('--role', choices=['student', 'lecturer'], default='student')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows validated and inserted per transaction')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes hashing passwords given in the file')
+        parser.add_argument('--send-reset-links', action='store_true', help='Email a set-password link to users imported without a password')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            raise CommandError(f"{options['path']} does not exist")
+
+        def progress(rows, created):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{rows} rows read, {created} users created')
+
+        started = time.monotonic()
+        try:
+            result = import_users(
+                read_rows(options['path']),
+                options['role'],
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                send_reset_links=options['send_reset_links'],
+                progress=progress,
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+        elapsed = time.monotonic() - started
+
+        for line, error in result['errors']:
+            self.stderr.write(f'Row {line}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']} {options['role']}s from {result['rows']} rows "
+            f"({len(result['errors'])} rejected) in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-19 12:52
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def drop_duplicate_requests(apps, schema_editor):
+    """Keep the oldest pending request per email so the column can be unique"""
+    PasswordResetRequest = apps.get_model('accounts', 'PasswordResetRequest')
+    keep = PasswordResetRequest.objects.values('email').annotate(first=Min('pk')).values('first')
+    PasswordResetRequest.objects.exclude(pk__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_password_reset_request'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_requests, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='passwordresetrequest',
+            name='email',
+            field=models.EmailField(max_length=254, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='user_email_lower_idx'),
+        ),
+    ]
@@ -1,9 +1,26 @@
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 from django.core.validators import RegexValidator
 
-class User(AbstractUser):
+class LoadDeferredTogether:
+    """
+    Load all deferred fields in one query the first time any of them is read.
+
+    Users and profiles built from the session snapshot (accounts/snapshot.py)
+    carry only a few fields; a page reading the name and email of such a user
+    then costs one query, not one per field.
+    """
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using, fields, from_queryset)
+
+
+class User(LoadDeferredTogether, AbstractUser):
     """Extended User model with role-based access"""
     ROLE_CHOICES = [
         ('admin', 'Administrator'),
@@ -25,11 +42,26 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Password reset requests are resolved by case-insensitive email
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_full_name()} ({self.role})"
 
+    def get_session_auth_hash(self):
+        # Snapshot users carry the hash, so checking the session does not load the password
+        cached = self.__dict__.get('_session_auth_hash')
+        return cached if cached is not None else super().get_session_auth_hash()
+
+    def set_password(self, raw_password):
+        self.__dict__.pop('_session_auth_hash', None)
+        super().set_password(raw_password)
+
 
-class Student(models.Model):
+class Student(LoadDeferredTogether, models.Model):
     """Student profile model"""
     GENDER_CHOICES = [
         ('Male', 'Male'),
@@ -50,7 +82,7 @@ class Student(models.Model):
         return f"{self.user.get_full_name()} - {self.student_id}"
 
 
-class Lecturer(models.Model):
+class Lecturer(LoadDeferredTogether, models.Model):
     """Lecturer profile model"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='lecturer_profile')
     employee_id = models.CharField(max_length=20, unique=True)
@@ -60,3 +92,16 @@ class Lecturer(models.Model):
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.employee_id}"
+
+
+class PasswordResetRequest(models.Model):
+    """Reset asked for an email address, waiting for the outbox worker to resolve it"""
+    # Lowercased on write; repeated requests share the pending row
+    email = models.EmailField(unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.email} ({self.created_at})"
@@ -0,0 +1,109 @@
+"""
+Deferred password reset emails.
+
+The reset request view only records a PasswordResetRequest: the same work
+whether or not the address belongs to an account, and repeated requests for
+one address share the pending row. Its response and its timing therefore
+reveal nothing and never wait on SMTP. Requests are rate limited per email
+through the cache, and per client IP when CLIENT_IP_HEADER says where the
+proxy puts it. The send_outbox
+worker calls queue_password_resets() before each delivery pass. That
+resolves pending requests in batches and queues the reset emails in the
+outbox, which delivers them in batches and retries failures.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError, connection, transaction
+from django.db.models.functions import Lower
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from notifications.outbox import enqueue_messages
+from .models import User, PasswordResetRequest
+
+BATCH_SIZE = 500
+
+SUBJECT = 'Password Reset Request'
+
+
+RATE_KEY = 'accounts:password-reset:{}:{}'
+
+
+def _over_limit(kind, value):
+    """Count a request against `value`; True once it exceeds the limit for the window"""
+    limit = settings.PASSWORD_RESET_RATE_LIMIT
+    if not limit or not value:
+        return False
+    key = RATE_KEY.format(kind, value)
+    window = settings.PASSWORD_RESET_RATE_WINDOW
+    if cache.add(key, 1, timeout=window):
+        return False
+    try:
+        return cache.incr(key) > limit
+    except ValueError:
+        # The window ended between add() and incr()
+        cache.set(key, 1, timeout=window)
+        return False
+
+
+def client_ip(request):
+    """Client address from the configured CLIENT_IP_HEADER, or None when none is configured"""
+    header = getattr(settings, 'CLIENT_IP_HEADER', '')
+    if not header:
+        return None
+    # The trusted proxy appends the address it saw; earlier entries come from the client
+    value = request.META.get(header, '').split(',')[-1].strip()
+    return value or None
+
+
+def request_password_reset(email, ip_address=None):
+    """Record a reset request; returns False when the email or IP is over the rate limit"""
+    email = email.strip().lower()
+    if _over_limit('ip', ip_address) or _over_limit('email', email):
+        return False
+    try:
+        with transaction.atomic():
+            PasswordResetRequest.objects.get_or_create(email=email)
+    except IntegrityError:
+        # A concurrent request for the same address created the row first
+        pass
+    return True
+
+
+def reset_url(user):
+    """Absolute set-password link for `user`, valid until the password or last login changes"""
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+    return settings.BASE_URL.rstrip('/') + reverse(
+        'accounts:password_reset_confirm', kwargs={'uidb64': uid, 'token': token}
+    )
+
+
+def reset_email(user):
+    """(recipient, subject, text, html) of the reset email for `user`"""
+    link = reset_url(user)
+    message = f'Hi {user.get_full_name()},\n\nYou requested a password reset. Click the link below to reset your password:\n\n{link}\n\nIf you did not request this, please ignore this email.'
+    html_message = f'Hi {user.get_full_name()},<br><br>You requested a password reset. Click the link below to reset your password:<br><br><a href="{link}">Reset Password</a><br><br>If you did not request this, please ignore this email.'
+    return user.email, SUBJECT, message, html_message
+
+
+def queue_password_resets(batch_size=BATCH_SIZE):
+    """Turn pending reset requests into outbox emails; returns {'requests', 'emails'}"""
+    totals = {'requests': 0, 'emails': 0}
+    while True:
+        with transaction.atomic():
+            pending = PasswordResetRequest.objects.order_by('pk')
+            if connection.features.has_select_for_update_skip_locked:
+                pending = pending.select_for_update(skip_locked=True)
+            requests = list(pending.values_list('pk', 'email')[:batch_size])
+            if not requests:
+                break
+            emails = {email for _, email in requests}
+            # Served by the index on lower(email)
+            users = User.objects.annotate(email_lower=Lower('email')).filter(email_lower__in=emails, is_active=True)
+            totals['emails'] += enqueue_messages(reset_email(user) for user in users)
+            PasswordResetRequest.objects.filter(pk__in=[pk for pk, _ in requests]).delete()
+        totals['requests'] += len(requests)
+    return totals
@@ -0,0 +1,65 @@
+"""
+Role profiles of the logged-in user.
+
+ProfileBackend loads the profile together with the user, ProfileMiddleware
+exposes it as request.profile, and the completion check students must pass
+before using the site lives here instead of in every view.
+"""
+from functools import wraps
+
+from django.contrib import messages
+from django.core.exceptions import ObjectDoesNotExist
+from django.shortcuts import redirect
+from django.utils.functional import SimpleLazyObject
+
+PROFILE_FIELDS = {
+    'student': 'student_profile',
+    'lecturer': 'lecturer_profile',
+}
+
+
+def get_profile(user):
+    """Return the Student or Lecturer profile matching the user's role, or None"""
+    field = PROFILE_FIELDS.get(getattr(user, 'role', None))
+    if field is None or not user.is_authenticated:
+        return None
+    try:
+        return getattr(user, field)
+    except ObjectDoesNotExist:
+        return None
+
+
+def is_profile_complete(user, profile):
+    """Students need a profile with a date of birth (the completion proxy), lecturers just a profile"""
+    if user.role == 'student':
+        return bool(profile) and bool(profile.date_of_birth)
+    if user.role == 'lecturer':
+        return bool(profile)
+    return True
+
+
+def student_profile_required(view_func):
+    """Send students with a missing or incomplete profile to the completion form"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.user.role == 'student' and not is_profile_complete(request.user, request.profile):
+            messages.info(request, 'Please complete your student profile.')
+            return redirect('accounts:complete_student_profile')
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ProfileMiddleware:
+    """
+    Set request.profile to the user's role profile, loaded on first use.
+
+    The profile is a lazy object, so test it for truth rather than against None:
+    it is falsy for admins, anonymous users and users without a profile.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(lambda: get_profile(request.user))
+        return self.get_response(request)
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import User, Student, Lecturer
+from .snapshot import invalidate_user_snapshot
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    """Profile, role, activation and password changes all save the user row"""
+    invalidate_user_snapshot(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Student)
+@receiver([post_save, post_delete], sender=Lecturer)
+def invalidate_profile_user(sender, instance, **kwargs):
+    invalidate_user_snapshot(instance.user_id)
@@ -0,0 +1,82 @@
+"""
+Cached snapshot of authenticated users.
+
+Every authenticated request resolves request.user through ProfileBackend. What
+authentication needs is cached under a versioned key for USER_SNAPSHOT_TTL
+seconds: the user's id, role and active flag, the id of its role profile and
+its session auth hash. No password hash or personal data goes to the cache.
+On a hit the user and profile are rebuilt from the snapshot with their other
+fields deferred; the first read of one of them loads the rest of the row.
+
+With the cached_db session engine and Redis (REDIS_URL), authentication does
+not query the database; a page that shows the user's name or email then
+loads the user row once. With the database cache fallback, the session and
+the snapshot are each one primary key read on the cache table instead. accounts/signals.py drops the snapshot whenever the user
+or one of its profiles is saved or deleted, which covers password changes.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from .profiles import PROFILE_FIELDS
+
+# Bump when the cached shape changes so old snapshots are ignored after a deploy
+SNAPSHOT_VERSION = 2
+SNAPSHOT_KEY = 'accounts:user:{}:v{}'
+
+USER_FIELDS = ['id', 'role', 'is_active']
+
+
+def snapshot_key(user_id):
+    return SNAPSHOT_KEY.format(user_id, SNAPSHOT_VERSION)
+
+
+def _partial(model, db, values):
+    """Instance of `model` with only `values` ({attname: value}) loaded"""
+    names = [f.attname for f in model._meta.concrete_fields if f.attname in values]
+    return model.from_db(db, names, [values[name] for name in names])
+
+
+def build_snapshot(user):
+    profile_field = PROFILE_FIELDS.get(user.role)
+    profile = getattr(user, profile_field, None) if profile_field else None
+    return {
+        **{name: getattr(user, name) for name in USER_FIELDS},
+        'profile_id': profile.pk if profile is not None else None,
+        'session_auth_hash': user.get_session_auth_hash(),
+    }
+
+
+def user_from_snapshot(snapshot):
+    """User (and role profile) holding only the snapshot's fields"""
+    User = get_user_model()
+    db = User._default_manager.db
+    user = _partial(User, db, {name: snapshot[name] for name in USER_FIELDS})
+    user._session_auth_hash = snapshot['session_auth_hash']
+    for role, accessor in PROFILE_FIELDS.items():
+        relation = User._meta.get_field(accessor)
+        profile = None
+        if role == snapshot['role'] and snapshot['profile_id'] is not None:
+            profile = _partial(relation.related_model, db, {'id': snapshot['profile_id'], 'user_id': user.pk})
+            relation.field.set_cached_value(profile, user)
+        # A cached None makes the accessor raise DoesNotExist without a query
+        relation.set_cached_value(user, profile)
+    return user
+
+
+def get_user_snapshot(user_id):
+    """Return the user with its profiles resolved, from the cache when possible; None if it does not exist"""
+    key = snapshot_key(user_id)
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        return user_from_snapshot(snapshot)
+    user = get_user_model()._default_manager.select_related(
+        'student_profile', 'lecturer_profile'
+    ).filter(pk=user_id).first()
+    if user is not None:
+        cache.set(key, build_snapshot(user), getattr(settings, 'USER_SNAPSHOT_TTL', 300))
+    return user
+
+
+def invalidate_user_snapshot(user_id):
+    cache.delete(snapshot_key(user_id))
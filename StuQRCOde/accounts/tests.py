@@ -1,6 +1,24 @@
-from django.test import TestCase
+from datetime import date
+from io import StringIO
+import os
+import tempfile
+from django.core import mail
+from django.core.management import call_command
+from openpyxl import Workbook
+from notifications.models import OutboxMessage
+from notifications.outbox import send_outbox
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
-from .models import Student, Lecturer
+from django.urls import reverse
+from .backends import ProfileBackend
+from .imports import import_users, read_rows
+from .snapshot import snapshot_key
+from .models import Student, Lecturer, PasswordResetRequest
+from .password_resets import queue_password_resets, request_password_reset
 
 User = get_user_model()
 
@@ -67,3 +85,246 @@ class LecturerModelTest(TestCase):
         )
         self.assertEqual(lecturer.employee_id, 'L001')
         self.assertEqual(str(lecturer), 'Lecturer User - L001')
+
+
+def uncached_queries(queries):
+    """SQL of the captured queries, leaving out those of the database cache backend"""
+    table = settings.CACHES['default'].get('LOCATION', '')
+    return [
+        q['sql'] for q in queries
+        if f'"{table}"' not in q['sql'] and 'SAVEPOINT' not in q['sql']
+    ]
+
+
+class ProfileLoadingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@example.com',
+            username='student',
+            password='password123'
+        )
+        self.student = Student.objects.create(user=self.user, student_id='12345')
+
+    def test_backend_loads_profile_with_user(self):
+        cache.delete(snapshot_key(self.user.pk))
+        with CaptureQueriesContext(connection) as queries:
+            user = ProfileBackend().get_user(self.user.pk)
+            self.assertEqual(user.student_profile, self.student)
+            with self.assertRaises(Lecturer.DoesNotExist):
+                user.lecturer_profile
+        self.assertEqual(len(uncached_queries(queries)), 1)
+
+    def test_snapshot_holds_only_what_authentication_needs(self):
+        ProfileBackend().get_user(self.user.pk)
+        self.assertEqual(cache.get(snapshot_key(self.user.pk)), {
+            'id': self.user.pk,
+            'role': 'student',
+            'is_active': True,
+            'profile_id': self.student.pk,
+            'session_auth_hash': self.user.get_session_auth_hash(),
+        })
+
+        with CaptureQueriesContext(connection) as queries:
+            user = ProfileBackend().get_user(self.user.pk)
+            self.assertEqual(user.student_profile.pk, self.student.pk)
+            self.assertEqual(user.get_session_auth_hash(), self.user.get_session_auth_hash())
+            with self.assertRaises(Lecturer.DoesNotExist):
+                user.lecturer_profile
+        self.assertEqual(uncached_queries(queries), [])
+
+        # The rest of the row is loaded in one query when first read
+        with self.assertNumQueries(1):
+            self.assertEqual((user.email, user.username), ('student@example.com', 'student'))
+
+    def test_incomplete_student_profile_redirects(self):
+        self.client.force_login(self.user)
+        for name in ('courses:my_courses', 'courses:course_list', 'dashboard:student_dashboard'):
+            response = self.client.get(reverse(name))
+            self.assertRedirects(response, reverse('accounts:complete_student_profile'), fetch_redirect_response=False)
+
+        self.student.date_of_birth = date(2000, 1, 1)
+        self.student.save()
+        response = self.client.get(reverse('courses:my_courses'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.profile, self.student)
+
+    def test_lecturer_without_profile(self):
+        user = User.objects.create_user(email='lecturer@example.com', username='lecturer', password='password123', role='lecturer')
+        self.client.force_login(user)
+        response = self.client.get(reverse('dashboard:lecturer_dashboard'))
+        self.assertRedirects(response, reverse('accounts:complete_lecturer_profile'), fetch_redirect_response=False)
+        self.assertFalse(response.wsgi_request.profile)
+
+    def test_authenticated_request_uses_cached_session_and_snapshot(self):
+        self.student.date_of_birth = date(2000, 1, 1)
+        self.student.save()
+        self.client.force_login(self.user)
+        self.client.get(reverse('home'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'))
+            self.assertEqual(response.wsgi_request.profile.pk, self.student.pk)
+        # The session and the user snapshot come from the cache (one read each
+        # with the database cache backend); only showing the user's name in the
+        # page header loads the rest of the user row
+        user_rows = uncached_queries(queries)
+        self.assertEqual(len(user_rows), 1)
+        self.assertIn('FROM "accounts_user" WHERE', user_rows[0])
+        self.assertLessEqual(len(queries) - len(user_rows), 2)
+
+        # Changing the password drops the snapshot, and the old session with it
+        self.user.set_password('changed-password')
+        self.user.save()
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+
+class UserImportTest(TestCase):
+    def write(self, suffix, rows):
+        f = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False, newline='')
+        f.close()
+        self.addCleanup(os.remove, f.name)
+        if suffix == '.xlsx':
+            wb = Workbook()
+            for row in rows:
+                wb.active.append(row)
+            wb.save(f.name)
+        else:
+            with open(f.name, 'w', newline='') as out:
+                out.write('\n'.join(','.join(str(value) for value in row) for row in rows))
+        return f.name
+
+    def test_import_students_reports_row_errors(self):
+        existing = User.objects.create_user(email='taken@example.com', username='taken', password='password123')
+        Student.objects.create(user=existing, student_id='S900')
+        path = self.write('.csv', [
+            ['email', 'first_name', 'last_name', 'student_id', 'level', 'date_of_birth'],
+            ['ada@example.com', 'Ada', 'Lovelace', 'S001', '2', '2000-12-10'],
+            ['alan@example.com', 'Alan', 'Turing', 'S002', '', ''],
+            ['ADA@example.com', 'Ada', 'Again', 'S003', '1', ''],
+            ['grace@example.com', 'Grace', 'Hopper', 'S900', '1', ''],
+            ['kurt@example.com', 'Kurt', 'Godel', 'S004', '7', ''],
+            ['nobody@example.com', '', 'Missing', 'S005', '1', ''],
+        ])
+
+        result = import_users(read_rows(path), 'student', batch_size=2, send_reset_links=True)
+        self.assertEqual((result['rows'], result['created']), (6, 2))
+        self.assertEqual([line for line, _ in result['errors']], [4, 5, 6, 7])
+        self.assertIn('email ada@example.com already exists', dict(result['errors'])[4])
+
+        ada = Student.objects.select_related('user').get(student_id='S001')
+        self.assertEqual((ada.user.email, ada.user.role, ada.level, ada.date_of_birth), ('ada@example.com', 'student', 2, date(2000, 12, 10)))
+        self.assertFalse(ada.user.has_usable_password())
+        self.assertIn('/password-reset-confirm/', OutboxMessage.objects.get(recipient='ada@example.com').body)
+
+    def test_import_rejects_values_the_model_does_not_allow(self):
+        User.objects.create_user(email='Taken@Example.com', username='taken', password='password123')
+        path = self.write('.csv', [
+            ['email', 'first_name', 'last_name', 'student_id', 'phone', 'enrollment_year', 'username'],
+            ['a@example.com', 'A', 'A', 'S' * 21, '', '', ''],
+            ['b@example.com', 'B', 'B', 'S002', '12ab', '', ''],
+            ['c@example.com', 'C', 'C', 'S003', '', '-1', ''],
+            ['d@example.com', 'D', 'D', 'S004', '', '', 'u' * 151],
+            ['taken@example.com', 'T', 'T', 'S005', '', '', ''],
+            ['e@example.com', 'E', 'E', 'S006', '+233241234567', '2023', ''],
+        ])
+        result = import_users(read_rows(path), 'student')
+        errors = dict(result['errors'])
+        self.assertEqual((result['created'], sorted(errors)), (1, [2, 3, 4, 5, 6]))
+        self.assertIn('Invalid student_id', errors[2])
+        self.assertIn('Invalid phone', errors[3])
+        self.assertIn('Invalid enrollment_year', errors[4])
+        self.assertIn('Invalid username', errors[5])
+        self.assertIn('email taken@example.com already exists', errors[6])
+
+        path = self.write('.csv', [
+            ['email', 'first_name', 'last_name', 'employee_id', 'department', 'qualification'],
+            ['prof@example.com', 'Prof', 'Essor', 'L' * 21, 'CS', 'PhD'],
+        ])
+        self.assertIn('Invalid employee_id', import_users(read_rows(path), 'lecturer')['errors'][0][1])
+
+    def test_import_lecturers_from_xlsx_with_passwords(self):
+        path = self.write('.xlsx', [
+            ['email', 'first_name', 'last_name', 'employee_id', 'department', 'qualification', 'password'],
+            ['prof@example.com', 'Prof', 'Essor', 'L100', 'CS', 'PhD', 's3cret-pass'],
+        ])
+        out = StringIO()
+        call_command('import_users', path, '--role', 'lecturer', '--workers', '1', stdout=out)
+        self.assertIn('Created 1 lecturers from 1 rows (0 rejected)', out.getvalue())
+        lecturer = Lecturer.objects.select_related('user').get(employee_id='L100')
+        self.assertTrue(lecturer.user.check_password('s3cret-pass'))
+
+    def test_admin_import_page(self):
+        admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='password123')
+        self.client.force_login(admin)
+        path = self.write('.csv', [
+            ['email', 'first_name', 'last_name', 'student_id', 'password'],
+            ['ada@example.com', 'Ada', 'Lovelace', 'S001', 'secret-pass-1'],
+        ])
+        with open(path, 'rb') as f:
+            response = self.client.post(reverse('admin:accounts_user_import'), {'file': f, 'role': 'student'})
+        self.assertContains(response, 'Created 1 users from 1 rows')
+        self.assertTrue(Student.objects.filter(student_id='S001').exists())
+        # Passwords are not hashed in the request; the user gets a set-password link
+        self.assertFalse(User.objects.get(email='ada@example.com').has_usable_password())
+        self.assertEqual(OutboxMessage.objects.get().recipient, 'ada@example.com')
+
+
+class PasswordResetRequestTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='Ada@example.com', username='ada', password='password123',
+            first_name='Ada', last_name='Lovelace',
+        )
+
+    def test_request_response_does_not_reveal_accounts(self):
+        url = reverse('accounts:password_reset_request')
+        known = self.client.post(url, {'email': 'ada@example.com'}, follow=True)
+        unknown = self.client.post(url, {'email': 'nobody@example.com'}, follow=True)
+        self.assertEqual(known.redirect_chain, unknown.redirect_chain)
+        self.assertEqual(
+            [str(m) for m in known.context['messages']],
+            [str(m) for m in unknown.context['messages']],
+        )
+        self.assertEqual(PasswordResetRequest.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_worker_queues_one_email_per_account(self):
+        for email in ['ada@example.com', 'ADA@example.com', 'nobody@example.com']:
+            request_password_reset(email)
+        # Repeated requests for one address share the pending row
+        self.assertEqual(PasswordResetRequest.objects.count(), 2)
+        self.assertEqual(queue_password_resets(batch_size=1), {'requests': 2, 'emails': 1})
+        self.assertFalse(PasswordResetRequest.objects.exists())
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.recipient, 'Ada@example.com')
+        self.assertIn('/password-reset-confirm/', message.body)
+        self.assertIn('<a href=', message.html_body)
+
+    @override_settings(PASSWORD_RESET_RATE_LIMIT=2)
+    def test_requests_are_rate_limited_per_email(self):
+        url = reverse('accounts:password_reset_request')
+        for _ in range(2):
+            self.assertRedirects(self.client.post(url, {'email': 'ada@example.com'}), reverse('accounts:login'), fetch_redirect_response=False)
+        response = self.client.post(url, {'email': 'ada@example.com'})
+        self.assertContains(response, 'Too many password reset requests')
+        # Without CLIENT_IP_HEADER everyone shares the proxy's address, so other emails are not limited
+        self.client.post(url, {'email': 'other@example.com'})
+        self.assertTrue(PasswordResetRequest.objects.filter(email='other@example.com').exists())
+
+    @override_settings(PASSWORD_RESET_RATE_LIMIT=2, CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_requests_are_rate_limited_per_forwarded_client(self):
+        url = reverse('accounts:password_reset_request')
+        for i in range(3):
+            # A spoofed first entry does not change the address the proxy appended
+            self.client.post(url, {'email': f'user{i}@example.com'}, HTTP_X_FORWARDED_FOR=f'10.0.0.{i}, 203.0.113.7')
+        self.assertEqual(PasswordResetRequest.objects.count(), 2)
+        self.client.post(url, {'email': 'user3@example.com'}, HTTP_X_FORWARDED_FOR='203.0.113.8')
+        self.assertEqual(PasswordResetRequest.objects.count(), 3)
+
+    def test_send_outbox_delivers_pending_resets(self):
+        self.client.post(reverse('accounts:password_reset_request'), {'email': 'ada@example.com'})
+        send_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['Ada@example.com'])
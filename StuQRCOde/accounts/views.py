@@ -3,12 +3,12 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.utils.encoding import force_bytes, force_str
-from django.urls import reverse
+from django.utils.http import urlsafe_base64_decode
+from django.utils.encoding import force_str
 from .forms import UserRegistrationForm, StudentProfileForm, LecturerProfileForm, UserLoginForm, PasswordResetRequestForm, PasswordResetConfirmForm
-from .models import User, Student, Lecturer
+from .models import User
+from .password_resets import client_ip, request_password_reset
+from .profiles import get_profile, is_profile_complete
 
 def register_view(request):
     """User registration view"""
@@ -24,7 +24,8 @@ def register_view(request):
             elif user.role == 'lecturer':
                 return redirect('accounts:complete_lecturer_profile')
             else:
-                login(request, user)
+                # Not authenticated first, so the backend must be named while ModelBackend is also listed
+                login(request, user, backend='accounts.backends.ProfileBackend')
                 return redirect('dashboard:home')
     else:
         form = UserRegistrationForm()
@@ -51,13 +52,7 @@ def login_view(request):
                 elif user.role == 'lecturer':
                     return redirect('dashboard:lecturer_dashboard')
                 else:  # student
-                    # Check if student profile is complete
-                    try:
-                        student = user.student_profile
-                        if not student.date_of_birth:  # Proxy for completion; add more checks if needed
-                            messages.info(request, 'Please complete your student profile.')
-                            return redirect('accounts:complete_student_profile')
-                    except Student.DoesNotExist:
+                    if not is_profile_complete(user, get_profile(user)):
                         messages.info(request, 'Please complete your student profile.')
                         return redirect('accounts:complete_student_profile')
                     return redirect('dashboard:student_dashboard')
@@ -76,16 +71,10 @@ def complete_student_profile(request):
         messages.error(request, 'Access denied.')
         return redirect('dashboard:home')
     
-    student = None
-    is_complete = False
-    try:
-        student = request.user.student_profile
-        if student.date_of_birth:  # Proxy for completion
-            is_complete = True
-            messages.info(request, 'Profile already completed.')
-            return redirect('dashboard:student_dashboard')
-    except Student.DoesNotExist:
-        pass
+    student = request.profile
+    if is_profile_complete(request.user, student):
+        messages.info(request, 'Profile already completed.')
+        return redirect('dashboard:student_dashboard')
     
     if request.method == 'POST':
         if student:
@@ -114,12 +103,9 @@ def complete_lecturer_profile(request):
         messages.error(request, 'Access denied.')
         return redirect('dashboard:home')
     
-    try:
-        lecturer = request.user.lecturer_profile
+    if request.profile:
         messages.info(request, 'Profile already completed.')
         return redirect('dashboard:lecturer_dashboard')
-    except Lecturer.DoesNotExist:
-        pass
     
     if request.method == 'POST':
         form = LecturerProfileForm(request.POST)
@@ -144,16 +130,8 @@ def profile_view(request):
         'user': user,
     }
     
-    if user.role == 'student':
-        try:
-            context['student'] = user.student_profile
-        except Student.DoesNotExist:
-            pass
-    elif user.role == 'lecturer':
-        try:
-            context['lecturer'] = user.lecturer_profile
-        except Lecturer.DoesNotExist:
-            pass
+    if request.profile:
+        context[user.role] = request.profile
     
     return render(request, 'accounts/profile.html', context)
 
@@ -165,11 +143,7 @@ def profile_edit_view(request):
     
     if request.method == 'POST':
         if user.role == 'student':
-            try:
-                student = user.student_profile
-                form = StudentProfileForm(request.POST, instance=student)
-            except Student.DoesNotExist:
-                form = StudentProfileForm(request.POST)
+            form = StudentProfileForm(request.POST, instance=request.profile or None)
             
             if form.is_valid():
                 student = form.save(user=user)
@@ -179,11 +153,7 @@ def profile_edit_view(request):
                 messages.error(request, 'Please correct the errors below.')
                 
         elif user.role == 'lecturer':
-            try:
-                lecturer = user.lecturer_profile
-                form = LecturerProfileForm(request.POST, instance=lecturer)
-            except Lecturer.DoesNotExist:
-                form = LecturerProfileForm(request.POST)
+            form = LecturerProfileForm(request.POST, instance=request.profile or None)
             
             if form.is_valid():
                 lecturer = form.save(commit=False)
@@ -196,19 +166,11 @@ def profile_edit_view(request):
             return redirect('accounts:profile')
     else:
         if user.role == 'student':
-            try:
-                student = user.student_profile
-                student_form = StudentProfileForm(instance=student)
-            except Student.DoesNotExist:
-                student_form = StudentProfileForm()
+            student_form = StudentProfileForm(instance=request.profile or None)
             context = {'student_form': student_form, 'lecturer_form': None}
             
         elif user.role == 'lecturer':
-            try:
-                lecturer = user.lecturer_profile
-                lecturer_form = LecturerProfileForm(instance=lecturer)
-            except Lecturer.DoesNotExist:
-                lecturer_form = LecturerProfileForm()
+            lecturer_form = LecturerProfileForm(instance=request.profile or None)
             context = {'lecturer_form': lecturer_form, 'student_form': None}
         else:
             context = {'student_form': None, 'lecturer_form': None}
@@ -229,25 +191,11 @@ def password_reset_request_view(request):
     if request.method == 'POST':
         form = PasswordResetRequestForm(request.POST)
         if form.is_valid():
-            email = form.cleaned_data['email']
-            try:
-                user = User.objects.get(email=email)
-                # Generate token
-                token = default_token_generator.make_token(user)
-                uid = urlsafe_base64_encode(force_bytes(user.pk))
-                # Create reset link
-                reset_url = request.build_absolute_uri(
-                    reverse('accounts:password_reset_confirm', kwargs={'uidb64': uid, 'token': token})
-                )
-                # Send email
-                subject = 'Password Reset Request'
-                message = f'Hi {user.get_full_name()},\n\nYou requested a password reset. Click the link below to reset your password:\n\n{reset_url}\n\nIf you did not request this, please ignore this email.'
-                html_message = f'Hi {user.get_full_name()},<br><br>You requested a password reset. Click the link below to reset your password:<br><br><a href="{reset_url}">Reset Password</a><br><br>If you did not request this, please ignore this email.'
-                send_mail(subject, message, 'noreply@stuattend.com', [email], html_message=html_message)
-                messages.success(request, 'Password reset link has been sent to your email.')
+            # Same work and same answer whether or not the account exists; the email is sent by send_outbox
+            if request_password_reset(form.cleaned_data['email'], client_ip(request)):
+                messages.success(request, 'If an account exists for this email address, a password reset link is on its way.')
                 return redirect('accounts:login')
-            except User.DoesNotExist:
-                messages.error(request, 'No account found with this email address.')
+            messages.error(request, 'Too many password reset requests. Please try again later.')
     else:
         form = PasswordResetRequestForm()
     return render(request, 'accounts/password_reset_request.html', {'form': form})
@@ -0,0 +1,89 @@
+"""
+Session close: materialise absences in bulk.
+
+For every session being closed, the course roster is diffed against the
+records of that day in SQL (sessions x enrollments, anti-joined on
+AttendanceRecord), and the missing students get 'absent' records through
+chunked bulk inserts. Statistics of the affected courses are then rebuilt in
+one set-based pass.
+"""
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from courses.models import Enrollment
+
+from .models import AttendanceRecord, ClassSession
+from .statistics import recompute_statistics
+
+# Sessions diffed per roster query
+SESSION_BATCH_SIZE = 500
+
+
+def due_sessions(now=None):
+    """Open sessions whose QR code has expired, or past sessions that never had one"""
+    now = now or timezone.now()
+    return ClassSession.objects.filter(closed_at__isnull=True).filter(
+        Q(qr_code__valid_until__lte=now) | Q(qr_code__isnull=True, date__lt=timezone.localdate(now))
+    )
+
+
+def missing_students(session_ids):
+    """Yield (session_id, course_id, date, student_id) for enrolled students without a record"""
+    recorded = AttendanceRecord.objects.filter(
+        course=OuterRef('course'),
+        date=OuterRef('session_date'),
+        student=OuterRef('student'),
+    )
+    # Annotating the session columns once keeps the subquery on the same join
+    return Enrollment.objects.annotate(
+        session=F('course__sessions__id'),
+        session_date=F('course__sessions__date'),
+    ).filter(session__in=session_ids).exclude(Exists(recorded)).values_list(
+        'session', 'course', 'session_date', 'student'
+    ).order_by()
+
+
+def close_sessions(sessions, chunk_size=1000, now=None):
+    """
+    Close `sessions` (a ClassSession queryset), creating absent records for every
+    enrolled student who did not scan. Returns {'sessions', 'absences', 'courses'}.
+    """
+    now = now or timezone.now()
+    session_ids = list(sessions.filter(closed_at__isnull=True).values_list('pk', flat=True))
+    totals = {'sessions': len(session_ids), 'absences': 0, 'courses': 0}
+    course_ids = set()
+
+    for start in range(0, len(session_ids), SESSION_BATCH_SIZE):
+        batch = session_ids[start:start + SESSION_BATCH_SIZE]
+        with transaction.atomic():
+            absences = []
+            for session_id, course_id, date, student_id in missing_students(batch).iterator(chunk_size=chunk_size):
+                absences.append(AttendanceRecord(
+                    student_id=student_id,
+                    course_id=course_id,
+                    session_id=session_id,
+                    date=date,
+                    time_in=now,
+                    status='absent',
+                    marked_by='system',
+                ))
+                course_ids.add(course_id)
+                if len(absences) >= chunk_size:
+                    totals['absences'] += _insert(absences)
+                    absences = []
+            if absences:
+                totals['absences'] += _insert(absences)
+            ClassSession.objects.filter(pk__in=batch).update(closed_at=now)
+
+    # One set-based rebuild covers every course that gained absences (and bumps report versions)
+    if course_ids:
+        recompute_statistics(sorted(course_ids))
+    totals['courses'] = len(course_ids)
+    return totals
+
+
+def _insert(absences):
+    # A scan racing the close wins; its (student, course, date) row already exists
+    AttendanceRecord.objects.bulk_create(absences, ignore_conflicts=True)
+    return len(absences)
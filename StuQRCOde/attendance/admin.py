@@ -1,26 +1,143 @@
-from django.contrib import admin
-from .models import QRCode, AttendanceRecord, AttendanceStatistics
+import time
+from datetime import timedelta
+
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from .forms import QRCodeReassignForm
+from .models import QRCode, ClassSession, AttendanceRecord, ArchivedAttendanceRecord, AttendanceStatistics, UserAgent
+from .pagination import EstimatedCountPaginator
+from .qr_lifecycle import deactivate_expired, extend_validity, reassign_course
+from .statistics import recompute_statistics
+
+# Every field is matched case-insensitively by prefix, never by substring. On
+# PostgreSQL each lookup, UPPER(col) LIKE UPPER('x%'), is served by the
+# UPPER(col) text_pattern_ops index of migration attendance 0012; other
+# backends scan the joined tables
+RECORD_SEARCH_FIELDS = [
+    'student__student_id__istartswith',
+    'course__code__istartswith',
+    '^student__user__first_name',
+    '^student__user__last_name',
+    '^course__name',
+]
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables with millions of rows"""
+    paginator = EstimatedCountPaginator
+    # The unfiltered total would be a second full COUNT(*) on every page
+    show_full_result_count = False
+    list_select_related = ['student__user', 'course']
+    autocomplete_fields = ['student', 'course']
 
 @admin.register(QRCode)
 class QRCodeAdmin(admin.ModelAdmin):
     list_display = ['id', 'course', 'valid_from', 'valid_until', 'is_active', 'created_by', 'created_at']
     search_fields = ['course__code', 'course__name', 'created_by__user__first_name', 'created_by__user__last_name']
     list_filter = ['is_active', 'created_at', 'valid_from', 'valid_until']
+    list_select_related = ['course', 'created_by__user']
     readonly_fields = ['id', 'created_at']
     ordering = ['-created_at']
+    actions = ['deactivate_expired_codes', 'extend_by_one_day', 'extend_by_one_week', 'reassign_to_course']
+
+    def _report(self, request, started, text):
+        self.message_user(request, f'{text} in {time.monotonic() - started:.2f}s.', messages.SUCCESS)
+
+    @admin.action(description='Deactivate selected codes that have expired')
+    def deactivate_expired_codes(self, request, queryset):
+        started = time.monotonic()
+        updated = deactivate_expired(queryset)
+        self._report(request, started, f'Deactivated {updated} expired QR codes')
+
+    @admin.action(description='Extend validity by one day')
+    def extend_by_one_day(self, request, queryset):
+        started = time.monotonic()
+        updated = extend_validity(queryset, timedelta(days=1))
+        self._report(request, started, f'Extended {updated} QR codes by one day')
+
+    @admin.action(description='Extend validity by one week')
+    def extend_by_one_week(self, request, queryset):
+        started = time.monotonic()
+        updated = extend_validity(queryset, timedelta(weeks=1))
+        self._report(request, started, f'Extended {updated} QR codes by one week')
+
+    @admin.action(description='Move unscanned codes to another course')
+    def reassign_to_course(self, request, queryset):
+        form = QRCodeReassignForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            started = time.monotonic()
+            totals = reassign_course(queryset, form.cleaned_data['course'])
+            self._report(
+                request, started,
+                f"Moved {totals['reassigned']} QR codes to {form.cleaned_data['course'].code}; "
+                f"{totals['skipped']} already scanned were left in place"
+            )
+            return None
+        return TemplateResponse(request, 'admin/attendance/qrcode/reassign_course.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Move QR codes to another course',
+            'form': form,
+            'count': queryset.count(),
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            'select_across': request.POST.get('select_across', '0'),
+        })
+
+@admin.register(ClassSession)
+class ClassSessionAdmin(admin.ModelAdmin):
+    list_display = ['course', 'date', 'schedule', 'qr_code', 'created_at']
+    search_fields = ['course__code', 'course__name']
+    list_filter = ['date', 'course__semester']
+    readonly_fields = ['created_at']
+    ordering = ['-date']
 
 @admin.register(AttendanceRecord)
-class AttendanceRecordAdmin(admin.ModelAdmin):
+class AttendanceRecordAdmin(LargeTableAdmin):
     list_display = ['student', 'course', 'date', 'time_in', 'status', 'marked_by']
-    search_fields = ['student__user__first_name', 'student__user__last_name', 'student__student_id', 'course__code', 'course__name']
-    list_filter = ['status', 'date', 'marked_by', 'course__semester']
+    search_fields = RECORD_SEARCH_FIELDS
+    list_filter = ['status', 'marked_by', 'course__semester']
+    date_hierarchy = 'date'
+    raw_id_fields = ['qr_code', 'session', 'user_agent']
     readonly_fields = ['time_in']
     ordering = ['-date', '-time_in']
 
+@admin.register(ArchivedAttendanceRecord)
+class ArchivedAttendanceRecordAdmin(LargeTableAdmin):
+    list_display = ['student', 'course', 'date', 'time_in', 'status', 'semester', 'archived_at']
+    search_fields = RECORD_SEARCH_FIELDS
+    list_filter = ['semester', 'status']
+    list_select_related = ['student__user', 'course', 'semester']
+    date_hierarchy = 'date'
+    raw_id_fields = ['user_agent']
+    readonly_fields = ['record_id', 'archived_at']
+    ordering = ['-date', '-time_in']
+
 @admin.register(AttendanceStatistics)
-class AttendanceStatisticsAdmin(admin.ModelAdmin):
+class AttendanceStatisticsAdmin(LargeTableAdmin):
     list_display = ['student', 'course', 'total_classes', 'attended_classes', 'percentage', 'last_updated']
-    search_fields = ['student__user__first_name', 'student__user__last_name', 'student__student_id', 'course__code', 'course__name']
+    search_fields = RECORD_SEARCH_FIELDS
     list_filter = ['course__semester', 'last_updated']
     readonly_fields = ['last_updated']
     ordering = ['-percentage']
+    actions = ['recompute_selected_courses']
+
+    @admin.action(description='Recompute statistics of the selected courses')
+    def recompute_selected_courses(self, request, queryset):
+        started = time.monotonic()
+        course_ids = sorted(set(queryset.order_by().values_list('course', flat=True).distinct()))
+        totals = recompute_statistics(course_ids)
+        self.message_user(
+            request,
+            f"Recomputed {totals['rows']} statistics rows for {totals['courses']} courses "
+            f"in {time.monotonic() - started:.2f}s.",
+            messages.SUCCESS,
+        )
+
+@admin.register(UserAgent)
+class UserAgentAdmin(admin.ModelAdmin):
+    list_display = ['value', 'first_seen']
+    search_fields = ['value']
+    readonly_fields = ['hash', 'first_seen']
+    ordering = ['-first_seen']
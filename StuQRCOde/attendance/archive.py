@@ -0,0 +1,179 @@
+"""
+Semester archival of attendance records.
+
+Closing a semester moves its rows out of AttendanceRecord into
+ArchivedAttendanceRecord, so the live table and its indexes only hold current
+semesters. Statistics are finalised before the move and kept as they are, and
+every archived row is also written to a gzip-compressed CSV export. Reports
+read the archive only for semesters that have been archived and are asked for;
+aggregates over many courses count both tables with count_records.
+
+A semester with archived rows but no archived_at was interrupted mid-move;
+archiving it again resumes the move without recomputing statistics from the
+remaining rows.
+"""
+import csv
+import gzip
+import logging
+import os
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from courses.models import Course
+
+from .absences import close_sessions
+from .models import AttendanceRecord, ArchivedAttendanceRecord, ClassSession
+from .report_cache import bump_course_versions
+from .statistics import ATTENDED_STATUSES, recompute_statistics
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = [
+    'id', 'student__student_id', 'course__code', 'qr_code_id', 'date', 'time_in',
+    'minutes_late', 'status', 'marked_by', 'ip_address', 'user_agent__value',
+]
+
+# Fields copied verbatim from the live record
+COPIED_FIELDS = [
+    'student_id', 'course_id', 'qr_code_id', 'date', 'time_in', 'minutes_late',
+    'status', 'marked_by', 'ip_address', 'user_agent_id',
+]
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def is_archived(course):
+    return course.semester.archived_at is not None
+
+
+def course_records(course):
+    """Records of a course, from the archive table once its semester has been archived"""
+    model = ArchivedAttendanceRecord if is_archived(course) else AttendanceRecord
+    return model.objects.filter(course=course)
+
+
+def count_records(group_by, **filters):
+    """
+    Return {value of `group_by`: {'total', 'attended'}} over the live and the
+    archived records matching `filters`, so archived semesters still count.
+    """
+    counts = {}
+    for model in (AttendanceRecord, ArchivedAttendanceRecord):
+        rows = model.objects.filter(**filters).values(group_by).annotate(
+            total=Count('id'),
+            attended=Count('id', filter=Q(status__in=ATTENDED_STATUSES)),
+        ).order_by()
+        for row in rows:
+            entry = counts.setdefault(row[group_by], {'total': 0, 'attended': 0})
+            entry['total'] += row['total']
+            entry['attended'] += row['attended']
+    return counts
+
+
+def export_path(semester, directory=None):
+    directory = directory or getattr(settings, 'ATTENDANCE_ARCHIVE_DIR', settings.BASE_DIR / 'archives')
+    return os.path.join(directory, f'attendance_{semester.name}_{semester.year}.csv.gz'.lower())
+
+
+def write_export(semester, path, chunk_size=2000):
+    """
+    Stream the semester's records into a gzip CSV; returns the number of rows.
+
+    Rows already moved to the archive come first, so a resumed archive still
+    exports the whole semester in record order.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rows = 0
+    archived = (
+        ArchivedAttendanceRecord.objects.filter(semester=semester).order_by('record_id')
+        .values_list('record_id', *EXPORT_FIELDS[1:])
+    )
+    live = AttendanceRecord.objects.filter(course__semester=semester).order_by('pk').values_list(*EXPORT_FIELDS)
+    with gzip.open(path, 'wt', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_FIELDS)
+        for records in (archived, live):
+            for row in records.iterator(chunk_size=chunk_size):
+                writer.writerow(row)
+                rows += 1
+    return rows
+
+
+def delete_moved(semester, first_pk, last_pk):
+    """
+    Delete the semester's live records in [first_pk, last_pk] with one DELETE.
+
+    QuerySet.delete() would load every row to send post_delete, and the
+    receivers would only bump the report versions archive_semester bumps once
+    at the end.
+    """
+    table = connection.ops.quote_name(AttendanceRecord._meta.db_table)
+    courses = connection.ops.quote_name(Course._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE id BETWEEN %s AND %s '
+            f'AND course_id IN (SELECT id FROM {courses} WHERE semester_id = %s)',
+            [first_pk, last_pk, semester.pk],
+        )
+
+
+def archive_semester(semester, export_dir=None, chunk_size=2000, force=False, progress=None):
+    """
+    Archive a closed semester: close its sessions, finalise statistics, export and
+    move its records. Safe to re-run after an interruption.
+
+    Returns {'exported', 'archived', 'path'}.
+    """
+    if semester.archived_at is not None:
+        raise ArchiveError(f'{semester} is already archived.')
+    if not force and (semester.is_active or semester.end_date >= timezone.localdate()):
+        raise ArchiveError(f'{semester} has not ended yet; deactivate it first or use force.')
+
+    course_ids = list(semester.courses.values_list('pk', flat=True))
+    path = export_path(semester, export_dir)
+    resuming = ArchivedAttendanceRecord.objects.filter(semester=semester).exists()
+    if resuming:
+        # Sessions were closed and statistics finalised before the first chunk
+        # moved; recomputing now would only see the rows still left here
+        logger.info('Resuming the archive of %s', semester)
+    else:
+        close_sessions(ClassSession.objects.filter(course__in=course_ids))
+        # Statistics stay live after the move, so they are finalised while the records are still here
+        recompute_statistics(course_ids)
+
+    # The export of an interrupted run is complete: it is written before anything moves
+    if resuming and os.path.exists(path):
+        exported = (
+            ArchivedAttendanceRecord.objects.filter(semester=semester).count()
+            + AttendanceRecord.objects.filter(course__in=course_ids).count()
+        )
+    else:
+        exported = write_export(semester, path, chunk_size)
+        logger.info('Exported %s records of %s to %s', exported, semester, path)
+
+    live = AttendanceRecord.objects.filter(course__in=course_ids).order_by('pk')
+    archived = ArchivedAttendanceRecord.objects.filter(semester=semester).count() if resuming else 0
+    while True:
+        with transaction.atomic():
+            chunk = list(live.values('pk', *COPIED_FIELDS)[:chunk_size])
+            if not chunk:
+                break
+            pks = [row.pop('pk') for row in chunk]
+            ArchivedAttendanceRecord.objects.bulk_create([
+                ArchivedAttendanceRecord(record_id=pk, semester=semester, **row)
+                for pk, row in zip(pks, chunk)
+            ])
+            delete_moved(semester, pks[0], pks[-1])
+        archived += len(pks)
+        if progress is not None:
+            progress(archived, exported)
+
+    semester.archived_at = timezone.now()
+    semester.save(update_fields=['archived_at'])
+    bump_course_versions(course_ids)
+    return {'exported': exported, 'archived': archived, 'path': path}
@@ -0,0 +1,154 @@
+"""
+Semester-wide attendance workbook export.
+
+Per-course figures are aggregated in worker threads (one aggregate query per
+course) and streamed into a write-only openpyxl workbook, one sheet per course.
+"""
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q
+from openpyxl import Workbook
+
+from accounts.models import Student
+
+from .models import ClassSession
+from .statistics import ATTENDED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+REPORT_HEADERS = ['#', 'Student ID', 'Student Name', 'Total Classes', 'Present', 'Absent', 'Percentage', 'Status']
+SUMMARY_HEADERS = ['Course Code', 'Course Name', 'Lecturer', 'Students', 'Classes Held', 'Present', 'Average %']
+
+INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+def attendance_status(percentage):
+    """Map an attendance percentage to the Good/Fair/Poor label used in reports"""
+    return 'Good' if percentage >= 75 else 'Fair' if percentage >= 50 else 'Poor'
+
+
+def build_course_rows(course_id, archived=False):
+    """Collect per-student attendance figures for the roster of one course in two queries"""
+    # Archived semesters keep their records in the archive table
+    relation = 'archived_attendance_records' if archived else 'attendance_records'
+    total_classes = ClassSession.objects.filter(course_id=course_id).count()
+    students = Student.objects.filter(enrollments__course=course_id).values(
+        'student_id',
+        'user__first_name',
+        'user__last_name',
+    ).annotate(
+        present_classes=Count(
+            relation,
+            filter=Q(**{f'{relation}__course': course_id, f'{relation}__status__in': ATTENDED_STATUSES}),
+        ),
+    ).order_by('student_id')
+
+    rows = []
+    for student in students:
+        present_classes = student['present_classes']
+        percentage = round(present_classes / total_classes * 100, 2) if total_classes > 0 else 0
+        rows.append({
+            'student_id': student['student_id'],
+            'student_name': f"{student['user__first_name']} {student['user__last_name']}".strip(),
+            'total_classes': total_classes,
+            'present_classes': present_classes,
+            'absent_classes': total_classes - present_classes,
+            'percentage': percentage,
+        })
+    return rows
+
+
+def _build_course_rows_in_thread(course_id, archived=False):
+    """Worker entry point; each thread owns its own connection and must close it"""
+    try:
+        return build_course_rows(course_id, archived)
+    finally:
+        connection.close()
+
+
+def sheet_title(course):
+    """Excel sheet names are limited to 31 characters and a restricted charset"""
+    return INVALID_SHEET_CHARS.sub('-', course.code)[:31] or f'Course {course.pk}'
+
+
+def write_semester_workbook(semester, output, courses=None, include_summary=True, workers=None, progress=None):
+    """
+    Write one sheet per course of `semester` to `output` (a path or file-like object).
+
+    `courses` narrows the export (e.g. to a lecturer's own courses), `workers` sets the
+    number of aggregation threads (1 runs inline) and `progress` is called as
+    progress(done, total, course) after each sheet is written.
+    """
+    if courses is None:
+        courses = semester.courses.all()
+    courses = list(courses.select_related('lecturer__user').order_by('code'))
+    if workers is None:
+        workers = getattr(settings, 'ATTENDANCE_EXPORT_WORKERS', 4)
+
+    wb = Workbook(write_only=True)
+    summary_ws = wb.create_sheet('Summary') if include_summary else None
+    if summary_ws is not None:
+        summary_ws.append([f"Semester Attendance Summary - {semester}"])
+        summary_ws.append([])
+        summary_ws.append(SUMMARY_HEADERS)
+
+    def write_course(course, rows):
+        ws = wb.create_sheet(sheet_title(course))
+        ws.append([f"Course Attendance Report - {course.name}"])
+        ws.append([f"Course Code: {course.code}"])
+        ws.append([f"Lecturer: {course.lecturer.user.get_full_name()}"])
+        ws.append([f"Semester: {semester}"])
+        ws.append([])
+        ws.append(REPORT_HEADERS)
+        for i, row in enumerate(rows, 1):
+            ws.append([
+                i,
+                row['student_id'],
+                row['student_name'],
+                row['total_classes'],
+                row['present_classes'],
+                row['absent_classes'],
+                row['percentage'],
+                attendance_status(row['percentage']),
+            ])
+        if summary_ws is not None:
+            classes_held = rows[0]['total_classes'] if rows else ClassSession.objects.filter(course=course).count()
+            total_present = sum(row['present_classes'] for row in rows)
+            average = round(sum(row['percentage'] for row in rows) / len(rows), 2) if rows else 0
+            summary_ws.append([
+                course.code,
+                course.name,
+                course.lecturer.user.get_full_name(),
+                len(rows),
+                classes_held,
+                total_present,
+                average,
+            ])
+
+    archived = semester.archived_at is not None
+    total = len(courses)
+    if workers > 1 and total > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, total)) as executor:
+            results = executor.map(
+                _build_course_rows_in_thread, [course.pk for course in courses], [archived] * total
+            )
+            for done, (course, rows) in enumerate(zip(courses, results), 1):
+                write_course(course, rows)
+                _report_progress(progress, done, total, course)
+    else:
+        for done, course in enumerate(courses, 1):
+            write_course(course, build_course_rows(course.pk, archived))
+            _report_progress(progress, done, total, course)
+
+    wb.save(output)
+    return total
+
+
+def _report_progress(progress, done, total, course):
+    logger.info('Semester export: %s/%s courses written (%s)', done, total, course.code)
+    if progress is not None:
+        progress(done, total, course)
@@ -71,3 +71,13 @@ class AttendanceFilterForm(forms.Form):
                 ).distinct()
             else:
                 self.fields['course'].queryset = Course.objects.all()
+
+
+class QRCodeReassignForm(forms.Form):
+    """Target course of the admin's bulk reassign action"""
+    course = forms.ModelChoiceField(queryset=None)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from courses.models import Course
+        self.fields['course'].queryset = Course.objects.order_by('code')
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.archive import ArchiveError, archive_semester
+from courses.models import Semester
+
+
+class Command(BaseCommand):
+    help = 'Move the attendance records of a closed semester to the archive table and write a compressed export'
+
+    def add_arguments(self, parser):
+        parser.add_argument('semester_id', type=int)
+        parser.add_argument('--output-dir', help='Directory for the .csv.gz export (default ATTENDANCE_ARCHIVE_DIR)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Records moved per transaction')
+        parser.add_argument('--force', action='store_true', help='Archive even if the semester is active or not over')
+
+    def handle(self, *args, **options):
+        try:
+            semester = Semester.objects.get(pk=options['semester_id'])
+        except Semester.DoesNotExist:
+            raise CommandError(f"Semester {options['semester_id']} does not exist")
+
+        def progress(done, total):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'[{done}/{total}] records archived')
+
+        started = time.monotonic()
+        try:
+            result = archive_semester(
+                semester,
+                export_dir=options['output_dir'],
+                chunk_size=options['chunk_size'],
+                force=options['force'],
+                progress=progress,
+            )
+        except ArchiveError as e:
+            raise CommandError(str(e))
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {result['archived']} records of {semester} in {elapsed:.2f}s; export written to {result['path']}"
+        ))
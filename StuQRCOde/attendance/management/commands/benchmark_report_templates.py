@@ -0,0 +1,64 @@
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.contrib.auth.models import AnonymousUser
+
+
+class Command(BaseCommand):
+    help = 'Measure the render time of the course attendance report with and without fragment caching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Number of students in the synthetic report')
+        parser.add_argument('--repeat', type=int, default=20, help='Renders per measurement')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        request = RequestFactory().get('/attendance/reports/course/1/')
+        request.user = AnonymousUser()
+
+        course = SimpleNamespace(
+            id=1,
+            code='BENCH101',
+            name='Benchmark Course',
+            lecturer=SimpleNamespace(user=SimpleNamespace(get_full_name='Lecturer User')),
+            semester=SimpleNamespace(name='Fall'),
+        )
+        attendance_data = [
+            {
+                'student': SimpleNamespace(student_id=f'S{i:05d}', user=SimpleNamespace(get_full_name=f'Student {i}')),
+                'total_classes': 30,
+                'present_classes': i % 31,
+                'absent_classes': 30 - i % 31,
+                'percentage': round((i % 31) / 30 * 100, 2),
+                'records': [],
+            }
+            for i in range(rows)
+        ]
+
+        def render(version):
+            context = {'course': course, 'attendance_data': attendance_data, 'data_version': version}
+            render_to_string('attendance/course_attendance_report.html', context, request=request)
+
+        # Warm the template loader so both measurements exclude compilation
+        render('warmup')
+
+        started = time.perf_counter()
+        for i in range(repeat):
+            # A new data version on every render forces the fragments to be rebuilt
+            render(f'cold-{time.time_ns()}-{i}')
+        cold = (time.perf_counter() - started) / repeat * 1000
+
+        render('warm')
+        started = time.perf_counter()
+        for _ in range(repeat):
+            render('warm')
+        warm = (time.perf_counter() - started) / repeat * 1000
+
+        saving = (1 - warm / cold) * 100 if cold else 0
+        self.stdout.write(f'Rows: {rows}, renders per measurement: {repeat}')
+        self.stdout.write(f'Fragments rebuilt: {cold:.2f} ms per render')
+        self.stdout.write(f'Fragments cached:  {warm:.2f} ms per render')
+        self.stdout.write(self.style.SUCCESS(f'Render-time saving: {saving:.1f}%'))
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from attendance.models import QRCode
+
+
+def _status(qr_code, now):
+    if not qr_code.is_active:
+        return 'inactive'
+    if qr_code.valid_from > now:
+        return 'not yet valid'
+    if qr_code.valid_until < now:
+        return 'expired'
+    return 'valid'
+
+
+class Command(BaseCommand):
+    help = 'Report QR code validity: counts per status and, with --list, every code and why it is (not) valid'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses', help='Course id (repeatable)')
+        parser.add_argument('--list', action='store_true', help='Print each QR code, newest first')
+        parser.add_argument('--limit', type=int, help='Print at most this many QR codes with --list')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per round trip with --list')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        now = timezone.now()
+        qr_codes = QRCode.objects.all()
+        if options['courses']:
+            qr_codes = qr_codes.filter(course__in=options['courses'])
+
+        self.stdout.write(f'Current time: {now} ({now.tzinfo})')
+        if options['list']:
+            listed = qr_codes.select_related('course').order_by('-created_at', '-id')
+            if options['limit']:
+                listed = listed[:options['limit']]
+            for qr_code in listed.iterator(chunk_size=options['chunk_size']):
+                self.stdout.write(
+                    f'{qr_code.id}  {qr_code.course.code:<10} {_status(qr_code, now):<14} '
+                    f'{qr_code.valid_from:%Y-%m-%d %H:%M} -> {qr_code.valid_until:%Y-%m-%d %H:%M}  '
+                    f'/attendance/qr-codes/{qr_code.id}/'
+                )
+
+        counts = {
+            'valid': qr_codes.valid_at(now).count(),
+            'not yet valid': qr_codes.upcoming(now).count(),
+            'expired but still active': qr_codes.expired(now).filter(is_active=True).count(),
+            'inactive': qr_codes.filter(is_active=False).count(),
+        }
+        for status, count in counts.items():
+            self.stdout.write(f'{status:>25}: {count}')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Checked {sum(counts.values())} QR codes in {elapsed:.2f}s'))
+        if counts['expired but still active']:
+            self.stdout.write('Run deactivate_expired_qr_codes to deactivate the expired ones.')
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from attendance.absences import close_sessions, due_sessions
+from attendance.models import ClassSession
+
+
+class Command(BaseCommand):
+    help = 'Close sessions whose QR code has expired and record absences for enrolled students who did not scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Close every open session of this date (YYYY-MM-DD) instead of the due ones')
+        parser.add_argument('--course', type=int, action='append', dest='courses', help='Course id (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Absent records per bulk insert')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            sessions = ClassSession.objects.filter(date=options['date'])
+        else:
+            sessions = due_sessions()
+        if options['courses']:
+            sessions = sessions.filter(course__in=options['courses'])
+
+        started = time.monotonic()
+        totals = close_sessions(sessions, chunk_size=options['chunk_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {totals['sessions']} sessions, recorded {totals['absences']} absences "
+            f"across {totals['courses']} courses in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance.models import ClassSession
+from attendance.report_cache import bump_course_versions
+
+
+class Command(BaseCommand):
+    help = 'Create the class sessions of every schedule occurring on a date (default today)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='First date to process (YYYY-MM-DD)')
+        parser.add_argument('--days', type=int, default=1, help='Number of consecutive days to process')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('--date must be formatted as YYYY-MM-DD')
+
+        created = 0
+        for offset in range(options['days']):
+            day = start + timedelta(days=offset)
+            course_ids = ClassSession.create_scheduled(day)
+            # bulk_create skips the signals that invalidate cached reports
+            bump_course_versions(course_ids)
+            created += len(course_ids)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{day}: {len(course_ids)} sessions created')
+
+        self.stdout.write(self.style.SUCCESS(f'Created {created} class sessions'))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from attendance.models import QRCode
+from attendance.qr_lifecycle import deactivate_expired
+
+
+class Command(BaseCommand):
+    help = 'Deactivate QR codes whose validity has ended, once or as a periodic sweeper'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses', help='Course id (repeatable)')
+        parser.add_argument('--chunk-size', type=int, help='Rows per UPDATE for large backlogs (default: one UPDATE)')
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping instead of exiting after one pass')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between sweeps with --loop')
+
+    def handle(self, *args, **options):
+        qr_codes = QRCode.objects.all()
+        if options['courses']:
+            qr_codes = qr_codes.filter(course__in=options['courses'])
+
+        def progress(updated):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{updated} QR codes deactivated')
+
+        while True:
+            started = time.monotonic()
+            updated = deactivate_expired(qr_codes, chunk_size=options['chunk_size'], progress=progress)
+            elapsed = time.monotonic() - started
+            if updated or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Deactivated {updated} expired QR codes in {elapsed:.2f}s'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from attendance.query_plans import HOT_QUERIES, explain_hot_query
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot attendance queries and report whether each uses its index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', action='store_true', help='Print the full query plans')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Database backend: {connection.vendor}')
+        missing = 0
+        for name in HOT_QUERIES:
+            # SET LOCAL on PostgreSQL only lasts for this transaction
+            with transaction.atomic():
+                plan, index = explain_hot_query(name)
+            if index:
+                self.stdout.write(self.style.SUCCESS(f'{name}: uses {index}'))
+            else:
+                missing += 1
+                self.stdout.write(self.style.ERROR(f"{name}: uses none of {', '.join(HOT_QUERIES[name][1])}"))
+            if options['plans'] or not index:
+                self.stdout.write(f'    {plan}'.replace('\n', '\n    '))
+
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} of {len(HOT_QUERIES)} queries miss their index'))
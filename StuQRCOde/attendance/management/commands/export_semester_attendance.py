@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.exports import write_semester_workbook
+from courses.models import Semester
+
+
+class Command(BaseCommand):
+    help = 'Export a semester attendance workbook with one sheet per course'
+
+    def add_arguments(self, parser):
+        parser.add_argument('semester_id', type=int)
+        parser.add_argument('--output', help='Destination .xlsx path (default: semester_attendance_<name>_<year>.xlsx)')
+        parser.add_argument('--workers', type=int, default=None, help='Number of aggregation threads (1 runs inline)')
+        parser.add_argument('--no-summary', action='store_true', help='Skip the summary sheet')
+
+    def handle(self, *args, **options):
+        try:
+            semester = Semester.objects.get(pk=options['semester_id'])
+        except Semester.DoesNotExist:
+            raise CommandError(f"Semester {options['semester_id']} does not exist")
+
+        output = options['output'] or f'semester_attendance_{semester.name}_{semester.year}.xlsx'
+        started = time.monotonic()
+
+        def progress(done, total, course):
+            self.stdout.write(f'[{done}/{total}] {course.code} written')
+
+        total = write_semester_workbook(
+            semester,
+            output,
+            include_summary=not options['no_summary'],
+            workers=options['workers'],
+            progress=progress,
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Exported {total} courses for {semester} to {output} in {elapsed:.1f}s'))
@@ -0,0 +1,50 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.models import QRCode
+from attendance.qr_lifecycle import CHUNK_SIZE, extend_validity
+
+
+class Command(BaseCommand):
+    help = (
+        'Extend the validity of QR codes; codes that already expired are extended from now '
+        'and reactivated if the expiry sweep deactivated them'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, required=True, help='Hours to add to valid_until')
+        parser.add_argument('--id', action='append', dest='ids', help='QR code id (repeatable)')
+        parser.add_argument('--course', type=int, action='append', dest='courses', help='Course id (repeatable)')
+        parser.add_argument('--active-only', action='store_true', help='Leave deactivated QR codes alone')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per UPDATE')
+
+    def handle(self, *args, **options):
+        if not options['ids'] and not options['courses']:
+            raise CommandError('Select QR codes with --id or --course.')
+        if options['hours'] <= 0:
+            raise CommandError('--hours must be positive.')
+        qr_codes = QRCode.objects.all()
+        if options['ids']:
+            qr_codes = qr_codes.filter(pk__in=options['ids'])
+        if options['courses']:
+            qr_codes = qr_codes.filter(course__in=options['courses'])
+        if options['active_only']:
+            qr_codes = qr_codes.filter(is_active=True)
+
+        def progress(updated):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{updated} QR codes extended')
+
+        started = time.monotonic()
+        updated = extend_validity(
+            qr_codes,
+            timedelta(hours=options['hours']),
+            chunk_size=options['chunk_size'],
+            progress=progress,
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Extended {updated} QR codes by {options['hours']:g} hours in {elapsed:.2f}s"
+        ))
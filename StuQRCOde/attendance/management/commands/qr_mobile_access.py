@@ -0,0 +1,37 @@
+import socket
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+def local_ip():
+    """Address of the interface that routes outwards; no packet is sent"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(('8.8.8.8', 80))
+            return s.getsockname()[0]
+    except OSError:
+        return '127.0.0.1'
+
+
+class Command(BaseCommand):
+    help = 'Show how to make QR code scan URLs reachable from phones on the local network'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8000, help='Port the development server listens on')
+
+    def handle(self, *args, **options):
+        ip = local_ip()
+        server_url = f"http://{ip}:{options['port']}"
+        base_url = settings.BASE_URL.rstrip('/')
+
+        self.stdout.write(f'Local IP address: {ip}')
+        self.stdout.write(f'QR codes currently encode: {base_url}/attendance/scan/<qr_code_id>/')
+        if 'localhost' in base_url or '127.0.0.1' in base_url:
+            self.stdout.write(self.style.WARNING('BASE_URL points at this machine only; phones cannot open these links.'))
+        self.stdout.write('')
+        self.stdout.write('For phones on the same network:')
+        self.stdout.write(f"  1. Run the server on all interfaces: python manage.py runserver 0.0.0.0:{options['port']}")
+        self.stdout.write(f'  2. Set BASE_URL={server_url} in the environment')
+        self.stdout.write(f'  3. Allow the host: ALLOWED_HOSTS={ip},localhost,127.0.0.1 in the environment')
+        self.stdout.write(self.style.SUCCESS(f'Scan URLs will then read {server_url}/attendance/scan/<qr_code_id>/'))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.models import QRCode
+from attendance.qr_lifecycle import CHUNK_SIZE, reassign_course
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Move QR codes that were never scanned to another course'
+
+    def add_arguments(self, parser):
+        parser.add_argument('to_course', type=int, help='Id of the course to move the QR codes to')
+        parser.add_argument('--id', action='append', dest='ids', help='QR code id (repeatable)')
+        parser.add_argument('--from-course', type=int, action='append', dest='courses', help='Course id (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per UPDATE')
+
+    def handle(self, *args, **options):
+        if not options['ids'] and not options['courses']:
+            raise CommandError('Select QR codes with --id or --from-course.')
+        try:
+            course = Course.objects.get(pk=options['to_course'])
+        except Course.DoesNotExist:
+            raise CommandError(f"Course {options['to_course']} does not exist.")
+        qr_codes = QRCode.objects.exclude(course=course)
+        if options['ids']:
+            qr_codes = qr_codes.filter(pk__in=options['ids'])
+        if options['courses']:
+            qr_codes = qr_codes.filter(course__in=options['courses'])
+
+        started = time.monotonic()
+        totals = reassign_course(qr_codes, course, chunk_size=options['chunk_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {totals['reassigned']} QR codes to {course.code} "
+            f"({totals['skipped']} already scanned, left in place) in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from attendance.statistics import recompute_statistics
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Rebuild AttendanceStatistics from attendance records for all courses, a semester or a course'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester', type=int, help='Only courses of this semester id')
+        parser.add_argument('--course', type=int, action='append', dest='courses', help='Course id (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per bulk upsert')
+        parser.add_argument('--workers', type=int, default=1, help='Processes to fan courses out to')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options['semester']:
+            courses = courses.filter(semester_id=options['semester'])
+        if options['courses']:
+            courses = courses.filter(pk__in=options['courses'])
+        course_ids = list(courses.order_by('pk').values_list('pk', flat=True))
+
+        def progress(done, total):
+            if options['verbosity'] > 1 or done == total:
+                self.stdout.write(f'[{done}/{total}] courses recomputed')
+
+        started = time.monotonic()
+        totals = recompute_statistics(
+            course_ids,
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            progress=progress,
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed {totals['rows']} statistics rows for {totals['courses']} courses "
+            f"({totals['deleted']} stale rows removed) in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from attendance.report_cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit-rate statistics for the report aggregate cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        self.stdout.write(f"Hits: {stats['hits']}")
+        self.stdout.write(f"Misses: {stats['misses']}")
+        self.stdout.write(f"Hit rate: {stats['hit_rate']}%")
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,80 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from attendance.models import QRCode
+from attendance.qr_lifecycle import CHUNK_SIZE, reset_validity
+
+
+class Command(BaseCommand):
+    help = 'Make QR codes valid from now for a number of hours, e.g. to test scanning and display'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--id', action='append', dest='ids', help='QR code id (repeatable)')
+        parser.add_argument('--course', type=int, action='append', dest='courses', help='Course id (repeatable)')
+        parser.add_argument('--latest', action='store_true', help='The most recently created QR code')
+        parser.add_argument('--invalid', action='store_true', help='Only QR codes that cannot be scanned right now; needs --id or --course unless --dry-run')
+        parser.add_argument('--hours', type=float, default=1, help='Hours the codes stay valid from now')
+        parser.add_argument('--backdate-minutes', type=int, default=0, help='Start the validity this many minutes ago')
+        parser.add_argument('--activate', action='store_true', help='Also reactivate codes deactivated by hand')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per UPDATE')
+
+    def handle(self, *args, **options):
+        if not (options['ids'] or options['courses'] or options['latest'] or options['invalid']):
+            raise CommandError('Select QR codes with --id, --course, --latest or --invalid.')
+        if options['invalid'] and not (options['ids'] or options['courses'] or options['dry_run']):
+            # Every expired code in the database would become scannable again
+            raise CommandError('--invalid resets codes only together with --id or --course; use --dry-run to list them.')
+        if options['hours'] <= 0:
+            raise CommandError('--hours must be positive.')
+
+        now = timezone.now()
+        qr_codes = QRCode.objects.all()
+        if options['ids']:
+            qr_codes = qr_codes.filter(pk__in=options['ids'])
+        if options['courses']:
+            qr_codes = qr_codes.filter(course__in=options['courses'])
+        if options['invalid']:
+            qr_codes = qr_codes.exclude(pk__in=QRCode.objects.valid_at(now).values('pk'))
+        if not options['activate']:
+            # Codes the expiry sweep deactivated come back with their new window
+            qr_codes = qr_codes.filter(Q(is_active=True) | Q(expired_at__isnull=False))
+        if options['latest']:
+            latest = list(qr_codes.order_by('-created_at').values_list('pk', flat=True)[:1])
+            qr_codes = QRCode.objects.filter(pk__in=latest)
+
+        valid_from = now - timedelta(minutes=options['backdate_minutes'])
+        valid_until = now + timedelta(hours=options['hours'])
+        self.stdout.write(f'New validity: {valid_from} -> {valid_until}')
+
+        started = time.monotonic()
+        if options['dry_run']:
+            count = qr_codes.count()
+            for pk, code in qr_codes.order_by('-created_at').values_list('pk', 'course__code')[:10]:
+                self.stdout.write(f'{pk}  {code}  /attendance/qr-codes/{pk}/')
+            self.stdout.write(self.style.SUCCESS(
+                f'Would reset {count} QR codes (dry run, {time.monotonic() - started:.2f}s)'
+            ))
+            return
+
+        def progress(updated):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{updated} QR codes reset')
+
+        updated = reset_validity(
+            qr_codes,
+            valid_from,
+            valid_until,
+            activate=options['activate'],
+            chunk_size=options['chunk_size'],
+            progress=progress,
+        )
+        if options['latest'] and updated:
+            self.stdout.write(f'Test it at {settings.BASE_URL.rstrip("/")}/attendance/qr-codes/{latest[0]}/')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Reset the validity of {updated} QR codes in {elapsed:.2f}s'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from attendance.user_agents import storage_report
+
+
+class Command(BaseCommand):
+    help = 'Report how much storage interning user agents saves'
+
+    def handle(self, *args, **options):
+        report = storage_report()
+        self.stdout.write(f"Records with a user agent: {report['records']}")
+        self.stdout.write(f"Distinct user agents: {report['agents']}")
+        self.stdout.write(f"Stored inline: {report['inline_bytes']} bytes")
+        self.stdout.write(f"Stored interned: {report['interned_bytes']} bytes")
+        self.stdout.write(self.style.SUCCESS(f"Saved: {report['saved_percent']}%"))
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for table in ('attendance_attendancerecord', 'attendance_useragent'):
+                    cursor.execute('SELECT pg_size_pretty(pg_total_relation_size(%s))', [table])
+                    self.stdout.write(f'{table}: {cursor.fetchone()[0]} on disk')
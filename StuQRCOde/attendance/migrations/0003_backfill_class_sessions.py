@@ -0,0 +1,50 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 1000
+
+
+def backfill_sessions(apps, schema_editor):
+    """Create one session per (course, date) that has records and attach the records to it"""
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    ClassSession = apps.get_model('attendance', 'ClassSession')
+    ClassSchedule = apps.get_model('courses', 'ClassSchedule')
+
+    schedules = {}
+    for schedule in ClassSchedule.objects.order_by('start_time').iterator():
+        schedules.setdefault((schedule.course_id, schedule.day), schedule.pk)
+
+    batch = []
+    previous = None
+    occurrences = AttendanceRecord.objects.values_list('course', 'date', 'qr_code').order_by('course', 'date')
+    for course_id, day, qr_code_id in occurrences.iterator(chunk_size=BATCH_SIZE):
+        # Ordered by (course, date), so each occurrence is seen as one run of rows
+        if (course_id, day) == previous:
+            continue
+        previous = (course_id, day)
+        batch.append(ClassSession(
+            course_id=course_id,
+            date=day,
+            qr_code_id=qr_code_id,
+            schedule_id=schedules.get((course_id, day.strftime('%A'))),
+        ))
+        if len(batch) >= BATCH_SIZE:
+            ClassSession.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        ClassSession.objects.bulk_create(batch, ignore_conflicts=True)
+
+    AttendanceRecord.objects.filter(session__isnull=True).update(session=Subquery(
+        ClassSession.objects.filter(course=OuterRef('course'), date=OuterRef('date')).values('pk')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_class_session'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sessions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_rename_department_student_program_and_more'),
+        ('attendance', '0003_backfill_class_sessions'),
+        ('courses', '0002_enrollment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['course', '-date', '-time_in'], name='record_course_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['course', 'status'], name='record_course_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['-date', '-time_in'], name='record_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancestatistics',
+            index=models.Index(fields=['course', 'percentage'], name='stats_course_percentage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='qrcode',
+            index=models.Index(fields=['-created_at'], name='qr_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='qrcode',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['course', 'valid_until'], name='qr_active_course_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def backfill_minutes_late(apps, schema_editor):
+    """Record lateness of existing scans against the schedule of their weekday; statuses are left alone"""
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    ClassSchedule = apps.get_model('courses', 'ClassSchedule')
+
+    slots = {}
+    for schedule in ClassSchedule.objects.order_by('start_time').iterator():
+        slots.setdefault((schedule.course_id, schedule.day), []).append(schedule)
+
+    batch = []
+    for record in AttendanceRecord.objects.only('pk', 'course_id', 'time_in').iterator(chunk_size=BATCH_SIZE):
+        local = timezone.localtime(record.time_in)
+        day_slots = slots.get((record.course_id, WEEKDAYS[local.weekday()]))
+        if not day_slots:
+            continue
+        slot = next((s for s in day_slots if local.time() <= s.end_time), day_slots[-1])
+        start = timezone.make_aware(datetime.combine(local.date(), slot.start_time), local.tzinfo)
+        record.minutes_late = max(0, int((local - start).total_seconds() // 60))
+        batch.append(record)
+        if len(batch) >= BATCH_SIZE:
+            AttendanceRecord.objects.bulk_update(batch, ['minutes_late'])
+            batch = []
+    if batch:
+        AttendanceRecord.objects.bulk_update(batch, ['minutes_late'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_hot_query_indexes'),
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='minutes_late',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_minutes_late, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_record_minutes_late'),
+        ('courses', '0002_enrollment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classsession',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='marked_by',
+            field=models.CharField(choices=[('qr_scan', 'QR Scan'), ('manual', 'Manual'), ('system', 'System')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='qr_code',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_records', to='attendance.qrcode'),
+        ),
+        migrations.AddIndex(
+            model_name='classsession',
+            index=models.Index(condition=models.Q(('closed_at__isnull', True)), fields=['date'], name='session_open_idx'),
+        ),
+    ]
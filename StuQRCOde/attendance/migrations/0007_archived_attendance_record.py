@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_rename_department_student_program_and_more'),
+        ('attendance', '0006_session_close'),
+        ('courses', '0003_semester_archived_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAttendanceRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_id', models.BigIntegerField()),
+                ('qr_code_id', models.UUIDField(blank=True, null=True)),
+                ('date', models.DateField()),
+                ('time_in', models.DateTimeField()),
+                ('minutes_late', models.PositiveIntegerField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('present', 'Present'), ('absent', 'Absent'), ('late', 'Late'), ('excused', 'Excused')], max_length=10)),
+                ('marked_by', models.CharField(max_length=20)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('user_agent', models.TextField(blank=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendance_records', to='courses.course')),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendance_records', to='courses.semester')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendance_records', to='accounts.student')),
+            ],
+            options={
+                'ordering': ['-date', '-time_in'],
+                'indexes': [models.Index(fields=['course', 'date'], name='archived_course_date_idx'), models.Index(fields=['student', 'course'], name='archived_student_course_idx')],
+            },
+        ),
+    ]
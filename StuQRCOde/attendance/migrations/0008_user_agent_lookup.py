@@ -0,0 +1,87 @@
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 2000
+
+
+def agent_hash(value):
+    return hashlib.sha256(value.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _intern(UserAgent, values, ids):
+    """Fill `ids` ({value: id}) for every value not interned yet"""
+    missing = {agent_hash(value): value for value in values if value not in ids}
+    if not missing:
+        return
+    UserAgent.objects.bulk_create(
+        [UserAgent(hash=key, value=value) for key, value in missing.items()],
+        ignore_conflicts=True,
+    )
+    for key, pk in UserAgent.objects.filter(hash__in=missing).values_list('hash', 'pk'):
+        ids[missing[key]] = pk
+
+
+def forwards(apps, schema_editor):
+    """Point every record at its interned agent, one committed chunk of rows at a time"""
+    UserAgent = apps.get_model('attendance', 'UserAgent')
+    ids = {}
+    for model_name in ('AttendanceRecord', 'ArchivedAttendanceRecord'):
+        model = apps.get_model('attendance', model_name)
+        pending = model.objects.exclude(user_agent='').filter(agent__isnull=True).order_by('pk')
+        last_pk = 0
+        while True:
+            rows = list(pending.filter(pk__gt=last_pk).values_list('pk', 'user_agent')[:BATCH_SIZE])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            with transaction.atomic():
+                _intern(UserAgent, {value for _, value in rows}, ids)
+                by_agent = {}
+                for pk, value in rows:
+                    by_agent.setdefault(ids[value], []).append(pk)
+                # A few hundred agents, so one UPDATE per agent in the chunk
+                for agent_id, pks in by_agent.items():
+                    model.objects.filter(pk__in=pks).update(agent_id=agent_id)
+
+
+def backwards(apps, schema_editor):
+    UserAgent = apps.get_model('attendance', 'UserAgent')
+    for model_name in ('AttendanceRecord', 'ArchivedAttendanceRecord'):
+        model = apps.get_model('attendance', model_name)
+        for agent_id, value in UserAgent.objects.values_list('pk', 'value').iterator():
+            model.objects.filter(agent_id=agent_id).update(user_agent=value)
+
+
+class Migration(migrations.Migration):
+
+    # The backfill commits chunk by chunk instead of holding one transaction over the whole table
+    atomic = False
+
+    dependencies = [
+        ('attendance', '0007_archived_attendance_record'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAgent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=64, unique=True)),
+                ('value', models.TextField()),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='agent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='attendance.useragent'),
+        ),
+        migrations.AddField(
+            model_name='archivedattendancerecord',
+            name='agent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='attendance.useragent'),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_user_agent_lookup'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='attendancerecord',
+            name='user_agent',
+        ),
+        migrations.RemoveField(
+            model_name='archivedattendancerecord',
+            name='user_agent',
+        ),
+        migrations.RenameField(
+            model_name='attendancerecord',
+            old_name='agent',
+            new_name='user_agent',
+        ),
+        migrations.RenameField(
+            model_name='archivedattendancerecord',
+            old_name='agent',
+            new_name='user_agent',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-19 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_drop_user_agent_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='qrcode',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['valid_until'], name='qr_active_until_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0010_qr_expiry_sweep_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qrcode',
+            name='expired_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
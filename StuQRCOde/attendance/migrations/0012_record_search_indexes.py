@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Columns searched by prefix from the record admins (RECORD_SEARCH_FIELDS).
+# Case-insensitive prefix lookups compile to UPPER("col"::text) LIKE UPPER('x%')
+# on PostgreSQL, which only an index on that expression with a pattern operator
+# class can serve. Other backends keep their plain indexes.
+SEARCH_INDEXES = [
+    ('accounts_student', 'student_id', 'student_id_upper_prefix_idx'),
+    ('accounts_user', 'first_name', 'user_first_name_upper_prefix_idx'),
+    ('accounts_user', 'last_name', 'user_last_name_upper_prefix_idx'),
+    ('courses_course', 'code', 'course_code_upper_prefix_idx'),
+    ('courses_course', 'name', 'course_name_upper_prefix_idx'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for table, column, name in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} '
+            f'(UPPER({quote(column)}::text) text_pattern_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, _, name in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_password_reset_dedupe'),
+        ('attendance', '0011_qr_expired_at'),
+        ('courses', '0004_backfill_enrollments'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -5,7 +5,34 @@ import uuid
 from datetime import timedelta
 
 from accounts.models import Student, Lecturer
-from courses.models import Course
+from courses.models import Course, ClassSchedule, Semester
+
+class QRCodeQuerySet(models.QuerySet):
+    def valid_at(self, moment):
+        """Codes that can be scanned at `moment`, the SQL side of QRCode.is_valid"""
+        return self.filter(is_active=True, valid_from__lte=moment, valid_until__gte=moment)
+
+    def active(self):
+        """Codes that can be scanned now"""
+        return self.valid_at(timezone.now())
+
+    def expired(self, now=None):
+        """Codes whose validity has ended, deactivated or not"""
+        return self.filter(valid_until__lt=now or timezone.now())
+
+    def upcoming(self, now=None):
+        """Active codes that cannot be scanned yet"""
+        return self.filter(is_active=True, valid_from__gt=now or timezone.now())
+
+    def with_scan_counts(self):
+        """Annotate present_count, late_count, scan_count and last_scan_at in the same query"""
+        return self.annotate(
+            present_count=models.Count('attendance_records', filter=models.Q(attendance_records__status='present')),
+            late_count=models.Count('attendance_records', filter=models.Q(attendance_records__status='late')),
+            scan_count=models.Count('attendance_records'),
+            last_scan_at=models.Max('attendance_records__time_in'),
+        )
+
 
 class QRCode(models.Model):
     """QR code model for attendance tracking"""
@@ -14,11 +41,22 @@ class QRCode(models.Model):
     valid_from = models.DateTimeField()
     valid_until = models.DateTimeField()
     is_active = models.BooleanField(default=True)
+    # Set when the expiry sweep deactivated the code; extending it reactivates it
+    expired_at = models.DateTimeField(null=True, blank=True)
     created_by = models.ForeignKey(Lecturer, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = QRCodeQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='qr_created_idx'),
+            # Scans look up the live QR codes of a course
+            models.Index(fields=['course', 'valid_until'], condition=models.Q(is_active=True), name='qr_active_course_idx'),
+            # The expiry sweep reads the still-active codes by end of validity
+            models.Index(fields=['valid_until'], condition=models.Q(is_active=True), name='qr_active_until_idx'),
+        ]
     
     def __str__(self):
         return f"QR Code for {self.course.code} - {self.valid_from.date()} to {self.valid_until.date()}"
@@ -40,6 +78,74 @@ class QRCode(models.Model):
         return (self.valid_until - now).days
 
 
+class ClassSession(models.Model):
+    """A single meeting of a course, held whether or not anyone attended"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='sessions')
+    schedule = models.ForeignKey(ClassSchedule, on_delete=models.SET_NULL, null=True, blank=True, related_name='sessions')
+    qr_code = models.ForeignKey(QRCode, on_delete=models.SET_NULL, null=True, blank=True, related_name='sessions')
+    date = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['course', 'date']
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date']),
+            # The close job only ever looks at sessions still open
+            models.Index(fields=['date'], condition=models.Q(closed_at__isnull=True), name='session_open_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.course.code} - {self.date}"
+
+    @classmethod
+    def open(cls, course_id, date, qr_code_id=None, schedule_id=None):
+        """Return the session of a course on a date, creating it on first use and filling in missing links"""
+        session, created = cls.objects.get_or_create(
+            course_id=course_id,
+            date=date,
+            defaults={'qr_code_id': qr_code_id, 'schedule_id': schedule_id},
+        )
+        missing = {}
+        if qr_code_id and session.qr_code_id is None:
+            missing['qr_code_id'] = qr_code_id
+        if schedule_id and session.schedule_id is None:
+            missing['schedule_id'] = schedule_id
+        if missing:
+            cls.objects.filter(pk=session.pk).update(**missing)
+            for field, value in missing.items():
+                setattr(session, field, value)
+        return session
+
+    @classmethod
+    def create_scheduled(cls, date):
+        """Create the sessions of every class scheduled on a date; returns the courses given a new session"""
+        schedules = ClassSchedule.objects.filter(
+            day=date.strftime('%A'),
+            course__semester__start_date__lte=date,
+            course__semester__end_date__gte=date,
+        ).order_by('course', 'start_time').values_list('course', 'pk')
+        existing = set(cls.objects.filter(date=date).values_list('course', flat=True))
+
+        sessions = {}
+        for course_id, schedule_id in schedules:
+            if course_id not in existing and course_id not in sessions:
+                sessions[course_id] = cls(course_id=course_id, schedule_id=schedule_id, date=date)
+        cls.objects.bulk_create(sessions.values(), ignore_conflicts=True)
+        return list(sessions)
+
+
+class UserAgent(models.Model):
+    """Distinct HTTP user agent, shared by every record scanned with it"""
+    hash = models.CharField(max_length=64, unique=True)
+    value = models.TextField()
+    first_seen = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.value
+
+
 class AttendanceRecord(models.Model):
     """Attendance record model"""
     STATUS_CHOICES = [
@@ -51,29 +157,69 @@ class AttendanceRecord(models.Model):
     
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_records')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='attendance_records')
-    qr_code = models.ForeignKey(QRCode, on_delete=models.CASCADE, related_name='attendance_records')
+    # Absences materialised when a session closes have no QR code
+    qr_code = models.ForeignKey(QRCode, on_delete=models.CASCADE, null=True, blank=True, related_name='attendance_records')
+    session = models.ForeignKey(ClassSession, on_delete=models.SET_NULL, null=True, blank=True, related_name='attendance_records')
     date = models.DateField()
     time_in = models.DateTimeField()
+    minutes_late = models.PositiveIntegerField(null=True, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='present')
-    marked_by = models.CharField(max_length=20, choices=[('qr_scan', 'QR Scan'), ('manual', 'Manual')])
+    marked_by = models.CharField(max_length=20, choices=[('qr_scan', 'QR Scan'), ('manual', 'Manual'), ('system', 'System')])
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    user_agent = models.TextField(blank=True)
+    user_agent = models.ForeignKey(UserAgent, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     
     class Meta:
         unique_together = ['student', 'course', 'date']
         ordering = ['-date', '-time_in']
+        # (student, course, date) is covered by the unique constraint
+        indexes = [
+            models.Index(fields=['course', '-date', '-time_in'], name='record_course_recent_idx'),
+            models.Index(fields=['course', 'status'], name='record_course_status_idx'),
+            models.Index(fields=['-date', '-time_in'], name='record_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.user.get_full_name()} - {self.course.code} - {self.date}"
+
+    def save(self, *args, **kwargs):
+        # Every record belongs to the session of its course and day
+        if self.session_id is None:
+            self.session = ClassSession.open(self.course_id, self.date, qr_code_id=self.qr_code_id)
+        super().save(*args, **kwargs)
     
     @property
     def time_difference(self):
-        """Calculate time difference from class start"""
-        class_schedule = self.course.schedules.first()
-        if class_schedule:
-            class_start = timezone.datetime.combine(self.date, class_schedule.start_time)
-            return self.time_in - class_start
-        return None
+        """Time between class start and check-in, as recorded at scan time"""
+        if self.minutes_late is None:
+            return None
+        return timedelta(minutes=self.minutes_late)
+
+
+class ArchivedAttendanceRecord(models.Model):
+    """Attendance record of an archived semester, moved out of the live table"""
+    record_id = models.BigIntegerField()
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='archived_attendance_records')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='archived_attendance_records')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='archived_attendance_records')
+    qr_code_id = models.UUIDField(null=True, blank=True)
+    date = models.DateField()
+    time_in = models.DateTimeField()
+    minutes_late = models.PositiveIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=AttendanceRecord.STATUS_CHOICES)
+    marked_by = models.CharField(max_length=20)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.ForeignKey(UserAgent, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date', '-time_in']
+        indexes = [
+            models.Index(fields=['course', 'date'], name='archived_course_date_idx'),
+            models.Index(fields=['student', 'course'], name='archived_student_course_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.user.get_full_name()} - {self.course.code} - {self.date} (archived)"
 
 
 class AttendanceStatistics(models.Model):
@@ -87,6 +233,9 @@ class AttendanceStatistics(models.Model):
     
     class Meta:
         unique_together = ['student', 'course']
+        indexes = [
+            models.Index(fields=['course', 'percentage'], name='stats_course_percentage_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.user.get_full_name()} - {self.course.code} - {self.percentage}%"
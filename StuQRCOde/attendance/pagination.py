@@ -0,0 +1,172 @@
+"""
+Keyset (cursor) pagination for the large attendance lists.
+
+Instead of OFFSET, each page continues from the sort key of the last row shown,
+so page 1000 costs the same indexed range scan as page 1. Cursors are signed,
+opaque tokens carrying that key and a direction. The total is optional: it can
+be counted exactly, estimated cheaply or skipped (ATTENDANCE_LIST_COUNT_MODE).
+EstimatedCountPaginator brings the same estimate to the admin changelists.
+"""
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+TOKEN_SALT = 'attendance.pagination'
+
+# Estimated totals stop counting here and are shown as "N+"
+ESTIMATE_CAP = 1000
+
+
+def planner_estimate(queryset):
+    """Row count the PostgreSQL planner expects for `queryset`"""
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for the admin that trusts the planner on large results.
+
+    Only on PostgreSQL: results estimated above ESTIMATE_CAP rows keep the
+    estimate, smaller ones (and other databases) are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connection.vendor == 'postgresql':
+            estimate = planner_estimate(queryset)
+            if estimate > ESTIMATE_CAP:
+                return estimate
+        return queryset.count()
+
+
+class KeysetPage:
+    """
+    One page of rows plus the cursors to its neighbours.
+
+    `total` is a planner estimate when total_is_estimate is set (shown as ~N),
+    and a lower bound when total_is_capped is set (shown as N+).
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor, total=None, total_is_estimate=False,
+                 total_is_capped=False):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+        self.total_is_capped = total_is_capped
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Paginate `queryset` on `ordering`, which must end in a unique field (e.g. id).
+
+    `count` is 'exact' (COUNT(*)), 'estimate' (planner estimate on PostgreSQL,
+    a capped count elsewhere) or 'none'; it defaults to ATTENDANCE_LIST_COUNT_MODE.
+    The total is taken from `count_queryset` when given, e.g. the same rows
+    without the aggregate annotations of the listed queryset.
+    """
+
+    def __init__(self, queryset, ordering, per_page, count=None, count_queryset=None):
+        self.queryset = queryset
+        self.count_queryset = queryset if count_queryset is None else count_queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.count = count or getattr(settings, 'ATTENDANCE_LIST_COUNT_MODE', 'estimate')
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in self.ordering
+        ]
+
+    def get_page(self, cursor=None):
+        """Return the page a cursor points at; a missing or invalid cursor gives the first page"""
+        key, backwards = self._decode(cursor)
+
+        queryset = self.queryset
+        ordering = self.ordering
+        if key is not None:
+            queryset = queryset.filter(self._after(key, backwards))
+        if backwards:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = self._encode(rows[-1], backwards=False)
+            if key is not None and (has_more or not backwards):
+                previous_cursor = self._encode(rows[0], backwards=True)
+
+        total, is_estimate, is_capped = self._total()
+        return KeysetPage(rows, next_cursor, previous_cursor, total, is_estimate, is_capped)
+
+    def _after(self, key, backwards):
+        """Q for rows strictly after `key` in the (possibly reversed) ordering"""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.fields, key):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _encode(self, obj, backwards):
+        key = [str(getattr(obj, name)) for name, _ in self.fields]
+        return signing.dumps({'k': key, 'b': backwards}, salt=TOKEN_SALT, compress=True)
+
+    def _decode(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            data = signing.loads(cursor, salt=TOKEN_SALT)
+            meta = self.queryset.model._meta
+            key = [meta.get_field(name).to_python(value) for (name, _), value in zip(self.fields, data['k'])]
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            return None, False
+        if len(key) != len(self.fields):
+            return None, False
+        return key, bool(data.get('b'))
+
+    def _total(self):
+        """Return (total, is a planner estimate, is capped)"""
+        if self.count == 'none':
+            return None, False, False
+        if self.count == 'exact':
+            return self.count_queryset.count(), False, False
+
+        queryset = self.count_queryset.order_by()
+        if connection.vendor == 'postgresql':
+            return planner_estimate(queryset), True, False
+        # COUNT over a LIMITed subquery stops reading after the cap
+        capped = queryset[:ESTIMATE_CAP + 1].count()
+        return min(capped, ESTIMATE_CAP), False, capped > ESTIMATE_CAP
@@ -0,0 +1,122 @@
+"""
+Bulk maintenance of QR codes: deactivation, validity extension or reset and
+course reassignment.
+
+Operations run as UPDATEs over primary key chunks, walked in pk order so
+each chunk is one indexed range read plus one UPDATE in its own short
+transaction. Rows are never loaded as model instances, and the chunk update
+repeats the selection's filters so rows that changed meanwhile are left alone.
+The periodic expiry sweep is small enough to be a single UPDATE.
+
+The sweep stamps the codes it deactivates with expired_at, so extending or
+resetting their validity makes them usable again. Codes deactivated by hand
+stay inactive.
+"""
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import AttendanceRecord, ClassSession, QRCode
+from .report_cache import bump_course_versions
+
+CHUNK_SIZE = 1000
+
+# Reactivates codes the sweep deactivated; hand-deactivated codes keep is_active
+REACTIVATE_SWEPT = {
+    'is_active': Case(When(expired_at__isnull=False, then=Value(True)), default=F('is_active')),
+    'expired_at': None,
+}
+
+
+def update_in_chunks(queryset, values, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Apply `values` (as for QuerySet.update) to `queryset` chunk by chunk.
+
+    `progress` is called as progress(rows updated so far). Returns the number
+    of rows updated.
+    """
+    queryset = queryset.order_by()
+    updated = 0
+    last = None
+    while True:
+        pks = queryset.order_by('pk')
+        if last is not None:
+            pks = pks.filter(pk__gt=last)
+        chunk = list(pks.values_list('pk', flat=True)[:chunk_size])
+        if not chunk:
+            break
+        with transaction.atomic():
+            updated += queryset.filter(pk__in=chunk).update(**values)
+        last = chunk[-1]
+        if progress is not None:
+            progress(updated)
+    return updated
+
+
+def deactivate_expired(queryset=None, now=None, chunk_size=None, progress=None):
+    """
+    Deactivate the codes of `queryset` (default: all) whose validity has ended.
+
+    Without a chunk size this is the periodic sweep: one UPDATE served by the
+    partial index on the active codes' valid_until.
+    """
+    now = now or timezone.now()
+    queryset = QRCode.objects.all() if queryset is None else queryset
+    expired = queryset.expired(now).filter(is_active=True)
+    values = {'is_active': False, 'expired_at': now}
+    if chunk_size is None:
+        updated = expired.update(**values)
+        if progress is not None:
+            progress(updated)
+        return updated
+    return update_in_chunks(expired, values, chunk_size, progress)
+
+
+def extend_validity(queryset, delta, now=None, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Push valid_until back by `delta`. Codes that already expired are extended
+    from now and reactivated if the sweep deactivated them, so the extension
+    always leaves them usable for `delta`.
+    """
+    now = now or timezone.now()
+    return update_in_chunks(
+        queryset,
+        {'valid_until': Greatest(F('valid_until'), now) + delta, **REACTIVATE_SWEPT},
+        chunk_size,
+        progress,
+    )
+
+
+def reset_validity(queryset, valid_from, valid_until, activate=False, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Give the codes of `queryset` a new validity window. Codes the sweep
+    deactivated are reactivated; `activate` reactivates every code.
+    """
+    values = {'valid_from': valid_from, 'valid_until': valid_until, **REACTIVATE_SWEPT}
+    if activate:
+        values['is_active'] = True
+    return update_in_chunks(queryset, values, chunk_size, progress)
+
+
+def scanned(queryset):
+    """Codes of `queryset` that have attendance records"""
+    return queryset.filter(Exists(AttendanceRecord.objects.filter(qr_code=OuterRef('pk'))))
+
+
+def reassign_course(queryset, course, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Move the codes of `queryset` to `course`.
+
+    Scanned codes stay put: their records belong to the original course.
+    Sessions the moved codes opened stay with the original course, without a
+    QR code. Returns {'reassigned', 'skipped'}.
+    """
+    course_ids = set(queryset.order_by().values_list('course', flat=True).distinct())
+    skipped = scanned(queryset).count()
+    unused = queryset.exclude(pk__in=scanned(queryset).values('pk'))
+    ClassSession.objects.filter(qr_code__in=unused.values('pk')).exclude(course=course).update(qr_code=None)
+    reassigned = update_in_chunks(unused, {'course': course}, chunk_size, progress)
+    if reassigned:
+        bump_course_versions(course_ids | {course.pk})
+    return {'reassigned': reassigned, 'skipped': skipped}
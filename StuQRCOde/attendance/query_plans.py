@@ -0,0 +1,64 @@
+"""
+EXPLAIN checks for the hot attendance query shapes.
+
+Each entry in HOT_QUERIES pairs a representative queryset with the indexes a
+good plan may use. explain_hot_query() runs EXPLAIN on the current database and
+reports which of them the plan mentions; the explain_hot_queries command
+prints the report and the tests assert it.
+"""
+from datetime import date
+
+from django.db import connection
+
+from .models import AttendanceRecord, AttendanceStatistics, QRCode
+
+# Ids only shape the plan, the rows do not need to exist
+SAMPLE_ID = 1
+SAMPLE_DATE = date(2024, 1, 1)
+
+HOT_QUERIES = {
+    'records_for_course_day': (
+        lambda: AttendanceRecord.objects.filter(course_id=SAMPLE_ID, date=SAMPLE_DATE),
+        ('record_course_recent_idx',),
+    ),
+    'present_count_for_course': (
+        lambda: AttendanceRecord.objects.filter(course_id=SAMPLE_ID, status='present').order_by().values('id'),
+        ('record_course_status_idx',),
+    ),
+    'student_course_history': (
+        lambda: AttendanceRecord.objects.filter(student_id=SAMPLE_ID, course_id=SAMPLE_ID).order_by('date'),
+        ('student_id_course_id_date',),
+    ),
+    'lecturer_records_for_day': (
+        lambda: AttendanceRecord.objects.filter(course__lecturer_id=SAMPLE_ID, date=SAMPLE_DATE),
+        # Either seek today's records by date or walk the lecturer's courses
+        ('record_recent_idx', 'record_course_recent_idx'),
+    ),
+    'recent_records': (
+        lambda: AttendanceRecord.objects.order_by('-date', '-time_in')[:10],
+        ('record_recent_idx',),
+    ),
+    'active_qr_codes_for_course': (
+        lambda: QRCode.objects.filter(course_id=SAMPLE_ID).active(),
+        ('qr_active_course_idx',),
+    ),
+    'expired_qr_sweep': (
+        lambda: QRCode.objects.expired().filter(is_active=True).order_by(),
+        ('qr_active_until_idx',),
+    ),
+    'at_risk_students_for_course': (
+        lambda: AttendanceStatistics.objects.filter(course_id=SAMPLE_ID, percentage__lt=75),
+        ('stats_course_percentage_idx',),
+    ),
+}
+
+
+def explain_hot_query(name):
+    """Return (plan, the expected index the plan uses or None) for one hot query"""
+    build, indexes = HOT_QUERIES[name]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Tiny tables are cheaper to scan; ask for the plan the index would give at scale
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = build().explain()
+    return plan, next((index for index in indexes if index in plan), None)
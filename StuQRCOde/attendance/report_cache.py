@@ -0,0 +1,90 @@
+"""
+Versioned cache for report aggregates.
+
+Every course carries a data version stamp in the cache. Cached aggregates are
+keyed by report name, user role and the version stamps of the courses they
+cover, so a scan in one course only invalidates the entries that include it.
+Versions are bumped from the model signals in attendance/signals.py; code that
+writes with queryset.update() or bulk_create() must call bump_course_versions()
+itself because those bypass signals.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'report:version:course:{}'
+HITS_KEY = 'report:stats:hits'
+MISSES_KEY = 'report:stats:misses'
+
+
+def _new_version():
+    # A fresh timestamp can never collide with a stamp that was evicted earlier,
+    # which a counter restarting at 1 could.
+    return time.time_ns()
+
+
+def course_versions(course_ids):
+    """Return {course_id: version}, initialising any stamps missing from the cache"""
+    keys = {VERSION_KEY.format(course_id): course_id for course_id in course_ids}
+    found = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {course_id: found[key] for key, course_id in keys.items()}
+
+
+def bump_course_versions(course_ids):
+    """Invalidate every cached aggregate that covers any of `course_ids`"""
+    version = _new_version()
+    cache.set_many({VERSION_KEY.format(course_id): version for course_id in set(course_ids)}, timeout=None)
+
+
+def data_version(course_ids):
+    """Short stamp identifying the current data of a course set"""
+    versions = course_versions(course_ids)
+    payload = ','.join(f'{course_id}:{versions[course_id]}' for course_id in sorted(versions))
+    return hashlib.md5(payload.encode(), usedforsecurity=False).hexdigest()
+
+
+def cached_report(name, role, course_ids, builder, timeout=None):
+    """Return builder() for this report scope, reusing a cached result while the data is unchanged"""
+    key = f'report:{name}:{role}:{data_version(course_ids)}'
+    value = cache.get(key)
+    if value is not None:
+        _count(HITS_KEY)
+        return value
+    _count(MISSES_KEY)
+    value = builder()
+    if timeout is None:
+        timeout = getattr(settings, 'REPORT_CACHE_TIMEOUT', 3600)
+    cache.set(key, value, timeout)
+    return value
+
+
+def _count(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); losing one sample is fine
+        pass
+
+
+def cache_stats():
+    """Hit/miss counters for cached_report(), shared across processes on shared backends"""
+    values = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = values.get(HITS_KEY, 0)
+    misses = values.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups * 100, 2) if lookups else 0,
+    }
+
+
+def reset_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
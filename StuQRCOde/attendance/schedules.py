@@ -0,0 +1,80 @@
+"""
+In-process index of class schedules used to resolve lateness at scan time.
+
+Each worker keeps {course_id: {weekday: [ScheduleSlot, ...]}} in memory and
+only reloads a course when its schedule version in the shared cache changes
+(bumped by ClassSchedule signals), so a scan costs one cache read instead of a
+schedule query.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from courses.models import ClassSchedule
+
+VERSION_KEY = 'schedule:version:{}'
+
+# ClassSchedule.day values in date.weekday() order
+WEEKDAYS = [day for day, _ in ClassSchedule.DAY_CHOICES]
+
+ScheduleSlot = namedtuple('ScheduleSlot', ['schedule_id', 'start_time', 'end_time'])
+
+_index = {}
+
+
+def bump_schedule_version(course_id):
+    cache.set(VERSION_KEY.format(course_id), timezone.now().timestamp(), None)
+
+
+def _load(course_id):
+    slots = {}
+    for schedule_id, day, start_time, end_time in ClassSchedule.objects.filter(
+        course_id=course_id
+    ).order_by('start_time').values_list('pk', 'day', 'start_time', 'end_time'):
+        slots.setdefault(day, []).append(ScheduleSlot(schedule_id, start_time, end_time))
+    return slots
+
+
+def schedules_for(course_id, weekday):
+    """Return the slots of a course on a weekday (0 = Monday), earliest first"""
+    version = cache.get(VERSION_KEY.format(course_id))
+    entry = _index.get(course_id)
+    if entry is None or entry[0] != version:
+        entry = (version, _load(course_id))
+        _index[course_id] = entry
+    return entry[1].get(WEEKDAYS[weekday], [])
+
+
+def resolve_slot(course_id, moment):
+    """
+    Return the slot a scan at `moment` belongs to, or None if nothing is scheduled that day.
+
+    That is the first slot of the day that has not ended yet, or the last one
+    when every class of the day is over.
+    """
+    local = timezone.localtime(moment)
+    slots = schedules_for(course_id, local.weekday())
+    for slot in slots:
+        if local.time() <= slot.end_time:
+            return slot
+    return slots[-1] if slots else None
+
+
+def minutes_late(slot, moment):
+    """Whole minutes between the slot's start and `moment`, 0 when on time"""
+    local = timezone.localtime(moment)
+    start = timezone.make_aware(datetime.combine(local.date(), slot.start_time), local.tzinfo)
+    return max(0, int((local - start).total_seconds() // 60))
+
+
+def scan_status(course_id, moment):
+    """Return (schedule_id, minutes_late, status) for a scan at `moment`"""
+    slot = resolve_slot(course_id, moment)
+    if slot is None:
+        return None, None, 'present'
+    late = minutes_late(slot, moment)
+    grace = getattr(settings, 'ATTENDANCE_LATE_GRACE_MINUTES', 10)
+    return slot.schedule_id, late, 'late' if late > grace else 'present'
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from courses.models import Course, ClassSchedule, Enrollment
+from .models import QRCode, AttendanceRecord, ClassSession
+from .report_cache import bump_course_versions
+from .schedules import bump_schedule_version
+
+
+@receiver([post_save, post_delete], sender=AttendanceRecord)
+@receiver([post_save, post_delete], sender=QRCode)
+@receiver([post_save, post_delete], sender=ClassSession)
+@receiver([post_save, post_delete], sender=Enrollment)
+def invalidate_course_reports(sender, instance, **kwargs):
+    """Scans, sessions, enrollments and QR code changes invalidate the cached reports of their course"""
+    bump_course_versions([instance.course_id])
+
+
+@receiver(post_save, sender=QRCode)
+def open_session_for_qr_code(sender, instance, created, **kwargs):
+    """Issuing a QR code opens the session of the day it becomes valid"""
+    if not created:
+        return
+    ClassSession.open(instance.course_id, timezone.localdate(instance.valid_from), qr_code_id=instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course(sender, instance, **kwargs):
+    bump_course_versions([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=ClassSchedule)
+def invalidate_schedule_index(sender, instance, **kwargs):
+    """Workers reload a course's schedules once its version changes"""
+    bump_schedule_version(instance.course_id)
@@ -0,0 +1,148 @@
+"""
+Set-based rebuild of AttendanceStatistics.
+
+Sessions held and classes attended are computed with grouped aggregate queries
+and written back with chunked bulk upserts (INSERT ... ON CONFLICT DO UPDATE on
+the (student, course) unique constraint), so rebuilding never loads one
+statistics row at a time. Large rebuilds can be fanned out across processes,
+one course per task.
+"""
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connection, connections, transaction
+from django.db.models import Count, Exists, OuterRef, Q
+
+from courses.models import Course, Enrollment
+
+from .models import AttendanceRecord, AttendanceStatistics, ClassSession
+from .report_cache import bump_course_versions
+
+logger = logging.getLogger(__name__)
+
+ATTENDED_STATUSES = ['present', 'late']
+
+# Courses handled per grouped query when running inline
+COURSE_BATCH_SIZE = 200
+
+
+def classes_held(course_ids):
+    """Return {course_id: number of sessions held}"""
+    return dict(
+        ClassSession.objects.filter(course__in=course_ids).values('course').annotate(
+            held=Count('id')
+        ).order_by().values_list('course', 'held')
+    )
+
+
+def _percentage(attended, total):
+    return round(attended / total * 100, 2) if total > 0 else 0
+
+
+def _pairs(course_ids, chunk_size):
+    """Yield attended counts per (student, course), including enrolled students without records"""
+    has_records = AttendanceRecord.objects.filter(student=OuterRef('student'), course=OuterRef('course'))
+    recorded = AttendanceRecord.objects.filter(course__in=course_ids).values('student', 'course').annotate(
+        attended=Count('id', filter=Q(status__in=ATTENDED_STATUSES))
+    ).order_by()
+    yield from recorded.iterator(chunk_size=chunk_size)
+
+    never_attended = Enrollment.objects.filter(course__in=course_ids).exclude(Exists(has_records))
+    for student, course in never_attended.values_list('student', 'course').iterator(chunk_size=chunk_size):
+        yield {'student': student, 'course': course, 'attended': 0}
+
+
+def recompute_course_statistics(course_ids, chunk_size=1000):
+    """Rebuild the statistics of every (student, course) pair in `course_ids`"""
+    # Archived semesters keep the statistics finalised when their records were moved
+    course_ids = list(Course.objects.filter(
+        pk__in=list(course_ids),
+        semester__archived_at__isnull=True,
+    ).values_list('pk', flat=True))
+    held = classes_held(course_ids)
+
+    written = 0
+    with transaction.atomic():
+        batch = []
+        for pair in _pairs(course_ids, chunk_size):
+            total = held.get(pair['course'], 0)
+            batch.append(AttendanceStatistics(
+                student_id=pair['student'],
+                course_id=pair['course'],
+                total_classes=total,
+                attended_classes=pair['attended'],
+                percentage=_percentage(pair['attended'], total),
+            ))
+            if len(batch) >= chunk_size:
+                written += _upsert(batch)
+                batch = []
+        if batch:
+            written += _upsert(batch)
+
+        # Pairs with neither records nor an enrollment no longer have statistics
+        deleted, _ = AttendanceStatistics.objects.filter(course__in=course_ids).exclude(
+            Exists(AttendanceRecord.objects.filter(student=OuterRef('student'), course=OuterRef('course')))
+        ).exclude(
+            Exists(Enrollment.objects.filter(student=OuterRef('student'), course=OuterRef('course')))
+        ).delete()
+
+    bump_course_versions(course_ids)
+    return {'rows': written, 'deleted': deleted}
+
+
+def _upsert(batch):
+    AttendanceStatistics.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['student', 'course'],
+        update_fields=['total_classes', 'attended_classes', 'percentage', 'last_updated'],
+    )
+    return len(batch)
+
+
+def _init_worker():
+    # Needed when processes are spawned rather than forked
+    django.setup()
+
+
+def _recompute_in_worker(course_id, chunk_size):
+    try:
+        return recompute_course_statistics([course_id], chunk_size)
+    finally:
+        connections.close_all()
+
+
+def recompute_statistics(course_ids, chunk_size=1000, workers=1, progress=None):
+    """
+    Rebuild statistics for `course_ids`, inline in batches or in `workers` processes.
+
+    `progress` is called as progress(done, total) after each batch or course.
+    Returns totals: {'courses', 'rows', 'deleted'}.
+    """
+    course_ids = list(course_ids)
+    totals = {'courses': len(course_ids), 'rows': 0, 'deleted': 0}
+
+    def add(result, done, total):
+        totals['rows'] += result['rows']
+        totals['deleted'] += result['deleted']
+        if progress is not None:
+            progress(done, total)
+
+    if workers > 1 and connection.vendor == 'sqlite':
+        # SQLite serialises writers, parallel upserts would only hit "database is locked"
+        logger.info('SQLite backend, recomputing statistics in a single process')
+        workers = 1
+
+    if workers > 1 and len(course_ids) > 1:
+        # Connections must not be shared with forked children
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            results = executor.map(_recompute_in_worker, course_ids, [chunk_size] * len(course_ids))
+            for done, result in enumerate(results, 1):
+                add(result, done, len(course_ids))
+    else:
+        for start in range(0, len(course_ids), COURSE_BATCH_SIZE):
+            batch = course_ids[start:start + COURSE_BATCH_SIZE]
+            add(recompute_course_statistics(batch, chunk_size), start + len(batch), len(course_ids))
+    return totals
@@ -1,11 +1,34 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
+from unittest import mock, skipUnless
 from django.contrib.auth import get_user_model
+from django.urls import reverse
 from django.utils import timezone
 from datetime import date, time, datetime, timedelta
+from io import BytesIO, StringIO
+import gzip
+import os
+import tempfile
 import uuid
-from .models import QRCode, AttendanceRecord, AttendanceStatistics
+from openpyxl import load_workbook
+from .models import QRCode, AttendanceRecord, ArchivedAttendanceRecord, AttendanceStatistics, ClassSession, UserAgent
+from . import archive
+from .archive import ArchiveError, archive_semester, count_records
+from .exports import write_semester_workbook
+from .report_cache import cached_report, cache_stats, data_version
+from .statistics import recompute_statistics
+from .query_plans import HOT_QUERIES, explain_hot_query
+from .pagination import KeysetPaginator
+from .absences import close_sessions, due_sessions
+from .schedules import schedules_for
+from .user_agents import clear_cache, intern_user_agent, storage_report
+from .qr_lifecycle import deactivate_expired, extend_validity, reassign_course
 from accounts.models import Student, Lecturer
-from courses.models import Course, Semester, ClassSchedule
+from courses.models import Course, Semester, ClassSchedule, Enrollment
 
 User = get_user_model()
 
@@ -173,3 +196,777 @@ class AttendanceStatisticsModelTest(TestCase):
         )
         self.assertEqual(stats.calculate_percentage(), 80.00)
         self.assertEqual(str(stats), 'Student User - CS101 - 80.00%')
+
+
+class AttendanceFixtureMixin:
+    """Lecturer, student, semester and two courses shared by the report tests"""
+
+    def setUp(self):
+        cache.clear()
+        self.lecturer_user = User.objects.create_user(
+            email='lecturer@example.com',
+            username='lecturer',
+            first_name='Lecturer',
+            last_name='User',
+            password='password123',
+            role='lecturer'
+        )
+        self.lecturer = Lecturer.objects.create(
+            user=self.lecturer_user,
+            employee_id='L001',
+            department='Computer Science',
+            qualification='PhD'
+        )
+        self.student_user = User.objects.create_user(
+            email='student@example.com',
+            username='student',
+            first_name='Student',
+            last_name='User',
+            password='password123'
+        )
+        self.student = Student.objects.create(
+            user=self.student_user,
+            student_id='12345',
+            program='Computer Science',
+            level=1,
+            date_of_birth=date(2000, 1, 1)
+        )
+        self.semester = Semester.objects.create(
+            name='Fall',
+            year=2023,
+            start_date=date(2023, 9, 1),
+            end_date=date(2023, 12, 31)
+        )
+        self.courses = []
+        for code in ['CS101', 'CS102']:
+            course = Course.objects.create(
+                code=code,
+                name=f'Course {code}',
+                description='Basic course',
+                credit_hours=3,
+                lecturer=self.lecturer,
+                semester=self.semester
+            )
+            self.courses.append(course)
+        Enrollment.objects.create(student=self.student, course=self.courses[0])
+        self.qr_code = QRCode.objects.create(
+            course=self.courses[0],
+            valid_from=timezone.make_aware(datetime(2023, 9, 1, 9)),
+            valid_until=timezone.now() + timedelta(days=1),
+            created_by=self.lecturer
+        )
+
+    def add_record(self, day, status='present', course=None):
+        return AttendanceRecord.objects.create(
+            student=self.student,
+            course=course or self.courses[0],
+            qr_code=self.qr_code,
+            date=date(2023, 9, day),
+            time_in=timezone.now(),
+            status=status,
+            marked_by='qr_scan'
+        )
+
+
+class SemesterExportTest(AttendanceFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for day, status in [(1, 'present'), (2, 'present'), (3, 'absent'), (4, 'late')]:
+            self.add_record(day, status)
+
+    def test_workbook_has_summary_and_one_sheet_per_course(self):
+        output = BytesIO()
+        progress = []
+        total = write_semester_workbook(
+            self.semester, output, workers=1,
+            progress=lambda done, total, course: progress.append((done, total, course.code))
+        )
+        self.assertEqual(total, 2)
+        self.assertEqual(progress, [(1, 2, 'CS101'), (2, 2, 'CS102')])
+
+        wb = load_workbook(BytesIO(output.getvalue()))
+        self.assertEqual(wb.sheetnames, ['Summary', 'CS101', 'CS102'])
+        rows = list(wb['CS101'].iter_rows(min_row=7, values_only=True))
+        # The late scan counts as attended, like in AttendanceStatistics
+        self.assertEqual(rows, [(1, '12345', 'Student User', 4, 3, 1, 75, 'Good')])
+        summary = list(wb['Summary'].iter_rows(min_row=4, values_only=True))
+        self.assertEqual([row[0] for row in summary], ['CS101', 'CS102'])
+        self.assertEqual(summary[0][3:], (1, 4, 3, 75))
+
+    def test_course_report_counts_late_as_attended(self):
+        self.client.force_login(self.lecturer_user)
+        response = self.client.get(reverse('attendance:course_attendance_report', args=[self.courses[0].pk]))
+        row = response.context['attendance_data'][0]
+        self.assertEqual((row['total_classes'], row['present_classes'], row['absent_classes']), (4, 3, 1))
+        recompute_statistics([self.courses[0].pk])
+        self.assertEqual(AttendanceStatistics.objects.get(course=self.courses[0]).attended_classes, 3)
+
+    def test_workbook_without_summary(self):
+        output = BytesIO()
+        write_semester_workbook(self.semester, output, include_summary=False, workers=1)
+        wb = load_workbook(BytesIO(output.getvalue()))
+        self.assertEqual(wb.sheetnames, ['CS101', 'CS102'])
+
+    @override_settings(ATTENDANCE_EXPORT_WORKERS=1)
+    def test_export_view_for_lecturer(self):
+        self.client.force_login(self.lecturer_user)
+        response = self.client.get(reverse('attendance:semester_attendance_export', args=[self.semester.pk]))
+        self.assertEqual(response.status_code, 200)
+        wb = load_workbook(BytesIO(response.content))
+        self.assertEqual(wb.sheetnames, ['Summary', 'CS101', 'CS102'])
+
+    def test_export_view_denied_for_students(self):
+        self.client.force_login(self.student_user)
+        response = self.client.get(reverse('attendance:semester_attendance_export', args=[self.semester.pk]))
+        self.assertRedirects(response, reverse('dashboard:home'), fetch_redirect_response=False)
+
+
+class ReportCacheTest(AttendanceFixtureMixin, TestCase):
+    def test_cached_report_reuses_result_until_data_changes(self):
+        calls = []
+
+        def builder():
+            calls.append(1)
+            return {'count': len(calls)}
+
+        course_ids = [self.courses[0].pk]
+        self.assertEqual(cached_report('test', 'lecturer', course_ids, builder), {'count': 1})
+        self.assertEqual(cached_report('test', 'lecturer', course_ids, builder), {'count': 1})
+        self.assertEqual(cache_stats(), {'hits': 1, 'misses': 1, 'hit_rate': 50.0})
+
+        self.add_record(1)
+        self.assertEqual(cached_report('test', 'lecturer', course_ids, builder), {'count': 2})
+
+    def test_keys_are_scoped_by_role_and_course_set(self):
+        first, second = [course.pk for course in self.courses]
+        version = data_version([second])
+        self.add_record(1, course=self.courses[0])
+        self.assertEqual(data_version([second]), version)
+
+        cached_report('test', 'lecturer', [first], lambda: 'lecturer')
+        self.assertEqual(cached_report('test', 'admin', [first], lambda: 'admin'), 'admin')
+
+    def test_qr_code_and_course_changes_invalidate(self):
+        course_ids = [self.courses[0].pk]
+        version = data_version(course_ids)
+        self.qr_code.is_active = False
+        self.qr_code.save()
+        self.assertNotEqual(data_version(course_ids), version)
+
+        version = data_version(course_ids)
+        self.courses[0].name = 'Renamed'
+        self.courses[0].save()
+        self.assertNotEqual(data_version(course_ids), version)
+
+    def test_analytics_view_is_served_from_cache(self):
+        self.add_record(1)
+        self.add_record(2, 'absent')
+        self.client.force_login(self.lecturer_user)
+        url = reverse('attendance:attendance_analytics')
+        response = self.client.get(url)
+        analytics = {row['course'].code: row for row in response.context['course_analytics']}
+        self.assertEqual(analytics['CS101']['total_classes'], 2)
+        self.assertEqual(analytics['CS101']['total_present'], 1)
+        self.assertEqual(analytics['CS101']['avg_attendance'], 50.0)
+        self.assertEqual(analytics['CS102']['total_classes'], 0)
+
+        self.client.get(url)
+        self.assertEqual(cache_stats()['hits'], 1)
+
+
+class ReportFragmentCacheTest(AttendanceFixtureMixin, TestCase):
+    def test_course_report_table_is_cached_until_a_scan_arrives(self):
+        self.add_record(1)
+        self.client.force_login(self.lecturer_user)
+        url = reverse('attendance:course_attendance_report', args=[self.courses[0].pk])
+        self.assertContains(self.client.get(url), '<td>1</td>')
+
+        # Second render skips the per-student queries behind the cached table
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([q for q in queries if 'attendance_attendancerecord' in q['sql']])
+
+        self.add_record(2, 'absent')
+        response = self.client.get(url)
+        self.assertContains(response, '<td>2</td>')
+
+
+class RecomputeStatisticsTest(AttendanceFixtureMixin, TestCase):
+    def test_recompute_upserts_and_removes_stale_rows(self):
+        self.add_record(4)
+        self.add_record(5, status='late')
+        self.add_record(6, status='absent')
+        AttendanceStatistics.objects.create(student=self.student, course=self.courses[0], total_classes=99)
+        AttendanceStatistics.objects.create(student=self.student, course=self.courses[1], total_classes=5)
+
+        totals = recompute_statistics([course.pk for course in self.courses], chunk_size=1)
+        self.assertEqual(totals, {'courses': 2, 'rows': 1, 'deleted': 1})
+
+        # The session opened by the QR code on Sep 1 counts even though nobody attended
+        stats = AttendanceStatistics.objects.get()
+        self.assertEqual((stats.total_classes, stats.attended_classes), (4, 2))
+        self.assertEqual(stats.percentage, 50)
+
+    def test_enrolled_students_without_records_get_statistics(self):
+        Enrollment.objects.create(student=self.student, course=self.courses[1])
+        ClassSession.objects.create(course=self.courses[1], date=date(2023, 9, 5))
+        recompute_statistics([self.courses[1].pk])
+        stats = AttendanceStatistics.objects.get(course=self.courses[1])
+        self.assertEqual((stats.total_classes, stats.attended_classes, stats.percentage), (1, 0, 0))
+
+    def test_command_reports_rows_and_timing(self):
+        self.add_record(1)
+        out = StringIO()
+        call_command('recompute_attendance_statistics', semester=self.semester.pk, stdout=out)
+        self.assertIn('Recomputed 1 statistics rows for 2 courses', out.getvalue())
+        self.assertEqual(AttendanceStatistics.objects.get().percentage, 100)
+
+
+class ScanEnrollmentTest(AttendanceFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_qr = QRCode.objects.create(
+            course=self.courses[1],
+            valid_from=timezone.now() - timedelta(minutes=5),
+            valid_until=timezone.now() + timedelta(hours=1),
+            created_by=self.lecturer
+        )
+        self.client.force_login(self.student_user)
+
+    @override_settings(ATTENDANCE_REQUIRE_ENROLLMENT=True)
+    def test_only_enrolled_students_can_scan(self):
+        self.client.get(reverse('attendance:scan_qr', args=[self.other_qr.pk]))
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+        Enrollment.objects.create(student=self.student, course=self.courses[1])
+        self.client.get(reverse('attendance:scan_qr', args=[self.other_qr.pk]))
+        self.assertTrue(AttendanceRecord.objects.filter(course=self.courses[1]).exists())
+
+    def test_enrollment_is_not_required_by_default(self):
+        self.client.get(reverse('attendance:scan_qr', args=[self.other_qr.pk]))
+        self.assertTrue(AttendanceRecord.objects.filter(course=self.courses[1]).exists())
+
+
+class ClassSessionTest(AttendanceFixtureMixin, TestCase):
+    def test_issuing_a_qr_code_opens_a_session(self):
+        session = ClassSession.objects.get(course=self.courses[0])
+        self.assertEqual((session.date, session.qr_code), (date(2023, 9, 1), self.qr_code))
+
+        record = self.add_record(1)
+        self.assertEqual(record.session, session)
+        self.assertEqual(self.add_record(2).session.date, date(2023, 9, 2))
+        self.assertEqual(ClassSession.objects.filter(course=self.courses[0]).count(), 2)
+
+    def test_command_creates_sessions_for_scheduled_classes(self):
+        # 2023-09-04 is a Monday
+        schedule = ClassSchedule.objects.create(
+            course=self.courses[1], day='Monday', start_time='09:00', end_time='10:00', room='A1'
+        )
+        out = StringIO()
+        call_command('create_class_sessions', date='2023-09-04', days=7, stdout=out)
+        self.assertIn('Created 1 class sessions', out.getvalue())
+        self.assertEqual(ClassSession.objects.get(course=self.courses[1]).schedule, schedule)
+
+        call_command('create_class_sessions', date='2023-09-04', stdout=StringIO())
+        self.assertEqual(ClassSession.objects.filter(course=self.courses[1]).count(), 1)
+
+    def test_reports_count_sessions_nobody_attended(self):
+        ClassSession.objects.create(course=self.courses[1], date=date(2023, 9, 5))
+        self.client.force_login(self.lecturer_user)
+        response = self.client.get(reverse('attendance:attendance_reports'))
+        self.assertEqual(response.context['total_classes'], 2)
+
+
+@skipUnless(connection.vendor in ['sqlite', 'postgresql'], 'Plans are only checked on SQLite and PostgreSQL')
+class HotQueryPlanTest(TestCase):
+    def test_hot_queries_use_their_indexes(self):
+        for name in HOT_QUERIES:
+            with self.subTest(name):
+                plan, index = explain_hot_query(name)
+                self.assertIsNotNone(index, plan)
+
+
+class KeysetPaginationTest(AttendanceFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for day in range(1, 6):
+            self.add_record(day)
+
+    def paginate(self, **kwargs):
+        return KeysetPaginator(AttendanceRecord.objects.all(), ['-date', '-time_in', '-id'], 2, **kwargs)
+
+    def test_pages_follow_cursors_both_ways(self):
+        paginator = self.paginate(count='exact')
+        first = paginator.get_page()
+        self.assertEqual([r.date.day for r in first], [5, 4])
+        self.assertFalse(first.has_previous)
+        self.assertEqual(first.total, 5)
+
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual([r.date.day for r in second], [3, 2])
+        last = paginator.get_page(second.next_cursor)
+        self.assertEqual([r.date.day for r in last], [1])
+        self.assertFalse(last.has_next)
+
+        back = paginator.get_page(last.previous_cursor)
+        self.assertEqual([r.date.day for r in back], [3, 2])
+        self.assertEqual([r.date.day for r in paginator.get_page(back.previous_cursor)], [5, 4])
+
+    def test_count_modes_and_bad_cursor(self):
+        self.assertIsNone(self.paginate(count='none').get_page().total)
+        with self.settings(ATTENDANCE_LIST_COUNT_MODE='estimate'):
+            page = self.paginate().get_page('not-a-cursor')
+        self.assertEqual((page.total, page.total_is_estimate, page.total_is_capped), (5, False, False))
+        self.assertEqual([r.date.day for r in page], [5, 4])
+
+    @override_settings(ATTENDANCE_LIST_COUNT_MODE='none')
+    def test_list_views(self):
+        self.client.force_login(self.lecturer_user)
+        response = self.client.get(reverse('attendance:attendance_record_list'))
+        self.assertEqual(len(response.context['records']), 5)
+        self.assertContains(response, 'Course CS101')
+
+        response = self.client.get(reverse('attendance:qr_code_list'))
+        self.assertEqual(len(response.context['qr_codes']), 1)
+
+    @override_settings(ATTENDANCE_LIST_COUNT_MODE='estimate')
+    def test_capped_total_is_shown_as_lower_bound(self):
+        self.client.force_login(self.lecturer_user)
+        with mock.patch('attendance.pagination.ESTIMATE_CAP', 3):
+            response = self.client.get(reverse('attendance:attendance_record_list'))
+        self.assertContains(response, '3+ records')
+        self.assertNotContains(response, '~3')
+
+
+class AttendanceAdminTest(AttendanceFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for day in range(1, 6):
+            self.add_record(day)
+        recompute_statistics([course.pk for course in self.courses])
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='password123')
+        self.client.force_login(self.admin)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        url = reverse('admin:attendance_attendancerecord_changelist')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as five:
+            response = self.client.get(url)
+        self.assertContains(response, '5 attendance records')
+        for day in range(6, 16):
+            self.add_record(day)
+        with CaptureQueriesContext(connection) as fifteen:
+            self.client.get(url)
+        self.assertEqual(len(five), len(fifteen))
+
+    def test_prefix_search(self):
+        url = reverse('admin:attendance_attendancerecord_changelist')
+        self.assertEqual(self.client.get(url, {'q': '123'}).context['cl'].result_count, 5)
+        self.assertEqual(self.client.get(url, {'q': '234'}).context['cl'].result_count, 0)
+        # Codes and names match case-insensitively, by prefix only
+        for query, count in [('cs1', 5), ('stud', 5), ('course', 5), ('ser', 0)]:
+            self.assertEqual(self.client.get(url, {'q': query}).context['cl'].result_count, count, query)
+        response = self.client.get(reverse('admin:attendance_attendancestatistics_changelist'), {'q': 'CS10'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_change_form_uses_autocomplete(self):
+        record = AttendanceRecord.objects.first()
+        response = self.client.get(reverse('admin:attendance_attendancerecord_change', args=[record.pk]))
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertContains(response, 'vForeignKeyRawIdAdminField')
+
+
+class QRCodeListCountsTest(AttendanceFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_record(4)
+        self.add_record(5, status='late')
+        self.client.force_login(self.lecturer_user)
+
+    def test_list_annotates_turnout_in_the_page_query(self):
+        url = reverse('attendance:qr_code_list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as one:
+            response = self.client.get(url)
+        qr_code = response.context['qr_codes'].object_list[0]
+        self.assertEqual((qr_code.present_count, qr_code.late_count, qr_code.scan_count), (1, 1, 2))
+        self.assertIsNotNone(qr_code.last_scan_at)
+
+        for _ in range(3):
+            QRCode.objects.create(
+                course=self.courses[1], valid_from=timezone.now(),
+                valid_until=timezone.now() + timedelta(days=1), created_by=self.lecturer,
+            )
+        with CaptureQueriesContext(connection) as four:
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['qr_codes']), 4)
+        self.assertEqual(len(one), len(four))
+
+    def test_detail_counts(self):
+        response = self.client.get(reverse('attendance:qr_code_detail', args=[self.qr_code.pk]))
+        self.assertEqual((response.context['present_count'], response.context['late_count']), (1, 1))
+
+
+class QRLifecycleTest(AttendanceFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.expired = [
+            QRCode.objects.create(
+                course=self.courses[0],
+                valid_from=now - timedelta(days=3),
+                valid_until=now - timedelta(days=1, minutes=i),
+                created_by=self.lecturer,
+            )
+            for i in range(5)
+        ]
+
+    def test_deactivate_expired_in_chunks(self):
+        seen = []
+        with CaptureQueriesContext(connection) as queries:
+            updated = deactivate_expired(chunk_size=2, progress=seen.append)
+        self.assertEqual(updated, 5)
+        self.assertEqual(seen, [2, 4, 5])
+        # A pk read and an UPDATE per chunk (plus savepoints), then the empty read
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('UPDATE')]), 3)
+        self.assertEqual(QRCode.objects.filter(is_active=True).get(), self.qr_code)
+
+        out = StringIO()
+        call_command('deactivate_expired_qr_codes', stdout=out)
+        self.assertIn('Deactivated 0 expired QR codes', out.getvalue())
+
+    def test_extend_validity_starts_expired_codes_from_now(self):
+        before = timezone.now()
+        original = self.qr_code.valid_until
+        extend_validity(QRCode.objects.all(), timedelta(hours=2))
+        self.qr_code.refresh_from_db()
+        self.assertEqual(self.qr_code.valid_until, original + timedelta(hours=2))
+        for qr_code in QRCode.objects.filter(pk__in=[qr.pk for qr in self.expired]):
+            self.assertGreaterEqual(qr_code.valid_until, before + timedelta(hours=2))
+
+        out = StringIO()
+        call_command('extend_qr_validity', '--hours', '1', '--id', str(self.qr_code.pk), stdout=out)
+        self.assertIn('Extended 1 QR codes by 1 hours', out.getvalue())
+
+    def test_extend_reactivates_swept_codes(self):
+        swept = self.expired[0]
+        manual = self.expired[1]
+        QRCode.objects.filter(pk=manual.pk).update(is_active=False)
+        deactivate_expired()
+        extend_validity(QRCode.objects.filter(pk__in=[swept.pk, manual.pk]), timedelta(hours=1))
+        swept.refresh_from_db()
+        manual.refresh_from_db()
+        self.assertTrue(swept.is_valid)
+        self.assertIsNone(swept.expired_at)
+        # Codes deactivated by hand stay deactivated
+        self.assertFalse(manual.is_active)
+
+        self.client.force_login(self.student_user)
+        self.client.get(reverse('attendance:scan_qr', args=[swept.pk]))
+        self.assertTrue(AttendanceRecord.objects.filter(student=self.student, qr_code=swept).exists())
+
+    def test_reassign_skips_used_codes(self):
+        self.add_record(4)
+        totals = reassign_course(QRCode.objects.all(), self.courses[1])
+        self.assertEqual(totals, {'reassigned': 5, 'skipped': 1})
+        self.qr_code.refresh_from_db()
+        self.assertEqual(self.qr_code.course, self.courses[0])
+        self.assertEqual(QRCode.objects.filter(course=self.courses[1]).count(), 5)
+        self.assertFalse(ClassSession.objects.filter(course=self.courses[0], qr_code__course=self.courses[1]).exists())
+
+    def test_queryset_validity_matches_is_valid(self):
+        now = timezone.now()
+        upcoming = QRCode.objects.create(
+            course=self.courses[0], valid_from=now + timedelta(hours=1),
+            valid_until=now + timedelta(days=1), created_by=self.lecturer,
+        )
+        self.assertEqual(list(QRCode.objects.active()), [self.qr_code])
+        self.assertEqual(list(QRCode.objects.upcoming()), [upcoming])
+        self.assertEqual(QRCode.objects.expired().count(), 5)
+        self.assertEqual(
+            set(QRCode.objects.valid_at(now)),
+            {qr for qr in QRCode.objects.all() if qr.is_valid},
+        )
+        self.assertEqual(QRCode.objects.valid_at(now + timedelta(hours=2)).count(), 2)
+
+    def test_sweep_is_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(deactivate_expired(), 5)
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]['sql'].startswith('UPDATE'))
+
+    def test_list_filters_by_status(self):
+        self.client.force_login(self.lecturer_user)
+        url = reverse('attendance:qr_code_list')
+        self.assertEqual(len(self.client.get(url, {'status': 'expired'}).context['qr_codes']), 5)
+        self.assertEqual(list(self.client.get(url, {'status': 'active'}).context['qr_codes']), [self.qr_code])
+        deactivate_expired()
+        self.assertEqual(len(self.client.get(url, {'status': 'inactive'}).context['qr_codes']), 5)
+        self.assertEqual(len(self.client.get(url, {'status': 'bogus'}).context['qr_codes']), 6)
+
+    def test_check_qr_codes_command(self):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('check_qr_codes', '--list', stdout=out)
+        output = out.getvalue()
+        self.assertIn('expired but still active: 5', output)
+        self.assertIn('Checked 6 QR codes', output)
+        self.assertEqual(output.count('/attendance/qr-codes/'), 6)
+        # One listing query plus the four status counts, however many codes there are
+        self.assertEqual(len(queries), 5)
+
+    def test_reset_qr_validity_command(self):
+        out = StringIO()
+        call_command('reset_qr_validity', '--invalid', '--dry-run', stdout=out)
+        self.assertIn('Would reset 5 QR codes', out.getvalue())
+        self.assertEqual(QRCode.objects.active().count(), 1)
+
+        with self.assertRaises(CommandError):
+            call_command('reset_qr_validity', '--invalid', stdout=out)
+        self.assertEqual(QRCode.objects.active().count(), 1)
+
+        call_command('reset_qr_validity', '--invalid', '--course', str(self.courses[0].pk), '--hours', '2', stdout=out)
+        self.assertIn('Reset the validity of 5 QR codes', out.getvalue())
+        self.assertEqual(QRCode.objects.active().count(), 6)
+
+        QRCode.objects.update(is_active=False)
+        call_command('reset_qr_validity', '--latest', '--activate', stdout=out)
+        self.assertEqual(QRCode.objects.active().count(), 1)
+
+    def test_admin_actions(self):
+        admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='password123')
+        self.client.force_login(admin)
+        url = reverse('admin:attendance_qrcode_changelist')
+        selected = [str(qr.pk) for qr in self.expired[:2]]
+
+        response = self.client.post(url, {'action': 'reassign_to_course', '_selected_action': selected})
+        self.assertContains(response, '2 QR codes selected')
+        response = self.client.post(url, {
+            'action': 'reassign_to_course', '_selected_action': selected,
+            'course': self.courses[1].pk, 'apply': 'Move QR codes',
+        }, follow=True)
+        self.assertContains(response, 'Moved 2 QR codes to CS102')
+
+        response = self.client.post(url, {'action': 'deactivate_expired_codes', '_selected_action': selected}, follow=True)
+        self.assertContains(response, 'Deactivated 2 expired QR codes')
+        self.assertEqual(QRCode.objects.filter(is_active=False).count(), 2)
+
+
+class ScanLatenessTest(AttendanceFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # 2023-09-04 is a Monday
+        self.schedule = ClassSchedule.objects.create(
+            course=self.courses[0], day='Monday', start_time=time(9, 0), end_time=time(10, 30), room='A1'
+        )
+        self.monday_qr = QRCode.objects.create(
+            course=self.courses[0],
+            valid_from=timezone.make_aware(datetime(2023, 9, 4, 8, 0)),
+            valid_until=timezone.make_aware(datetime(2023, 9, 4, 11, 0)),
+            created_by=self.lecturer
+        )
+        self.client.force_login(self.student_user)
+
+    def scan_at(self, hour, minute):
+        moment = timezone.make_aware(datetime(2023, 9, 4, hour, minute))
+        with mock.patch('django.utils.timezone.now', return_value=moment):
+            self.client.get(reverse('attendance:scan_qr', args=[self.monday_qr.pk]))
+        return AttendanceRecord.objects.get(date=date(2023, 9, 4))
+
+    @override_settings(ATTENDANCE_LATE_GRACE_MINUTES=10)
+    def test_scan_within_grace_is_present(self):
+        record = self.scan_at(9, 5)
+        self.assertEqual((record.status, record.minutes_late), ('present', 5))
+        self.assertEqual(record.session.schedule, self.schedule)
+
+    @override_settings(ATTENDANCE_LATE_GRACE_MINUTES=10)
+    def test_scan_after_grace_is_late(self):
+        record = self.scan_at(9, 25)
+        self.assertEqual((record.status, record.minutes_late), ('late', 25))
+        self.assertEqual(record.time_difference, timedelta(minutes=25))
+
+    def test_scan_interns_user_agent(self):
+        agent = 'Mozilla/5.0 (X11; Linux x86_64) Firefox/118.0'
+        clear_cache()
+        with mock.patch('django.utils.timezone.now', return_value=timezone.make_aware(datetime(2023, 9, 4, 9, 0))):
+            self.client.get(reverse('attendance:scan_qr', args=[self.monday_qr.pk]), HTTP_USER_AGENT=agent)
+        record = AttendanceRecord.objects.get(date=date(2023, 9, 4))
+        self.assertEqual(record.user_agent.value, agent)
+
+        # Known agents resolve from memory
+        with self.assertNumQueries(0):
+            self.assertEqual(intern_user_agent(agent), record.user_agent_id)
+        self.assertIsNone(intern_user_agent(''))
+
+        report = storage_report()
+        self.assertEqual((report['records'], report['agents'], report['inline_bytes']), (1, 1, len(agent)))
+        self.assertEqual(UserAgent.objects.count(), 1)
+
+    def test_schedule_index_is_reused_until_schedules_change(self):
+        self.assertEqual([slot.schedule_id for slot in schedules_for(self.courses[0].pk, 0)], [self.schedule.pk])
+        with CaptureQueriesContext(connection) as queries:
+            schedules_for(self.courses[0].pk, 0)
+        # Only the schedule version is read, from the cache
+        cache_table = settings.CACHES['default'].get('LOCATION', '')
+        self.assertTrue(all(f'"{cache_table}"' in q['sql'] for q in queries))
+
+        self.schedule.day = 'Tuesday'
+        self.schedule.save()
+        self.assertEqual(schedules_for(self.courses[0].pk, 0), [])
+
+
+class SessionCloseTest(AttendanceFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create_user(email='other@example.com', username='other', password='password123')
+        self.other = Student.objects.create(user=user, student_id='67890', date_of_birth=date(2000, 1, 1))
+        Enrollment.objects.create(student=self.other, course=self.courses[0])
+        # Sessions close once their QR code expires; the fixture QR code is still valid
+        expired = QRCode.objects.create(
+            course=self.courses[0],
+            valid_from=timezone.make_aware(datetime(2023, 9, 5, 9)),
+            valid_until=timezone.make_aware(datetime(2023, 9, 5, 10)),
+            created_by=self.lecturer
+        )
+        self.session = expired.sessions.get()
+        self.add_record(5)
+
+    def test_close_records_absences_and_statistics(self):
+        self.assertEqual(list(due_sessions()), [self.session])
+        totals = close_sessions(due_sessions())
+        self.assertEqual(totals, {'sessions': 1, 'absences': 1, 'courses': 1})
+
+        absence = AttendanceRecord.objects.get(status='absent')
+        self.assertEqual((absence.student, absence.session, absence.marked_by), (self.other, self.session, 'system'))
+        self.session.refresh_from_db()
+        self.assertIsNotNone(self.session.closed_at)
+        stats = AttendanceStatistics.objects.get(student=self.other)
+        self.assertEqual((stats.total_classes, stats.attended_classes), (2, 0))
+
+        # Closed sessions are not processed again
+        self.assertEqual(close_sessions(ClassSession.objects.all())['absences'], 2)
+        self.assertEqual(close_sessions(ClassSession.objects.all())['sessions'], 0)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('close_sessions', stdout=out)
+        self.assertIn('Closed 1 sessions, recorded 1 absences across 1 courses', out.getvalue())
+
+    def test_lecturer_closes_qr_code_session(self):
+        self.client.force_login(self.lecturer_user)
+        response = self.client.post(reverse('attendance:qr_code_close_session', args=[self.qr_code.pk]))
+        self.assertRedirects(response, reverse('attendance:qr_code_detail', args=[self.qr_code.pk]), fetch_redirect_response=False)
+        self.assertEqual(AttendanceRecord.objects.filter(date=date(2023, 9, 1), status='absent').count(), 2)
+
+    def test_scan_after_early_close_replaces_the_absence(self):
+        today = timezone.localdate()
+        session = ClassSession.open(self.courses[0].pk, today, qr_code_id=self.qr_code.pk)
+        close_sessions(ClassSession.objects.filter(pk=session.pk))
+        self.assertEqual(AttendanceRecord.objects.get(student=self.student, date=today).status, 'absent')
+
+        self.client.force_login(self.student_user)
+        self.client.get(reverse('attendance:scan_qr', args=[self.qr_code.pk]))
+        record = AttendanceRecord.objects.get(student=self.student, date=today)
+        self.assertIn(record.status, ['present', 'late'])
+        self.assertEqual(record.marked_by, 'qr_scan')
+
+        # A real mark is not replaced by a second scan
+        self.client.get(reverse('attendance:scan_qr', args=[self.qr_code.pk]))
+        self.assertEqual(AttendanceRecord.objects.filter(student=self.student, date=today).count(), 1)
+        self.assertEqual(AttendanceStatistics.objects.get(student=self.student, course=self.courses[0]).attended_classes, 2)
+
+
+class SemesterArchiveTest(AttendanceFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_record(1)
+        self.export_dir = tempfile.mkdtemp()
+
+    def test_archive_moves_records_and_keeps_statistics(self):
+        result = archive_semester(self.semester, export_dir=self.export_dir, force=True)
+        self.assertEqual((result['exported'], result['archived']), (1, 1))
+        self.assertFalse(AttendanceRecord.objects.exists())
+        archived = ArchivedAttendanceRecord.objects.get()
+        self.assertEqual((archived.student, archived.course, archived.semester), (self.student, self.courses[0], self.semester))
+
+        with gzip.open(result['path'], 'rt') as f:
+            self.assertEqual(len(f.read().splitlines()), 2)
+        self.semester.refresh_from_db()
+        self.assertIsNotNone(self.semester.archived_at)
+
+        stats = AttendanceStatistics.objects.get(student=self.student, course=self.courses[0])
+        self.assertEqual((stats.total_classes, stats.attended_classes), (1, 1))
+        # Archived semesters are left out of later rebuilds
+        self.assertEqual(recompute_statistics([self.courses[0].pk])['rows'], 0)
+        self.assertTrue(AttendanceStatistics.objects.filter(pk=stats.pk).exists())
+
+        with self.assertRaises(ArchiveError):
+            archive_semester(self.semester, export_dir=self.export_dir, force=True)
+
+    def test_interrupted_archive_resumes(self):
+        self.add_record(2, status='late')
+        self.add_record(3, status='absent')
+        real_delete = archive.delete_moved
+        calls = []
+
+        def interrupted(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('interrupted')
+            real_delete(*args)
+
+        with mock.patch('attendance.archive.delete_moved', side_effect=interrupted):
+            with self.assertRaises(RuntimeError):
+                archive_semester(self.semester, export_dir=self.export_dir, chunk_size=1, force=True)
+        self.assertEqual((ArchivedAttendanceRecord.objects.count(), AttendanceRecord.objects.count()), (1, 2))
+
+        result = archive_semester(self.semester, export_dir=self.export_dir, chunk_size=1, force=True)
+        self.assertEqual((result['exported'], result['archived']), (3, 3))
+        self.assertFalse(AttendanceRecord.objects.exists())
+        self.assertEqual(
+            sorted(ArchivedAttendanceRecord.objects.values_list('status', flat=True)), ['absent', 'late', 'present']
+        )
+        # Statistics are still the ones finalised over the whole semester
+        stats = AttendanceStatistics.objects.get(student=self.student, course=self.courses[0])
+        self.assertEqual((stats.total_classes, stats.attended_classes), (3, 2))
+
+        # A lost export is rebuilt from the archived and the remaining rows
+        os.remove(result['path'])
+        self.semester.archived_at = None
+        self.semester.save(update_fields=['archived_at'])
+        result = archive_semester(self.semester, export_dir=self.export_dir, force=True)
+        with gzip.open(result['path'], 'rt') as f:
+            self.assertEqual(len(f.read().splitlines()), 4)
+
+    def test_active_semester_is_refused(self):
+        with self.assertRaises(ArchiveError):
+            archive_semester(self.semester, export_dir=self.export_dir)
+        self.assertFalse(os.listdir(self.export_dir))
+
+    def test_reports_read_the_archive(self):
+        archive_semester(self.semester, export_dir=self.export_dir, force=True)
+        self.client.force_login(self.lecturer_user)
+        response = self.client.get(reverse('attendance:course_attendance_report', args=[self.courses[0].pk]))
+        self.assertContains(response, 'Archived')
+        self.assertEqual(response.context['attendance_data'][0]['present_classes'], 1)
+
+        output = BytesIO()
+        write_semester_workbook(self.semester, output, workers=1)
+        rows = list(load_workbook(BytesIO(output.getvalue()))[self.courses[0].code].values)
+        self.assertEqual(rows[6][4], 1)
+
+    def test_aggregates_include_archived_semesters(self):
+        archive_semester(self.semester, export_dir=self.export_dir, force=True)
+        self.assertEqual(count_records('course', course__in=[self.courses[0].pk]), {self.courses[0].pk: {'total': 1, 'attended': 1}})
+
+        self.client.force_login(self.lecturer_user)
+        response = self.client.get(reverse('attendance:attendance_reports'))
+        self.assertEqual(response.context['total_attendance'], 1)
+        response = self.client.get(reverse('attendance:attendance_analytics'))
+        analytics = {row['course']: row for row in response.context['course_analytics']}
+        self.assertEqual(analytics[self.courses[0]]['total_present'], 1)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_semester', self.semester.pk, '--force', '--output-dir', self.export_dir, stdout=out)
+        self.assertIn('Archived 1 records', out.getvalue())
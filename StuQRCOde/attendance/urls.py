@@ -10,6 +10,7 @@ urlpatterns = [
     path('qr-codes/<uuid:pk>/', views.qr_code_detail, name='qr_code_detail'),
     path('qr-codes/<uuid:pk>/delete/', views.qr_code_delete, name='qr_code_delete'),
     path('qr-codes/<uuid:pk>/generate/', views.qr_code_generate, name='qr_code_generate'),
+    path('qr-codes/<uuid:pk>/close-session/', views.qr_code_close_session, name='qr_code_close_session'),
     
     # Attendance tracking URLs
     path('scan/<uuid:qr_id>/', views.scan_qr_code, name='scan_qr'),
@@ -21,6 +22,7 @@ urlpatterns = [
     
     # Report URLs
     path('reports/course/<int:course_id>/', views.course_attendance_report, name='course_attendance_report'),
+    path('reports/semester/<int:semester_id>/export/', views.semester_attendance_export, name='semester_attendance_export'),
     path('reports/student/<int:student_id>/', views.student_attendance_report, name='student_attendance_report'),
     path('reports/', views.attendance_reports, name='attendance_reports'),
     path('analytics/', views.attendance_analytics, name='attendance_analytics'),
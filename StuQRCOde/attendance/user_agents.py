@@ -0,0 +1,85 @@
+"""
+Interning of HTTP user agents.
+
+Records point at a shared UserAgent row instead of storing the header text,
+since a few hundred distinct agents account for millions of scans. Each worker
+keeps {hash: id} in memory, so resolving a known agent on the scan path costs
+no query; agents are never deleted, so the mapping never goes stale.
+"""
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+
+from .models import AttendanceRecord, ArchivedAttendanceRecord, UserAgent
+
+# Width of a foreign key column, in bytes
+REFERENCE_BYTES = 8
+
+# Upper bound on cached agents per process; the cache starts over when reached
+MAX_CACHED = 10000
+
+_ids = {}
+
+
+def agent_hash(value):
+    return hashlib.sha256(value.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def intern_user_agent(value):
+    """Return the UserAgent id for a header value, creating the row on first sight; None when empty"""
+    if not value:
+        return None
+    key = agent_hash(value)
+    agent_id = _ids.get(key)
+    if agent_id is None:
+        agent_id = _lookup(key, value)
+        if len(_ids) >= MAX_CACHED:
+            _ids.clear()
+        _ids[key] = agent_id
+    return agent_id
+
+
+def _lookup(key, value):
+    agent_id = UserAgent.objects.filter(hash=key).values_list('pk', flat=True).first()
+    if agent_id is not None:
+        return agent_id
+    try:
+        with transaction.atomic():
+            return UserAgent.objects.create(hash=key, value=value).pk
+    except IntegrityError:
+        # Another worker created it first
+        return UserAgent.objects.get(hash=key).pk
+
+
+def clear_cache():
+    _ids.clear()
+
+
+def storage_report():
+    """
+    Compare the user agent text the records reference with what interning stores.
+
+    Returns {'records', 'agents', 'inline_bytes', 'interned_bytes', 'saved_percent'},
+    where inline_bytes is what per-row text columns would hold and interned_bytes
+    the lookup table plus one reference per record (text lengths in characters).
+    """
+    records = 0
+    inline = 0
+    for model in (AttendanceRecord, ArchivedAttendanceRecord):
+        totals = model.objects.filter(user_agent__isnull=False).aggregate(
+            rows=Count('pk'),
+            text=Sum(Length('user_agent__value')),
+        )
+        records += totals['rows']
+        inline += totals['text'] or 0
+    lookup = UserAgent.objects.aggregate(agents=Count('pk'), text=Sum(Length('value')), keys=Sum(Length('hash')))
+    interned = (lookup['text'] or 0) + (lookup['keys'] or 0) + records * REFERENCE_BYTES
+    return {
+        'records': records,
+        'agents': lookup['agents'],
+        'inline_bytes': inline,
+        'interned_bytes': interned,
+        'saved_percent': round((1 - interned / inline) * 100, 1) if inline else 0,
+    }
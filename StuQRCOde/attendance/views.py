@@ -2,10 +2,10 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from django.core.paginator import Paginator
 from django.http import HttpResponse
 from django.template.loader import render_to_string
-from django.db.models import Count, Avg
+from django.utils.functional import SimpleLazyObject
+from django.db.models import Count, Avg, Q
 from datetime import datetime, timedelta
 import qrcode
 from io import BytesIO
@@ -20,10 +20,35 @@ from openpyxl import Workbook
 
 from django.conf import settings
 
-from .models import QRCode, AttendanceRecord, AttendanceStatistics
+from .models import QRCode, AttendanceRecord, ArchivedAttendanceRecord, AttendanceStatistics, ClassSession
 from .forms import QRCodeForm
-from courses.models import Course
-from accounts.models import Student, Lecturer, User
+from .absences import close_sessions
+from .archive import count_records, course_records, is_archived
+from .pagination import KeysetPaginator
+from .schedules import scan_status
+from .statistics import ATTENDED_STATUSES, classes_held
+from .user_agents import intern_user_agent
+from .exports import write_semester_workbook
+from .report_cache import cached_report, data_version
+from courses.models import Course, Semester, Enrollment
+from accounts.profiles import is_profile_complete
+from accounts.models import Student
+
+def _roster_sizes(course_ids):
+    """Return {course_id: number of enrolled students}"""
+    return dict(Enrollment.objects.filter(course__in=course_ids).values('course').annotate(
+        students=Count('id')
+    ).order_by().values_list('course', 'students'))
+
+
+QR_STATUS_CHOICES = [
+    ('', 'All'),
+    ('active', 'Active'),
+    ('upcoming', 'Not yet valid'),
+    ('expired', 'Expired'),
+    ('inactive', 'Inactive'),
+]
+
 
 # QR Code management views
 @login_required
@@ -34,23 +59,42 @@ def qr_code_list(request):
         messages.error(request, 'Access denied. Students cannot access QR code management.')
         return redirect('dashboard:home')
     
-    qr_codes = QRCode.objects.all().select_related('course', 'created_by')
+    qr_codes = QRCode.objects.all()
     
     # Filter by role
     if request.user.role == 'lecturer':
-        try:
-            lecturer_profile = request.user.lecturer_profile
-            qr_codes = qr_codes.filter(course__lecturer=lecturer_profile)
-        except User.lecturer_profile.RelatedObjectDoesNotExist:
+        if request.profile:
+            qr_codes = qr_codes.filter(course__lecturer=request.profile)
+        else:
             messages.warning(request, 'You do not have a lecturer profile. Please complete your profile first.')
             qr_codes = QRCode.objects.none()
-    
-    paginator = Paginator(qr_codes, 10)
-    page_number = request.GET.get('page')
-    qr_codes = paginator.get_page(page_number)
+
+    # Validity is filtered in SQL through the queryset methods
+    status = request.GET.get('status', '')
+    if status == 'active':
+        qr_codes = qr_codes.active()
+    elif status == 'upcoming':
+        qr_codes = qr_codes.upcoming()
+    elif status == 'expired':
+        qr_codes = qr_codes.expired()
+    elif status == 'inactive':
+        qr_codes = qr_codes.filter(is_active=False)
+    else:
+        status = ''
+    
+    # Turnout of every code on the page comes with the page query; the total skips the join
+    paginator = KeysetPaginator(
+        qr_codes.select_related('course', 'created_by').with_scan_counts(),
+        ['-created_at', '-id'],
+        10,
+        count_queryset=qr_codes,
+    )
+    qr_codes = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'qr_codes': qr_codes,
+        'status': status,
+        'status_choices': QR_STATUS_CHOICES,
         'current_time': timezone.now(),
     }
     return render(request, 'attendance/qr_code_list.html', context)
@@ -67,7 +111,7 @@ def qr_code_create(request):
         form = QRCodeForm(request.POST, user=request.user)
         if form.is_valid():
             qr_code = form.save(commit=False)
-            qr_code.created_by = request.user.lecturer_profile
+            qr_code.created_by = request.profile or None
             qr_code.save()
             messages.success(request, 'QR Code generated successfully!')
             return redirect('attendance:qr_code_detail', pk=qr_code.pk)
@@ -80,20 +124,16 @@ def qr_code_create(request):
 @login_required
 def qr_code_detail(request, pk):
     """QR code detail view"""
-    qr_code = get_object_or_404(QRCode, pk=pk)
+    qr_code = get_object_or_404(QRCode.objects.select_related('course').with_scan_counts(), pk=pk)
 
     # Check permissions
-    if request.user.role == 'lecturer' and qr_code.course.lecturer != request.user.lecturer_profile:
+    if request.user.role == 'lecturer' and qr_code.course.lecturer_id != getattr(request.profile, 'pk', None):
         messages.error(request, 'Access denied.')
         return redirect('attendance:qr_code_list')
 
     # Generate QR code image URL instead of inline base64 for better mobile performance
     # The actual image generation is handled by qr_code_generate view
 
-    # Calculate attendance statistics
-    present_count = qr_code.attendance_records.filter(status='present').count()
-    late_count = qr_code.attendance_records.filter(status='late').count()
-
     # Create scan URL
     base_url = settings.BASE_URL.rstrip('/')
     scan_url = f"{base_url}/attendance/scan/{qr_code.id}/"
@@ -101,20 +141,36 @@ def qr_code_detail(request, pk):
     context = {
         'qr_code': qr_code,
         'scan_url': scan_url,
-        'present_count': present_count,
-        'late_count': late_count,
+        'present_count': qr_code.present_count,
+        'late_count': qr_code.late_count,
+        'open_sessions': qr_code.sessions.filter(closed_at__isnull=True).exists(),
         'current_time': timezone.now(),
     }
     return render(request, 'attendance/qr_code_detail.html', context)
 
 
+@login_required
+def qr_code_close_session(request, pk):
+    """Close the sessions of a QR code now and record absences"""
+    qr_code = get_object_or_404(QRCode, pk=pk)
+
+    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and qr_code.course.lecturer != request.profile):
+        messages.error(request, 'Access denied.')
+        return redirect('attendance:qr_code_list')
+
+    if request.method == 'POST':
+        totals = close_sessions(qr_code.sessions.all())
+        messages.success(request, f"Session closed. {totals['absences']} students marked absent.")
+    return redirect('attendance:qr_code_detail', pk=qr_code.pk)
+
+
 @login_required
 def qr_code_delete(request, pk):
     """Delete QR code"""
     qr_code = get_object_or_404(QRCode, pk=pk)
 
     # Check permissions
-    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and qr_code.course.lecturer != request.user.lecturer_profile):
+    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and qr_code.course.lecturer != request.profile):
         messages.error(request, 'Access denied.')
         return redirect('attendance:qr_code_list')
 
@@ -137,7 +193,7 @@ def qr_code_generate(request, pk):
     qr_code = get_object_or_404(QRCode, pk=pk)
 
     # Check permissions
-    if request.user.role == 'lecturer' and qr_code.course.lecturer != request.user.lecturer_profile:
+    if request.user.role == 'lecturer' and qr_code.course.lecturer != request.profile:
         messages.error(request, 'Access denied.')
         return redirect('attendance:qr_code_list')
 
@@ -191,36 +247,41 @@ def scan_qr_code(request, qr_id):
         messages.error(request, 'Only students can mark attendance.')
         return redirect('dashboard:home')
     
-    try:
-        student = request.user.student_profile
-        if not student.date_of_birth:  # Proxy for completion
-            messages.info(request, 'Please complete your student profile.')
-            return redirect('accounts:complete_student_profile')
-    except Student.DoesNotExist:
+    student = request.profile
+    if not is_profile_complete(request.user, student):
         messages.info(request, 'Please complete your student profile.')
         return redirect('accounts:complete_student_profile')
     
-    # Check if already marked attendance
-    if AttendanceRecord.objects.filter(
-        student=student,
-        course=qr_code.course,
-        date=timezone.now().date()
+    if getattr(settings, 'ATTENDANCE_REQUIRE_ENROLLMENT', False) and not Enrollment.objects.filter(
+        student=student, course=qr_code.course
     ).exists():
-        messages.info(request, 'Attendance already marked for today.')
+        messages.error(request, 'You are not enrolled in this course.')
         return redirect('dashboard:home')
     
-    # Mark attendance
-    attendance_record = AttendanceRecord.objects.create(
+    # Check if already marked attendance. An absence recorded when the session was
+    # closed early is not a mark: a scan while the code is still valid replaces it
+    attendance_record = AttendanceRecord.objects.filter(
         student=student,
         course=qr_code.course,
-        qr_code=qr_code,
-        date=timezone.now().date(),
-        time_in=timezone.now(),
-        status='present',
-        marked_by='qr_scan',
-        ip_address=request.META.get('REMOTE_ADDR'),
-        user_agent=request.META.get('HTTP_USER_AGENT', '')
-    )
+        date=now.date()
+    ).first()
+    if attendance_record is not None and not (attendance_record.status == 'absent' and attendance_record.marked_by == 'system'):
+        messages.info(request, 'Attendance already marked for today.')
+        return redirect('dashboard:home')
+    if attendance_record is None:
+        attendance_record = AttendanceRecord(student=student, course=qr_code.course, date=now.date())
+    
+    # Mark attendance, late when past the grace period of the matching schedule
+    schedule_id, minutes_late, status = scan_status(qr_code.course_id, now)
+    attendance_record.qr_code = qr_code
+    attendance_record.session = ClassSession.open(qr_code.course_id, now.date(), qr_code_id=qr_code.pk, schedule_id=schedule_id)
+    attendance_record.time_in = now
+    attendance_record.minutes_late = minutes_late
+    attendance_record.status = status
+    attendance_record.marked_by = 'qr_scan'
+    attendance_record.ip_address = request.META.get('REMOTE_ADDR')
+    attendance_record.user_agent_id = intern_user_agent(request.META.get('HTTP_USER_AGENT', ''))
+    attendance_record.save()
     
     # Update attendance statistics
     stats, created = AttendanceStatistics.objects.get_or_create(
@@ -228,39 +289,38 @@ def scan_qr_code(request, qr_id):
         course=qr_code.course
     )
     stats.attended_classes += 1
-    stats.total_classes += 1
+    stats.total_classes = ClassSession.objects.filter(course=qr_code.course).count()
     stats.calculate_percentage()
     stats.save()
     
-    messages.success(request, 'Attendance marked successfully!')
+    if status == 'late':
+        messages.warning(request, f'Attendance marked as late ({minutes_late} minutes after class start).')
+    else:
+        messages.success(request, 'Attendance marked successfully!')
     return redirect('dashboard:home')
 
 
 @login_required
 def attendance_record_list(request):
     """List attendance records"""
-    records = AttendanceRecord.objects.all().select_related('student', 'course', 'qr_code')
+    records = AttendanceRecord.objects.all().select_related('student__user', 'course')
     
     # Filter by role
     if request.user.role == 'lecturer':
-        try:
-            lecturer_profile = request.user.lecturer_profile
-            records = records.filter(course__lecturer=lecturer_profile)
-        except User.lecturer_profile.RelatedObjectDoesNotExist:
+        if request.profile:
+            records = records.filter(course__lecturer=request.profile)
+        else:
             messages.warning(request, 'You do not have a lecturer profile. Please contact administrator.')
             records = AttendanceRecord.objects.none()
     elif request.user.role == 'student':
         # Students can only see their own records
-        try:
-            student_profile = request.user.student_profile
-            records = records.filter(student=student_profile)
-        except Student.DoesNotExist:
+        if not request.profile:
             messages.info(request, 'Please complete your student profile.')
             return redirect('accounts:complete_student_profile')
+        records = records.filter(student=request.profile)
     
-    paginator = Paginator(records, 20)
-    page_number = request.GET.get('page')
-    records = paginator.get_page(page_number)
+    paginator = KeysetPaginator(records, ['-date', '-time_in', '-id'], 20)
+    records = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'records': records,
@@ -271,15 +331,15 @@ def attendance_record_list(request):
 @login_required
 def attendance_record_detail(request, pk):
     """Attendance record detail view"""
-    record = get_object_or_404(AttendanceRecord, pk=pk)
+    record = get_object_or_404(AttendanceRecord.objects.select_related('user_agent'), pk=pk)
     
     # Check permissions
     if request.user.role == 'student':
         # Students can only view their own records
-        if record.student != request.user.student_profile:
+        if record.student != request.profile:
             messages.error(request, 'Access denied.')
             return redirect('attendance:attendance_record_list')
-    elif request.user.role == 'lecturer' and record.course.lecturer != request.user.lecturer_profile:
+    elif request.user.role == 'lecturer' and record.course.lecturer != request.profile:
         messages.error(request, 'Access denied.')
         return redirect('attendance:attendance_record_list')
     
@@ -297,9 +357,8 @@ def lecturer_dashboard(request):
         messages.error(request, 'Access denied.')
         return redirect('dashboard:home')
     
-    try:
-        lecturer = request.user.lecturer_profile
-    except Lecturer.DoesNotExist:
+    lecturer = request.profile
+    if not lecturer:
         messages.error(request, 'Lecturer profile not found.')
         return redirect('accounts:complete_lecturer_profile')
     
@@ -307,26 +366,32 @@ def lecturer_dashboard(request):
     courses = Course.objects.filter(lecturer=lecturer).select_related('semester')
     
     # Get attendance statistics for each course
-    course_stats = []
-    for course in courses:
-        total_students = Student.objects.filter(
-            attendance_records__course=course
-        ).distinct().count()
-        
-        total_classes = AttendanceRecord.objects.filter(course=course).values('date').distinct().count()
-        attended_classes = AttendanceRecord.objects.filter(course=course).count()
-        
-        if total_classes > 0:
-            avg_attendance = (attended_classes / (total_classes * total_students)) * 100 if total_students > 0 else 0
-        else:
-            avg_attendance = 0
-        
-        course_stats.append({
-            'course': course,
-            'total_students': total_students,
-            'total_classes': total_classes,
-            'avg_attendance': round(avg_attendance, 2),
-        })
+    course_ids = [course.pk for course in courses]
+
+    def build_course_stats():
+        stats = {}
+        held = classes_held(course_ids)
+        enrolled = _roster_sizes(course_ids)
+        for course_id, row in count_records('course', course__in=course_ids).items():
+            total_students = enrolled.get(course_id, 0)
+            total_classes = held.get(course_id, 0)
+            if total_classes > 0:
+                avg_attendance = (row['attended'] / (total_classes * total_students)) * 100 if total_students > 0 else 0
+            else:
+                avg_attendance = 0
+            stats[course_id] = {
+                'total_students': total_students,
+                'total_classes': total_classes,
+                'avg_attendance': round(avg_attendance, 2),
+            }
+        return stats
+
+    stats = cached_report('lecturer_course_stats', request.user.role, course_ids, build_course_stats)
+    empty_stats = {'total_students': 0, 'total_classes': 0, 'avg_attendance': 0}
+    course_stats = [
+        dict(stats.get(course.pk, empty_stats), course=course)
+        for course in courses
+    ]
     
     context = {
         'lecturer': lecturer,
@@ -350,39 +415,41 @@ def course_attendance_report(request, course_id):
         return redirect('dashboard:home')
     
     # Check permissions
-    if request.user.role == 'lecturer' and course.lecturer != request.user.lecturer_profile:
+    if request.user.role == 'lecturer' and course.lecturer != request.profile:
         messages.error(request, 'Access denied.')
         return redirect('attendance:attendance_reports')
     
     # Get attendance data
-    students = Student.objects.filter(
-        attendance_records__course=course
-    ).distinct().select_related('user')
-    
-    attendance_data = []
-    for student in students:
-        records = AttendanceRecord.objects.filter(
-            student=student,
-            course=course
-        ).order_by('date')
-        
-        total_classes = records.count()
-        present_classes = records.filter(status='present').count()
-        absent_classes = total_classes - present_classes
-        percentage = (present_classes / total_classes * 100) if total_classes > 0 else 0
+    def build_attendance_data():
+        students = course.roster.select_related('user').order_by('student_id')
         
-        attendance_data.append({
-            'student': student,
-            'total_classes': total_classes,
-            'present_classes': present_classes,
-            'absent_classes': absent_classes,
-            'percentage': round(percentage, 2),
-            'records': records,
-        })
+        total_classes = course.sessions.count()
+        attendance_data = []
+        for student in students:
+            records = course_records(course).filter(student=student).order_by('date')
+            
+            present_classes = records.filter(status__in=ATTENDED_STATUSES).count()
+            absent_classes = total_classes - present_classes
+            percentage = (present_classes / total_classes * 100) if total_classes > 0 else 0
+            
+            attendance_data.append({
+                'student': student,
+                'total_classes': total_classes,
+                'present_classes': present_classes,
+                'absent_classes': absent_classes,
+                'percentage': round(percentage, 2),
+                'records': records,
+            })
+        return attendance_data
+    
+    # Evaluated lazily so a cached report fragment skips the queries entirely
+    attendance_data = SimpleLazyObject(build_attendance_data)
     
     context = {
         'course': course,
         'attendance_data': attendance_data,
+        'archived': is_archived(course),
+        'data_version': data_version([course.pk]),
     }
     
     # Check if PDF format is requested
@@ -497,6 +564,33 @@ def course_attendance_report(request, course_id):
     return render(request, 'attendance/course_attendance_report.html', context)
 
 
+@login_required
+def semester_attendance_export(request, semester_id):
+    """Export one workbook with a sheet per course for a semester"""
+    semester = get_object_or_404(Semester, pk=semester_id)
+
+    if request.user.role not in ['admin', 'lecturer']:
+        messages.error(request, 'Access denied. Students cannot download attendance reports.')
+        return redirect('dashboard:home')
+
+    courses = semester.courses.all()
+    if request.user.role == 'lecturer':
+        if not request.profile:
+            messages.warning(request, 'You do not have a lecturer profile. Please complete your profile first.')
+            return redirect('accounts:complete_lecturer_profile')
+        courses = courses.filter(lecturer=request.profile)
+
+    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response['Content-Disposition'] = f'attachment; filename="semester_attendance_{semester.name}_{semester.year}.xlsx"'
+    write_semester_workbook(
+        semester,
+        response,
+        courses=courses,
+        include_summary=request.GET.get('summary') != '0',
+    )
+    return response
+
+
 @login_required
 def student_attendance_report(request, student_id):
     """Generate attendance report for a student"""
@@ -505,17 +599,22 @@ def student_attendance_report(request, student_id):
     # Check permissions
     if request.user.role == 'student':
         # Students can only view their own report
-        if student != request.user.student_profile:
+        if student != request.profile:
             messages.error(request, 'Access denied.')
             return redirect('dashboard:home')
     elif request.user.role == 'lecturer':
         # Lecturer can view any student's report
         pass
     
-    # Get attendance data
-    records = AttendanceRecord.objects.filter(
-        student=student
-    ).select_related('course', 'qr_code').order_by('-date')
+    # Get attendance data, including the records of archived semesters
+    records = sorted(
+        [
+            *AttendanceRecord.objects.filter(student=student).select_related('course', 'qr_code'),
+            *ArchivedAttendanceRecord.objects.filter(student=student).select_related('course'),
+        ],
+        key=lambda record: record.date,
+        reverse=True,
+    )
     
     # Group by course
     course_data = {}
@@ -528,9 +627,14 @@ def student_attendance_report(request, student_id):
             }
         course_data[record.course]['records'].append(record)
         course_data[record.course]['total_classes'] += 1
-        if record.status == 'present':
+        if record.status in ATTENDED_STATUSES:
             course_data[record.course]['present_classes'] += 1
     
+    # Classes held come from the sessions of each course
+    held = classes_held([course.pk for course in course_data])
+    for course, data in course_data.items():
+        data['total_classes'] = held.get(course.pk, data['total_classes'])
+
     # Calculate percentages
     for course, data in course_data.items():
         data['percentage'] = round((data['present_classes'] / data['total_classes'] * 100), 2) if data['total_classes'] > 0 else 0
@@ -553,40 +657,43 @@ def attendance_reports(request):
     if request.user.role == 'admin':
         courses = Course.objects.all()
     else:  # lecturer
-        try:
-            lecturer_profile = request.user.lecturer_profile
-            courses = Course.objects.filter(lecturer=lecturer_profile)
-        except User.lecturer_profile.RelatedObjectDoesNotExist:
+        if not request.profile:
             messages.warning(request, 'You do not have a lecturer profile. Please complete your profile first.')
             return redirect('accounts:complete_lecturer_profile')
+        courses = Course.objects.filter(lecturer=request.profile)
     
     # Get overall statistics
-    total_courses = courses.count()
-    total_students = Student.objects.filter(
-        attendance_records__course__in=courses
-    ).distinct().count()
-    
-    total_classes = AttendanceRecord.objects.filter(
-        course__in=courses
-    ).values('date', 'course').distinct().count()
-    
-    total_attendance = AttendanceRecord.objects.filter(
-        course__in=courses,
-        status='present'
-    ).count()
+    course_ids = list(courses.values_list('id', flat=True))
+
+    def build_totals():
+        return {
+            'total_students': Enrollment.objects.filter(
+                course__in=course_ids
+            ).values('student').distinct().count(),
+            'total_classes': ClassSession.objects.filter(course__in=course_ids).count(),
+            'total_attendance': sum(
+                row['attended'] for row in count_records('course', course__in=course_ids).values()
+            ),
+        }
+
+    totals = cached_report('attendance_reports', request.user.role, course_ids, build_totals)
     
     # Recent activity
     recent_records = AttendanceRecord.objects.filter(
         course__in=courses
     ).select_related('student', 'course').order_by('-date', '-time_in')[:10]
     
+    semesters = Semester.objects.filter(courses__in=courses).distinct()
+
     context = {
         'courses': courses,
-        'total_courses': total_courses,
-        'total_students': total_students,
-        'total_classes': total_classes,
-        'total_attendance': total_attendance,
+        'semesters': semesters,
+        'total_courses': len(course_ids),
+        'total_students': totals['total_students'],
+        'total_classes': totals['total_classes'],
+        'total_attendance': totals['total_attendance'],
         'recent_records': recent_records,
+        'data_version': data_version(course_ids),
     }
     return render(request, 'attendance/attendance_reports.html', context)
 
@@ -602,63 +709,65 @@ def attendance_analytics(request):
     if request.user.role == 'admin':
         courses = Course.objects.all()
     else:  # lecturer
-        try:
-            lecturer_profile = request.user.lecturer_profile
-            courses = Course.objects.filter(lecturer=lecturer_profile)
-        except User.lecturer_profile.RelatedObjectDoesNotExist:
+        if not request.profile:
             messages.warning(request, 'You do not have a lecturer profile. Please complete your profile first.')
             return redirect('accounts:complete_lecturer_profile')
+        courses = Course.objects.filter(lecturer=request.profile)
     
     # Get analytics data
-    course_analytics = []
-    for course in courses:
-        records = AttendanceRecord.objects.filter(course=course)
-        
-        total_classes = records.values('date').distinct().count()
-        total_students = Student.objects.filter(
-            attendance_records__course=course
-        ).distinct().count()
-        
-        present_records = records.filter(status='present')
-        total_present = present_records.count()
-        
-        if total_classes > 0 and total_students > 0:
-            avg_attendance = (total_present / (total_classes * total_students)) * 100
-        else:
-            avg_attendance = 0
-        
-        course_analytics.append({
-            'course': course,
-            'total_classes': total_classes,
-            'total_students': total_students,
-            'avg_attendance': round(avg_attendance, 2),
-            'total_present': total_present,
-        })
-    
-    # Get monthly trends
-    from datetime import datetime, timedelta
-    
+    course_ids = list(courses.values_list('id', flat=True))
     end_date = timezone.now().date()
     start_date = end_date - timedelta(days=30)
-    
-    daily_attendance = []
-    current_date = start_date
-    while current_date <= end_date:
-        daily_records = AttendanceRecord.objects.filter(
-            course__in=courses,
-            date=current_date
-        )
-        
-        daily_attendance.append({
-            'date': current_date,
-            'total_records': daily_records.count(),
-            'present_count': daily_records.filter(status='present').count(),
-        })
-        current_date += timedelta(days=1)
+
+    def build_analytics():
+        held = classes_held(course_ids)
+        enrolled = _roster_sizes(course_ids)
+        per_course = count_records('course', course__in=course_ids)
+        per_day = count_records('date', course__in=course_ids, date__gte=start_date, date__lte=end_date)
+
+        analytics = {}
+        for course_id in course_ids:
+            row = per_course.get(course_id, {})
+            total_classes = held.get(course_id, 0)
+            total_students = enrolled.get(course_id, 0)
+            total_present = row.get('attended', 0)
+            if total_classes > 0 and total_students > 0:
+                avg_attendance = (total_present / (total_classes * total_students)) * 100
+            else:
+                avg_attendance = 0
+            analytics[course_id] = {
+                'total_classes': total_classes,
+                'total_students': total_students,
+                'avg_attendance': round(avg_attendance, 2),
+                'total_present': total_present,
+            }
+
+        # Get monthly trends
+        daily_attendance = []
+        current_date = start_date
+        while current_date <= end_date:
+            row = per_day.get(current_date, {})
+            daily_attendance.append({
+                'date': current_date,
+                'total_records': row.get('total', 0),
+                'present_count': row.get('attended', 0),
+            })
+            current_date += timedelta(days=1)
+
+        return {'course_analytics': analytics, 'daily_attendance': daily_attendance}
+
+    data = cached_report(f'attendance_analytics:{end_date}', request.user.role, course_ids, build_analytics)
+    course_analytics = [
+        dict(data['course_analytics'][course.pk], course=course)
+        for course in courses
+    ]
+    daily_attendance = data['daily_attendance']
     
     context = {
         'courses': courses,
         'course_analytics': course_analytics,
         'daily_attendance': daily_attendance,
+        'data_version': data_version(course_ids),
+        'report_date': end_date,
     }
     return render(request, 'attendance/attendance_analytics.html', context)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Semester, Course, ClassSchedule
+from .models import Semester, Course, ClassSchedule, Enrollment
 
 @admin.register(Semester)
 class SemesterAdmin(admin.ModelAdmin):
@@ -21,3 +21,12 @@ class ClassScheduleAdmin(admin.ModelAdmin):
     search_fields = ['course__code', 'course__name', 'room']
     list_filter = ['day', 'course__semester']
     ordering = ['course', 'day', 'start_time']
+
+@admin.register(Enrollment)
+class EnrollmentAdmin(admin.ModelAdmin):
+    list_display = ['student', 'course', 'enrolled_at']
+    search_fields = ['student__student_id', 'student__user__first_name', 'student__user__last_name', 'course__code']
+    list_filter = ['course__semester']
+    raw_id_fields = ['student', 'course']
+    list_select_related = ['student__user', 'course']
+    ordering = ['course', 'student']
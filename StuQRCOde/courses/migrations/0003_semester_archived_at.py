@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_enrollment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semester',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_enrollments(apps, schema_editor):
+    """Enroll every student in the courses they have attendance records for, archived ones included"""
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    for model in ('AttendanceRecord', 'ArchivedAttendanceRecord'):
+        records = apps.get_model('attendance', model).objects
+        pairs = records.values_list('student', 'course').order_by('student', 'course').distinct()
+        batch = []
+        for student_id, course_id in pairs.iterator(chunk_size=BATCH_SIZE):
+            batch.append(Enrollment(student_id=student_id, course_id=course_id))
+            if len(batch) >= BATCH_SIZE:
+                Enrollment.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            Enrollment.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_semester_archived_at'),
+        ('attendance', '0007_archived_attendance_record'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_enrollments, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
-from accounts.models import Lecturer
+from accounts.models import Lecturer, Student
 
 class Semester(models.Model):
     """Semester model for organizing courses"""
@@ -17,6 +17,8 @@ class Semester(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     is_active = models.BooleanField(default=True)
+    # Set once the semester's attendance records have moved to the archive table
+    archived_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         unique_together = ['name', 'year']
@@ -26,6 +28,12 @@ class Semester(models.Model):
         return f"{self.name} {self.year}"
 
 
+class CourseQuerySet(models.QuerySet):
+    def for_student(self, student):
+        """Courses the student is enrolled in"""
+        return self.filter(enrollments__student=student)
+
+
 class Course(models.Model):
     """Course/Module model"""
     code = models.CharField(max_length=10, unique=True)
@@ -35,6 +43,8 @@ class Course(models.Model):
     lecturer = models.ForeignKey(Lecturer, on_delete=models.CASCADE, related_name='courses')
     semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='courses')
     created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CourseQuerySet.as_manager()
     
     class Meta:
         ordering = ['code']
@@ -42,6 +52,11 @@ class Course(models.Model):
     def __str__(self):
         return f"{self.code} - {self.name}"
 
+    @property
+    def roster(self):
+        """Students enrolled in this course"""
+        return Student.objects.filter(enrollments__course=self)
+
 
 class ClassSchedule(models.Model):
     """Class schedule for courses"""
@@ -66,3 +81,20 @@ class ClassSchedule(models.Model):
     
     def __str__(self):
         return f"{self.course.code} - {self.day} {self.start_time}-{self.end_time}"
+
+
+class Enrollment(models.Model):
+    """A student's enrollment in a course"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='enrollments')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
+    enrolled_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # (student, course) serves "my courses", the index below serves course rosters
+        unique_together = ['student', 'course']
+        indexes = [
+            models.Index(fields=['course', 'student']),
+        ]
+
+    def __str__(self):
+        return f"{self.student.student_id} - {self.course.code}"
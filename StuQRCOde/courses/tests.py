@@ -1,8 +1,13 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
 from datetime import date, time
-from .models import Semester, Course, ClassSchedule
-from accounts.models import Lecturer
+from io import StringIO
+import os
+import tempfile
+from .models import Semester, Course, ClassSchedule, Enrollment
+from accounts.models import Lecturer, Student
 
 User = get_user_model()
 
@@ -92,3 +97,64 @@ class ClassScheduleModelTest(TestCase):
         )
         self.assertEqual(schedule.day, 'Monday')
         self.assertEqual(str(schedule), 'CS101 - Monday 09:00:00-10:30:00')
+
+
+class EnrollmentTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email='lecturer@example.com',
+            username='lecturer',
+            password='password123',
+            role='lecturer'
+        )
+        lecturer = Lecturer.objects.create(
+            user=user,
+            employee_id='L001',
+            department='Computer Science',
+            qualification='PhD'
+        )
+        semester = Semester.objects.create(
+            name='Fall',
+            year=2023,
+            start_date=date(2023, 9, 1),
+            end_date=date(2023, 12, 31)
+        )
+        self.courses = [
+            Course.objects.create(code=code, name=code, description='Basic course', lecturer=lecturer, semester=semester)
+            for code in ['CS101', 'CS102']
+        ]
+        self.student_user = User.objects.create_user(
+            email='student@example.com',
+            username='student',
+            password='password123'
+        )
+        self.student = Student.objects.create(
+            user=self.student_user,
+            student_id='S001',
+            date_of_birth=date(2000, 1, 1)
+        )
+        Enrollment.objects.create(student=self.student, course=self.courses[0])
+
+    def test_student_pages_list_only_enrolled_courses(self):
+        self.client.force_login(self.student_user)
+        response = self.client.get(reverse('courses:my_courses'))
+        self.assertEqual(list(response.context['courses']), [self.courses[0]])
+        response = self.client.get(reverse('courses:course_list'))
+        self.assertEqual(list(response.context['courses']), [self.courses[0]])
+
+        response = self.client.get(reverse('courses:course_detail', args=[self.courses[1].pk]))
+        self.assertRedirects(response, reverse('courses:my_courses'), fetch_redirect_response=False)
+
+    def test_roster(self):
+        self.assertEqual(list(self.courses[0].roster), [self.student])
+        self.assertFalse(self.courses[1].roster.exists())
+
+    def test_import_enrollments(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('student_id,course_code\nS001,CS101\nS001,CS102\nS001,CS102\nS999,CS102\n')
+        self.addCleanup(os.remove, f.name)
+
+        out = StringIO()
+        call_command('import_enrollments', f.name, stdout=out)
+        self.assertIn('Enrolled 1 new (of 4 rows, 1 with unknown student or course)', out.getvalue())
+        self.assertEqual(list(Course.objects.for_student(self.student)), self.courses)
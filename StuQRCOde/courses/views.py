@@ -2,37 +2,26 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.core.mail import send_mail
-from django.conf import settings
 from .models import Course, ClassSchedule
 from .forms import CourseForm, ClassScheduleForm
-from accounts.models import User, Student
+from accounts.profiles import student_profile_required
+from notifications.digest import record_event
 
 @login_required
+@student_profile_required
 def course_list(request):
     """List all courses"""
     courses = Course.objects.all().select_related('lecturer', 'semester')
 
     # Filter by role
     if request.user.role == 'lecturer':
-        try:
-            lecturer_profile = request.user.lecturer_profile
-            courses = courses.filter(lecturer=lecturer_profile)
-        except User.lecturer_profile.RelatedObjectDoesNotExist:
+        if request.profile:
+            courses = courses.filter(lecturer=request.profile)
+        else:
             messages.warning(request, 'You do not have a lecturer profile. Please contact administrator.')
             courses = Course.objects.none()
     elif request.user.role == 'student':
-        # Check if student profile is complete
-        try:
-            student_profile = request.user.student_profile
-            if not student_profile.date_of_birth:  # Proxy for completion
-                messages.info(request, 'Please complete your student profile.')
-                return redirect('accounts:complete_student_profile')
-            # For now, show all courses - implement enrollment filtering later
-            pass
-        except Student.DoesNotExist:
-            messages.info(request, 'Please complete your student profile.')
-            return redirect('accounts:complete_student_profile')
+        courses = courses.for_student(request.profile)
 
     paginator = Paginator(courses, 10)
     page_number = request.GET.get('page')
@@ -45,25 +34,20 @@ def course_list(request):
 
 
 @login_required
+@student_profile_required
 def course_detail(request, pk):
     """Course detail view"""
     course = get_object_or_404(Course, pk=pk)
 
     # Check permissions
-    if request.user.role == 'student':
-        # Check if student profile is complete
-        try:
-            student_profile = request.user.student_profile
-            if not student_profile.date_of_birth:  # Proxy for completion
-                messages.info(request, 'Please complete your student profile.')
-                return redirect('accounts:complete_student_profile')
-        except Student.DoesNotExist:
-            messages.info(request, 'Please complete your student profile.')
-            return redirect('accounts:complete_student_profile')
-    elif request.user.role == 'lecturer' and course.lecturer != request.user.lecturer_profile:
+    if request.user.role == 'lecturer' and course.lecturer != request.profile:
         messages.error(request, 'Access denied.')
         return redirect('courses:course_list')
 
+    if request.user.role == 'student' and not course.enrollments.filter(student=request.profile).exists():
+        messages.error(request, 'You are not enrolled in this course.')
+        return redirect('courses:my_courses')
+
     schedules = course.schedules.all()
 
     context = {
@@ -84,24 +68,13 @@ def course_create(request):
         form = CourseForm(request.POST)
         if form.is_valid():
             course = form.save()
-            # Send email notifications to all students
-            try:
-                students = Student.objects.all()
-                subject = f'New Course Added: {course.code} - {course.name}'
-                message = f'Dear Student,\n\nA new course has been added to the system:\n\nCourse: {course.name}\nCode: {course.code}\nDescription: {course.description}\nCredits: {course.credit_hours}\nLecturer: {course.lecturer.user.get_full_name()}\nSemester: {course.semester}\n\nPlease check the course list for more details.\n\nBest regards,\nStuAttend Team'
-                for student in students:
-                    if student.user.email:
-                        send_mail(
-                            subject,
-                            message,
-                            settings.DEFAULT_FROM_EMAIL,
-                            [student.user.email],
-                            fail_silently=True,
-                        )
-            except Exception:
-                # Log error if needed, but don't fail the course creation
-                pass
-            messages.success(request, 'Course created successfully! Notifications sent to students.')
+            # Enrolled students hear about it in the next notification digest
+            record_event(
+                'course_created',
+                course,
+                f'New course: {course.credit_hours} credits, {course.semester}, taught by {course.lecturer.user.get_full_name()}',
+            )
+            messages.success(request, 'Course created successfully! Enrolled students will be notified in the next digest.')
             return redirect('courses:course_detail', pk=course.pk)
     else:
         form = CourseForm()
@@ -114,7 +87,7 @@ def course_edit(request, pk):
     """Edit course"""
     course = get_object_or_404(Course, pk=pk)
     
-    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and course.lecturer != request.user.lecturer_profile):
+    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and course.lecturer != request.profile):
         messages.error(request, 'Access denied.')
         return redirect('courses:course_list')
     
@@ -135,7 +108,7 @@ def course_delete(request, pk):
     """Delete course"""
     course = get_object_or_404(Course, pk=pk)
     
-    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and course.lecturer != request.user.lecturer_profile):
+    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and course.lecturer != request.profile):
         messages.error(request, 'Access denied.')
         return redirect('courses:course_list')
     
@@ -153,7 +126,7 @@ def schedule_add(request, course_id):
     """Add class schedule to course"""
     course = get_object_or_404(Course, pk=course_id)
     
-    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and course.lecturer != request.user.lecturer_profile):
+    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and course.lecturer != request.profile):
         messages.error(request, 'Access denied.')
         return redirect('courses:course_detail', pk=course_id)
     
@@ -163,24 +136,13 @@ def schedule_add(request, course_id):
             schedule = form.save(commit=False)
             schedule.course = course
             schedule.save()
-            # Send email notifications to all students
-            try:
-                students = Student.objects.all()
-                subject = f'New Schedule Added for {course.code} - {course.name}'
-                message = f'Dear Student,\n\nA new class schedule has been added for the course:\n\nCourse: {course.name}\nCode: {course.code}\n\nSchedule Details:\nDay: {schedule.day}\nTime: {schedule.start_time} - {schedule.end_time}\nRoom: {schedule.room}\n\nPlease make note of this schedule.\n\nBest regards,\nStuAttend Team'
-                for student in students:
-                    if student.user.email:
-                        send_mail(
-                            subject,
-                            message,
-                            settings.DEFAULT_FROM_EMAIL,
-                            [student.user.email],
-                            fail_silently=True,
-                        )
-            except Exception:
-                # Log error if needed, but don't fail the schedule addition
-                pass
-            messages.success(request, 'Schedule added successfully! Notifications sent to students.')
+            # Enrolled students hear about it in the next notification digest
+            record_event(
+                'schedule_added',
+                course,
+                f'New class: {schedule.day} {schedule.start_time:%H:%M}-{schedule.end_time:%H:%M} in room {schedule.room}',
+            )
+            messages.success(request, 'Schedule added successfully! Enrolled students will be notified in the next digest.')
             return redirect('courses:course_detail', pk=course_id)
     else:
         form = ClassScheduleForm()
@@ -194,7 +156,7 @@ def schedule_edit(request, pk):
     schedule = get_object_or_404(ClassSchedule, pk=pk)
     course = schedule.course
     
-    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and course.lecturer != request.user.lecturer_profile):
+    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and course.lecturer != request.profile):
         messages.error(request, 'Access denied.')
         return redirect('courses:course_detail', pk=course.pk)
     
@@ -216,7 +178,7 @@ def schedule_delete(request, pk):
     schedule = get_object_or_404(ClassSchedule, pk=pk)
     course = schedule.course
     
-    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and course.lecturer != request.user.lecturer_profile):
+    if request.user.role not in ['admin', 'lecturer'] or (request.user.role == 'lecturer' and course.lecturer != request.profile):
         messages.error(request, 'Access denied.')
         return redirect('courses:course_detail', pk=course.pk)
     
@@ -237,12 +199,10 @@ def course_assignments(request):
     
     # Get courses based on user role
     if request.user.role == 'lecturer':
-        try:
-            lecturer_profile = request.user.lecturer_profile
-            courses = Course.objects.filter(lecturer=lecturer_profile)
-        except User.lecturer_profile.RelatedObjectDoesNotExist:
+        if not request.profile:
             messages.warning(request, 'You do not have a lecturer profile. Please complete your profile first.')
             return redirect('accounts:complete_lecturer_profile')
+        courses = Course.objects.filter(lecturer=request.profile)
     else:
         courses = Course.objects.all()
     
@@ -253,23 +213,14 @@ def course_assignments(request):
 
 
 @login_required
+@student_profile_required
 def my_courses(request):
     """Display courses for the logged-in student"""
     if request.user.role != 'student':
         messages.error(request, 'Access denied. This page is for students only.')
         return redirect('dashboard:home')
     
-    # Check if student profile is complete
-    try:
-        student_profile = request.user.student_profile
-        if not student_profile.date_of_birth:  # Proxy for completion
-            messages.info(request, 'Please complete your student profile.')
-            return redirect('accounts:complete_student_profile')
-        # For now, show all courses - implement enrollment filtering later
-        courses = Course.objects.all().select_related('lecturer', 'semester')
-    except Student.DoesNotExist:
-        messages.info(request, 'Please complete your student profile.')
-        return redirect('accounts:complete_student_profile')
+    courses = Course.objects.for_student(request.profile).select_related('lecturer__user', 'semester')
     
     context = {
         'courses': courses,
@@ -1,3 +1,15 @@
 from django.contrib import admin
+from .models import AttendanceSummary, HourlyScanVolume
 
-# Register your models here.
+@admin.register(AttendanceSummary)
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ['semester', 'scope', 'name', 'students', 'attendance_rate', 'at_risk_students', 'refreshed_at']
+    list_filter = ['scope', 'semester']
+    search_fields = ['name']
+    ordering = ['semester', 'scope', 'name']
+
+@admin.register(HourlyScanVolume)
+class HourlyScanVolumeAdmin(admin.ModelAdmin):
+    list_display = ['semester', 'hour', 'scans', 'refreshed_at']
+    list_filter = ['semester']
+    ordering = ['semester', 'hour']
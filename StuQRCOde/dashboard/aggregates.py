@@ -0,0 +1,95 @@
+"""
+Refresh of the campus overview aggregate tables.
+
+AttendanceSummary and HourlyScanVolume are rebuilt per semester from a handful
+of grouped queries over AttendanceStatistics and AttendanceRecord, so the admin
+overview page only ever reads a few dozen precomputed rows. Run the
+refresh_campus_overview command periodically (e.g. every 15 minutes from cron).
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractHour
+from django.utils import timezone
+
+from attendance.models import AttendanceRecord, AttendanceStatistics
+from courses.models import Course, Semester
+from .models import AttendanceSummary, HourlyScanVolume
+
+SCOPE_FIELDS = {
+    'department': 'course__lecturer__department',
+    'program': 'student__program',
+}
+
+
+def _rate(attended, total):
+    return round(attended / total * 100, 2) if total else 0
+
+
+def _summary_rows(semester, threshold):
+    """Yield (scope, name, figures) for the semester and each department and program"""
+    stats = AttendanceStatistics.objects.filter(course__semester=semester)
+    figures = {
+        'courses': Count('course', distinct=True),
+        'students': Count('student', distinct=True),
+        'total_classes': Sum('total_classes'),
+        'attended_classes': Sum('attended_classes'),
+        'at_risk_students': Count('student', distinct=True, filter=Q(percentage__lt=threshold)),
+    }
+
+    overall = stats.aggregate(**figures)
+    # Courses without any statistics yet still belong to the semester
+    overall['courses'] = Course.objects.filter(semester=semester).count()
+    yield 'semester', str(semester), overall
+
+    for scope, field in SCOPE_FIELDS.items():
+        for row in stats.values(field).annotate(**figures).order_by():
+            yield scope, row[field] or 'Unspecified', row
+
+
+def refresh_semester(semester, threshold=None):
+    """Rebuild the overview rows of one semester; returns the number of summary rows written"""
+    if threshold is None:
+        threshold = getattr(settings, 'ATTENDANCE_AT_RISK_THRESHOLD', 75)
+    now = timezone.now()
+
+    summaries = []
+    for scope, name, row in _summary_rows(semester, threshold):
+        total_classes = row['total_classes'] or 0
+        attended_classes = row['attended_classes'] or 0
+        summaries.append(AttendanceSummary(
+            semester=semester,
+            scope=scope,
+            name=name,
+            courses=row['courses'] or 0,
+            students=row['students'] or 0,
+            total_classes=total_classes,
+            attended_classes=attended_classes,
+            attendance_rate=_rate(attended_classes, total_classes),
+            at_risk_students=row['at_risk_students'] or 0,
+            refreshed_at=now,
+        ))
+
+    hourly = AttendanceRecord.objects.filter(
+        course__semester=semester,
+        marked_by='qr_scan'
+    ).annotate(hour=ExtractHour('time_in')).values('hour').annotate(scans=Count('id')).order_by()
+    volumes = [
+        HourlyScanVolume(semester=semester, hour=row['hour'], scans=row['scans'], refreshed_at=now)
+        for row in hourly
+    ]
+
+    # Readers see either the old or the new set of rows, never a partial one
+    with transaction.atomic():
+        AttendanceSummary.objects.filter(semester=semester).delete()
+        HourlyScanVolume.objects.filter(semester=semester).delete()
+        AttendanceSummary.objects.bulk_create(summaries)
+        HourlyScanVolume.objects.bulk_create(volumes)
+    return len(summaries)
+
+
+def refresh_campus_overview(semesters=None, threshold=None):
+    """Refresh the given semesters (default: active ones); returns {semester: rows written}"""
+    if semesters is None:
+        semesters = Semester.objects.filter(is_active=True)
+    return {semester: refresh_semester(semester, threshold) for semester in semesters}
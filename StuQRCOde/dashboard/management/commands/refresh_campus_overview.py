@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.models import Semester
+from dashboard.aggregates import refresh_campus_overview
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed aggregate tables behind the campus overview page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester', type=int, action='append', dest='semesters', help='Semester id (repeatable)')
+        parser.add_argument('--all', action='store_true', help='Refresh every semester, not only active ones')
+
+    def handle(self, *args, **options):
+        if options['semesters']:
+            semesters = Semester.objects.filter(pk__in=options['semesters'])
+        elif options['all']:
+            semesters = Semester.objects.all()
+        else:
+            semesters = None
+
+        started = time.monotonic()
+        results = refresh_campus_overview(semesters)
+        for semester, rows in results.items():
+            self.stdout.write(f'{semester}: {rows} summary rows')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {len(results)} semesters in {elapsed:.2f}s'))
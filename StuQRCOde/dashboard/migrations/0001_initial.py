@@ -0,0 +1,51 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('semester', 'Semester'), ('department', 'Department'), ('program', 'Program')], max_length=20)),
+                ('name', models.CharField(max_length=100)),
+                ('courses', models.IntegerField(default=0)),
+                ('students', models.IntegerField(default=0)),
+                ('total_classes', models.IntegerField(default=0)),
+                ('attended_classes', models.IntegerField(default=0)),
+                ('attendance_rate', models.DecimalField(decimal_places=2, default=0.0, max_digits=5)),
+                ('at_risk_students', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField()),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='courses.semester')),
+            ],
+            options={
+                'verbose_name_plural': 'attendance summaries',
+                'ordering': ['scope', 'name'],
+                'unique_together': {('semester', 'scope', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyScanVolume',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('scans', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField()),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_scan_volumes', to='courses.semester')),
+            ],
+            options={
+                'ordering': ['hour'],
+                'unique_together': {('semester', 'hour')},
+            },
+        ),
+    ]
@@ -1,3 +1,45 @@
 from django.db import models
+from courses.models import Semester
 
-# Create your models here.
+
+class AttendanceSummary(models.Model):
+    """Precomputed attendance figures for a semester, department or program"""
+    SCOPE_CHOICES = [
+        ('semester', 'Semester'),
+        ('department', 'Department'),
+        ('program', 'Program'),
+    ]
+
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='attendance_summaries')
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES)
+    name = models.CharField(max_length=100)
+    courses = models.IntegerField(default=0)
+    students = models.IntegerField(default=0)
+    total_classes = models.IntegerField(default=0)
+    attended_classes = models.IntegerField(default=0)
+    attendance_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+    at_risk_students = models.IntegerField(default=0)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['semester', 'scope', 'name']
+        ordering = ['scope', 'name']
+        verbose_name_plural = 'attendance summaries'
+
+    def __str__(self):
+        return f"{self.semester} - {self.get_scope_display()} {self.name} - {self.attendance_rate}%"
+
+
+class HourlyScanVolume(models.Model):
+    """Number of QR scans per hour of day in a semester"""
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='hourly_scan_volumes')
+    hour = models.PositiveSmallIntegerField()
+    scans = models.IntegerField(default=0)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['semester', 'hour']
+        ordering = ['hour']
+
+    def __str__(self):
+        return f"{self.semester} - {self.hour:02d}:00 - {self.scans} scans"
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from attendance.models import QRCode, AttendanceRecord
+from courses.models import Course, ClassSchedule
+from .snapshot import invalidate_lecturer_snapshot
+
+
+@receiver([post_save, post_delete], sender=AttendanceRecord)
+@receiver([post_save, post_delete], sender=QRCode)
+@receiver([post_save, post_delete], sender=ClassSchedule)
+def invalidate_course_lecturer_snapshot(sender, instance, **kwargs):
+    """A scan, QR code or schedule change refreshes the dashboard of the course's lecturer"""
+    if sender._meta.get_field('course').is_cached(instance):
+        lecturer_id = instance.course.lecturer_id
+    else:
+        # Scans save records without loading their course; only its lecturer is needed
+        lecturer_id = Course.objects.filter(pk=instance.course_id).values_list('lecturer_id', flat=True).first()
+    if lecturer_id is None:
+        # The course is being deleted; the Course handler below covers it
+        return
+    invalidate_lecturer_snapshot(lecturer_id)
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_lecturer_course_snapshot(sender, instance, **kwargs):
+    invalidate_lecturer_snapshot(instance.lecturer_id)
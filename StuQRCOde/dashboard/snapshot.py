@@ -0,0 +1,98 @@
+"""
+Per-lecturer dashboard snapshot.
+
+The four headline counts are computed as correlated subqueries of a single
+SELECT, and the snapshot (counts, recent scans and today's sessions) is cached
+per lecturer for DASHBOARD_SNAPSHOT_TTL seconds. dashboard/signals.py drops the
+snapshot as soon as one of the lecturer's courses receives a scan.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts.models import Lecturer
+from attendance.models import QRCode, AttendanceRecord
+from attendance.statistics import ATTENDED_STATUSES
+from courses.models import Course, ClassSchedule
+
+SNAPSHOT_KEY = 'dashboard:lecturer:{}'
+
+
+def _count_for_lecturer(queryset, lecturer_path, count):
+    """Correlated COUNT subquery over `queryset` for the outer lecturer row"""
+    subquery = queryset.filter(**{lecturer_path: OuterRef('pk')}).order_by().values(lecturer_path).annotate(
+        total=count
+    ).values('total')
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+
+def build_lecturer_snapshot(lecturer_id):
+    """Compute the dashboard figures for one lecturer in three queries"""
+    now = timezone.now()
+    today = now.date()
+
+    counts = Lecturer.objects.filter(pk=lecturer_id).annotate(
+        qr_codes_count=_count_for_lecturer(QRCode.objects.all(), 'course__lecturer', Count('pk')),
+        # Absences recorded when sessions close are not attendance
+        students_count=_count_for_lecturer(
+            AttendanceRecord.objects.filter(status__in=ATTENDED_STATUSES), 'course__lecturer', Count('student', distinct=True)
+        ),
+        courses_count=_count_for_lecturer(Course.objects.all(), 'lecturer', Count('pk')),
+        attendance_today=_count_for_lecturer(
+            AttendanceRecord.objects.filter(date=today, status__in=ATTENDED_STATUSES), 'course__lecturer', Count('pk')
+        ),
+    ).values('qr_codes_count', 'students_count', 'courses_count', 'attendance_today').get()
+
+    recent_attendance = list(AttendanceRecord.objects.filter(
+        course__lecturer_id=lecturer_id,
+        status__in=ATTENDED_STATUSES,
+    ).order_by('-date', '-time_in').values(
+        'student__user__first_name',
+        'student__user__last_name',
+        'course__name',
+        'time_in',
+    )[:5])
+
+    todays_sessions = list(ClassSchedule.objects.filter(
+        course__lecturer_id=lecturer_id,
+        day=now.strftime('%A')
+    ).order_by('start_time').values('course__name', 'start_time', 'end_time', 'room'))
+
+    return dict(
+        counts,
+        recent_attendance=[
+            {
+                'student_name': f"{row['student__user__first_name']} {row['student__user__last_name']}".strip(),
+                'course_name': row['course__name'],
+                'time_in': row['time_in'],
+            }
+            for row in recent_attendance
+        ],
+        todays_sessions=[
+            {
+                'course_name': row['course__name'],
+                'start_time': row['start_time'],
+                'end_time': row['end_time'],
+                'room': row['room'],
+            }
+            for row in todays_sessions
+        ],
+        generated_at=now,
+    )
+
+
+def get_lecturer_snapshot(lecturer_id):
+    """Return the cached snapshot for a lecturer, rebuilding it when missing or expired"""
+    key = SNAPSHOT_KEY.format(lecturer_id)
+    snapshot = cache.get(key)
+    # A snapshot from a previous day would report yesterday's attendance as today's
+    if snapshot is None or snapshot['generated_at'].date() != timezone.now().date():
+        snapshot = build_lecturer_snapshot(lecturer_id)
+        cache.set(key, snapshot, getattr(settings, 'DASHBOARD_SNAPSHOT_TTL', 60))
+    return snapshot
+
+
+def invalidate_lecturer_snapshot(lecturer_id):
+    cache.delete(SNAPSHOT_KEY.format(lecturer_id))
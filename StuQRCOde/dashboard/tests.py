@@ -1,3 +1,243 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from datetime import date, datetime, timedelta
+from accounts.models import Student, Lecturer
+from attendance.models import QRCode, AttendanceRecord, AttendanceStatistics
+from courses.models import Course, Semester, ClassSchedule
+from .aggregates import refresh_semester
+from .models import AttendanceSummary, HourlyScanVolume
+from .snapshot import build_lecturer_snapshot, get_lecturer_snapshot
 
-# Create your tests here.
+User = get_user_model()
+
+
+class LecturerSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lecturer_user = User.objects.create_user(
+            email='lecturer@example.com',
+            username='lecturer',
+            first_name='Lecturer',
+            last_name='User',
+            password='password123',
+            role='lecturer'
+        )
+        self.lecturer = Lecturer.objects.create(
+            user=self.lecturer_user,
+            employee_id='L001',
+            department='Computer Science',
+            qualification='PhD'
+        )
+        self.students = []
+        for i in range(2):
+            user = User.objects.create_user(
+                email=f'student{i}@example.com',
+                username=f'student{i}',
+                first_name='Student',
+                last_name=str(i),
+                password='password123'
+            )
+            self.students.append(Student.objects.create(user=user, student_id=f'S{i}', program='Computer Science'))
+        semester = Semester.objects.create(
+            name='Fall',
+            year=2023,
+            start_date=date(2023, 9, 1),
+            end_date=date(2023, 12, 31)
+        )
+        self.course = Course.objects.create(
+            code='CS101',
+            name='Introduction to Computer Science',
+            description='Basic course',
+            lecturer=self.lecturer,
+            semester=semester
+        )
+        ClassSchedule.objects.create(
+            course=self.course,
+            day=timezone.now().strftime('%A'),
+            start_time='09:00',
+            end_time='10:30',
+            room='Room 101'
+        )
+        self.qr_code = QRCode.objects.create(
+            course=self.course,
+            valid_from=timezone.now(),
+            valid_until=timezone.now() + timedelta(days=1),
+            created_by=self.lecturer
+        )
+
+    def scan(self, student, day):
+        return AttendanceRecord.objects.create(
+            student=student,
+            course=self.course,
+            qr_code=self.qr_code,
+            date=day,
+            time_in=timezone.now(),
+            marked_by='qr_scan'
+        )
+
+    def test_snapshot_counts(self):
+        self.scan(self.students[0], timezone.now().date())
+        self.scan(self.students[0], timezone.now().date() - timedelta(days=1))
+        self.scan(self.students[1], timezone.now().date() - timedelta(days=1))
+
+        with self.assertNumQueries(3):
+            snapshot = build_lecturer_snapshot(self.lecturer.pk)
+        self.assertEqual(snapshot['qr_codes_count'], 1)
+        self.assertEqual(snapshot['students_count'], 2)
+        self.assertEqual(snapshot['courses_count'], 1)
+        self.assertEqual(snapshot['attendance_today'], 1)
+        self.assertEqual(len(snapshot['recent_attendance']), 3)
+        self.assertEqual(snapshot['recent_attendance'][0]['student_name'], 'Student 0')
+
+    def test_snapshot_ignores_absences(self):
+        self.scan(self.students[0], timezone.now().date())
+        AttendanceRecord.objects.create(
+            student=self.students[1], course=self.course, date=timezone.now().date(),
+            time_in=timezone.now(), status='absent', marked_by='system',
+        )
+        snapshot = build_lecturer_snapshot(self.lecturer.pk)
+        self.assertEqual((snapshot['students_count'], snapshot['attendance_today']), (1, 1))
+        self.assertEqual(len(snapshot['recent_attendance']), 1)
+        self.assertEqual(snapshot['todays_sessions'][0]['room'], 'Room 101')
+        self.assertIsNotNone(snapshot['generated_at'])
+
+    def test_snapshot_is_cached_until_a_scan_arrives(self):
+        first = get_lecturer_snapshot(self.lecturer.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_lecturer_snapshot(self.lecturer.pk), first)
+        # Nothing but cache reads, which are queries only with the database cache
+        cache_table = settings.CACHES['default'].get('LOCATION', '')
+        self.assertTrue(all(f'"{cache_table}"' in q['sql'] for q in queries))
+
+        self.scan(self.students[0], timezone.now().date())
+        self.assertEqual(get_lecturer_snapshot(self.lecturer.pk)['attendance_today'], 1)
+
+    def test_saving_a_record_reads_only_the_course_lecturer(self):
+        record = AttendanceRecord.objects.get(pk=self.scan(self.students[0], timezone.now().date()).pk)
+        cache_table = settings.CACHES['default'].get('LOCATION', '')
+        with CaptureQueriesContext(connection) as queries:
+            record.save()
+        lookups = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and f'"{cache_table}"' not in q['sql']]
+        self.assertEqual(len(lookups), 1)
+        self.assertIn('"lecturer_id"', lookups[0])
+        self.assertNotIn('"description"', lookups[0])
+
+        # A course already loaded on the record is used as it is
+        record.course
+        with CaptureQueriesContext(connection) as queries:
+            record.save()
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT') and f'"{cache_table}"' not in q['sql']])
+
+    def test_dashboard_view(self):
+        self.client.force_login(self.lecturer_user)
+        response = self.client.get(reverse('dashboard:lecturer_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['courses_count'], 1)
+        self.assertContains(response, 'Updated')
+
+
+class CampusOverviewTest(TestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_user(
+            email='admin@example.com',
+            username='admin',
+            first_name='Admin',
+            last_name='User',
+            password='password123',
+            role='admin'
+        )
+        lecturer_user = User.objects.create_user(
+            email='lecturer@example.com',
+            username='lecturer',
+            password='password123',
+            role='lecturer'
+        )
+        lecturer = Lecturer.objects.create(
+            user=lecturer_user,
+            employee_id='L001',
+            department='Computer Science',
+            qualification='PhD'
+        )
+        self.semester = Semester.objects.create(
+            name='Fall',
+            year=2023,
+            start_date=date(2023, 9, 1),
+            end_date=date(2023, 12, 31)
+        )
+        course = Course.objects.create(
+            code='CS101',
+            name='Introduction to Computer Science',
+            description='Basic course',
+            lecturer=lecturer,
+            semester=self.semester
+        )
+        qr_code = QRCode.objects.create(
+            course=course,
+            valid_from=timezone.now(),
+            valid_until=timezone.now() + timedelta(days=1),
+            created_by=lecturer
+        )
+        for i, (program, attended) in enumerate([('Physics', 9), ('Physics', 5), ('Maths', 10)]):
+            user = User.objects.create_user(email=f's{i}@example.com', username=f's{i}', password='password123')
+            student = Student.objects.create(user=user, student_id=f'S{i}', program=program)
+            AttendanceStatistics.objects.create(
+                student=student,
+                course=course,
+                total_classes=10,
+                attended_classes=attended,
+                percentage=attended * 10
+            )
+            AttendanceRecord.objects.create(
+                student=student,
+                course=course,
+                qr_code=qr_code,
+                date=date(2023, 9, 4),
+                time_in=timezone.make_aware(datetime(2023, 9, 4, 9, i)),
+                marked_by='qr_scan'
+            )
+
+    def test_refresh_builds_summary_rows(self):
+        self.assertEqual(refresh_semester(self.semester), 4)
+
+        overall = AttendanceSummary.objects.get(semester=self.semester, scope='semester')
+        self.assertEqual((overall.students, overall.courses, overall.at_risk_students), (3, 1, 1))
+        self.assertEqual(float(overall.attendance_rate), 80.0)
+        physics = AttendanceSummary.objects.get(semester=self.semester, scope='program', name='Physics')
+        self.assertEqual((physics.students, float(physics.attendance_rate), physics.at_risk_students), (2, 70.0, 1))
+        department = AttendanceSummary.objects.get(semester=self.semester, scope='department')
+        self.assertEqual(department.name, 'Computer Science')
+        self.assertEqual(list(HourlyScanVolume.objects.values_list('hour', 'scans')), [(9, 3)])
+
+        # Refreshing again replaces rather than duplicates
+        refresh_semester(self.semester)
+        self.assertEqual(AttendanceSummary.objects.filter(semester=self.semester).count(), 4)
+
+    def test_overview_reads_only_aggregate_tables(self):
+        refresh_semester(self.semester)
+        self.client.force_login(self.admin_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard:admin_overview'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['overall'].students, 3)
+        tables = ' '.join(q['sql'] for q in queries)
+        self.assertNotIn('FROM "attendance_', tables)
+        self.assertNotIn('JOIN "attendance_', tables)
+
+    def test_overview_ignores_malformed_semester(self):
+        refresh_semester(self.semester)
+        self.client.force_login(self.admin_user)
+        response = self.client.get(reverse('dashboard:admin_overview'), {'semester': 'abc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['semester'], self.semester)
+
+    def test_overview_denied_for_non_admins(self):
+        user = User.objects.get(email='lecturer@example.com')
+        self.client.force_login(user)
+        response = self.client.get(reverse('dashboard:admin_overview'))
+        self.assertRedirects(response, reverse('dashboard:home'), fetch_redirect_response=False)
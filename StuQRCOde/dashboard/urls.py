@@ -7,4 +7,5 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('lecturer/', views.lecturer_dashboard, name='lecturer_dashboard'),
     path('student/', views.student_dashboard, name='student_dashboard'),
+    path('overview/', views.admin_overview, name='admin_overview'),
 ]
@@ -2,9 +2,10 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from accounts.models import Student, Lecturer
-from attendance.models import QRCode, AttendanceRecord
-from courses.models import Course, ClassSchedule
+from accounts.profiles import student_profile_required
+from courses.models import Semester
+from .models import AttendanceSummary, HourlyScanVolume
+from .snapshot import get_lecturer_snapshot
 
 def home(request):
     """Home dashboard view"""
@@ -17,62 +18,54 @@ def lecturer_dashboard(request):
         messages.error(request, 'Access denied. You do not have permission to access this page.')
         return redirect('dashboard:home')
 
-    try:
-        lecturer = request.user.lecturer_profile
-    except Lecturer.DoesNotExist:
+    lecturer = request.profile
+    if not lecturer:
         messages.error(request, 'Lecturer profile not found.')
         return redirect('accounts:complete_lecturer_profile')
 
-    # Get courses taught by this lecturer
-    courses = Course.objects.filter(lecturer=lecturer)
-
-    # Calculate statistics
-    qr_codes_count = QRCode.objects.filter(course__lecturer=lecturer).count()
-    students_count = Student.objects.filter(attendance_records__course__lecturer=lecturer).distinct().count()
-    courses_count = courses.count()
-    attendance_today = AttendanceRecord.objects.filter(
-        course__lecturer=lecturer,
-        date=timezone.now().date()
-    ).count()
-
-    # Recent attendance
-    recent_attendance = AttendanceRecord.objects.filter(
-        course__lecturer=lecturer
-    ).select_related('student', 'course').order_by('-date', '-time_in')[:5]
-
-    # Today's sessions
-    today_day = timezone.now().strftime('%A')
-    todays_sessions = ClassSchedule.objects.filter(
-        course__lecturer=lecturer,
-        day=today_day
-    ).select_related('course').order_by('start_time')
-
-    context = {
-        'qr_codes_count': qr_codes_count,
-        'students_count': students_count,
-        'courses_count': courses_count,
-        'attendance_today': attendance_today,
-        'recent_attendance': recent_attendance,
-        'todays_sessions': todays_sessions,
-    }
+    # Counts, recent attendance and today's sessions come from a short-lived snapshot
+    context = get_lecturer_snapshot(lecturer.pk)
 
     return render(request, 'dashboard/lecturer_dashboard.html', context)
 
 @login_required
+@student_profile_required
 def student_dashboard(request):
     """Student dashboard view"""
     if request.user.role != 'student':
         messages.error(request, 'Access denied. You do not have permission to access this page.')
         return redirect('dashboard:home')
     
-    # Check if student profile is complete
-    try:
-        student = request.user.student_profile
-        if not student.date_of_birth:  # Proxy for completion
-            messages.info(request, 'Please complete your student profile.')
-            return redirect('accounts:complete_student_profile')
-    except Student.DoesNotExist:
-        messages.info(request, 'Please complete your student profile.')
-        return redirect('accounts:complete_student_profile')
-    
     return render(request, 'dashboard/student_dashboard.html')
+
+
+@login_required
+def admin_overview(request):
+    """Campus-wide attendance overview served from precomputed aggregate tables"""
+    if request.user.role != 'admin' and not request.user.is_staff:
+        messages.error(request, 'Access denied. You do not have permission to access this page.')
+        return redirect('dashboard:home')
+
+    semesters = Semester.objects.filter(attendance_summaries__scope='semester').distinct()
+    semester = None
+    semester_id = request.GET.get('semester', '')
+    if semester_id.isdigit():
+        semester = semesters.filter(pk=semester_id).first()
+    if semester is None:
+        semester = semesters.filter(is_active=True).first() or semesters.first()
+
+    summaries = AttendanceSummary.objects.filter(semester=semester) if semester else AttendanceSummary.objects.none()
+    summaries = list(summaries)
+    hourly_volumes = list(HourlyScanVolume.objects.filter(semester=semester)) if semester else []
+    peak_scans = max((volume.scans for volume in hourly_volumes), default=0)
+
+    context = {
+        'semesters': semesters,
+        'semester': semester,
+        'overall': next((s for s in summaries if s.scope == 'semester'), None),
+        'department_summaries': [s for s in summaries if s.scope == 'department'],
+        'program_summaries': [s for s in summaries if s.scope == 'program'],
+        'hourly_volumes': hourly_volumes,
+        'peak_scans': peak_scans,
+    }
+    return render(request, 'dashboard/admin_overview.html', context)
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import NotificationEvent, OutboxMessage
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['recipient', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    ordering = ['-created_at']
+
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'course', 'message', 'created_at', 'digested_at']
+    list_filter = ['kind']
+    search_fields = ['course__code', 'message']
+    ordering = ['-created_at']
@@ -0,0 +1,80 @@
+"""
+Notification digests.
+
+Course and schedule changes are recorded as NotificationEvent rows instead of
+being mailed out one by one. send_notification_digest then collects the events
+since the previous run and queues one email per enrolled student, covering
+every change to the courses they take. Recipients come from a single roster
+query, read in email order and grouped as they stream in. Each body is
+rendered from a template compiled once and written to the outbox in chunked
+bulk inserts, so memory stays flat however many students there are.
+
+An event whose course has nobody enrolled yet, such as course_created, stays
+pending and goes out with the first digest after students enroll. Events
+older than NOTIFICATION_EVENT_MAX_AGE_DAYS are dropped instead.
+"""
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.template.loader import get_template
+from django.utils import timezone
+
+from courses.models import Enrollment
+from .models import NotificationEvent
+from .outbox import ENQUEUE_CHUNK_SIZE, enqueue_messages
+
+SUBJECT = 'StuAttend: updates to your courses'
+
+
+def record_event(kind, course, message):
+    return NotificationEvent.objects.create(kind=kind, course=course, message=message[:255])
+
+
+def pending_events(now=None):
+    now = now or timezone.now()
+    return NotificationEvent.objects.filter(digested_at__isnull=True, created_at__lte=now)
+
+
+def send_digest(now=None):
+    """
+    Queue the digest of every pending event.
+
+    Returns {'events', 'courses', 'recipients', 'held'}, 'held' being the events
+    left pending because their course has no recipients yet.
+    """
+    now = now or timezone.now()
+    events = list(pending_events(now).select_related('course').order_by('created_at'))
+    if not events:
+        return {'events': 0, 'courses': 0, 'recipients': 0, 'held': 0}
+
+    by_course = {}
+    for event in events:
+        by_course.setdefault(event.course_id, (event.course, []))[1].append(event)
+    template = get_template('notifications/digest_email.txt')
+    roster = Enrollment.objects.filter(course__in=by_course).exclude(student__user__email='').values_list(
+        'student__user__email', 'student__user__first_name', 'course_id'
+    ).order_by('student__user__email', 'course__code')
+
+    reached = set()
+
+    def messages():
+        for email, rows in groupby(roster.iterator(chunk_size=ENQUEUE_CHUNK_SIZE), key=itemgetter(0)):
+            rows = list(rows)
+            reached.update(course_id for _, _, course_id in rows)
+            body = template.render({
+                'first_name': rows[0][1],
+                'courses': [by_course[course_id] for _, _, course_id in rows],
+            })
+            yield email, SUBJECT, body
+
+    with transaction.atomic():
+        recipients = enqueue_messages(messages())
+        expired = now - timedelta(days=getattr(settings, 'NOTIFICATION_EVENT_MAX_AGE_DAYS', 14))
+        digested = NotificationEvent.objects.filter(pk__in=[event.pk for event in events]).filter(
+            Q(course__in=reached) | Q(created_at__lte=expired)
+        ).update(digested_at=now)
+    return {'events': len(events), 'courses': len(by_course), 'recipients': recipients, 'held': len(events) - digested}
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from notifications.digest import send_digest
+
+
+class Command(BaseCommand):
+    help = 'Queue one digest email per student covering the course changes since the last run (schedule e.g. daily)'
+
+    def handle(self, *args, **options):
+        result = send_digest()
+        if not result['events']:
+            self.stdout.write('No new events')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Queued {result['recipients']} digests for {result['events']} events across {result['courses']} courses"
+            f" ({result['held']} events wait for enrollments)"
+        ))
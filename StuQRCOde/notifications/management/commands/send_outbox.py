@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import send_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbox emails over one SMTP connection, with batching, retries and a rate limit'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Messages claimed per batch (default OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--rate', type=float, help='Maximum messages per second, 0 for no limit (default OUTBOX_RATE_LIMIT)')
+        parser.add_argument('--max-attempts', type=int, help='Attempts before a message is marked failed (default OUTBOX_MAX_ATTEMPTS)')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new messages instead of exiting when the outbox is empty')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        def progress(totals):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"sent {totals['sent']}, retrying {totals['retried']}, failed {totals['failed']}")
+
+        while True:
+            started = time.monotonic()
+            totals = send_outbox(
+                batch_size=options['batch_size'],
+                rate_limit=options['rate'],
+                max_attempts=options['max_attempts'],
+                progress=progress,
+            )
+            if any(totals.values()):
+                elapsed = time.monotonic() - started
+                self.stdout.write(self.style.SUCCESS(
+                    f"Sent {totals['sent']} emails in {elapsed:.2f}s "
+                    f"({totals['retried']} to retry, {totals['failed']} failed)"
+                ))
+            elif not options['loop']:
+                self.stdout.write('Outbox is empty')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,60 @@
+from django.db import models
+from django.utils import timezone
+
+from courses.models import Course
+
+
+class OutboxMessage(models.Model):
+    """Email waiting to be delivered by the send_outbox worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When the message is next due; also the lease expiry while it is being sent
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient} ({self.status})"
+
+
+class NotificationEvent(models.Model):
+    """Course change waiting to go out in the next notification digest"""
+    KIND_CHOICES = [
+        ('course_created', 'Course created'),
+        ('schedule_added', 'Schedule added'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='notification_events')
+    # One line as shown in the digest, rendered when the event happens
+    message = models.CharField(max_length=255)
+    created_at = models.DateTimeField(default=timezone.now)
+    digested_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['created_at'], condition=models.Q(digested_at__isnull=True), name='event_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.message}"
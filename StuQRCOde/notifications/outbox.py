@@ -0,0 +1,191 @@
+"""
+Transactional email outbox.
+
+Views queue one OutboxMessage per recipient with bulk inserts instead of
+calling send_mail inside the request. The send_outbox worker claims due
+messages in batches and delivers them over a single reused connection, at
+most OUTBOX_RATE_LIMIT per second. A failed delivery is retried with
+exponential backoff until OUTBOX_MAX_ATTEMPTS is reached. Delivery is
+at-least-once: a worker that dies mid-batch leaves its claim to expire, and
+the batch is picked up again. Attempts are counted when a message is claimed,
+so a message whose send keeps crashing the worker still runs out of attempts.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+ENQUEUE_CHUNK_SIZE = 1000
+
+# How long a claimed batch stays reserved before another worker may take it over
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def enqueue(subject, body, recipients, html_body='', from_email=None):
+    """Queue one message per recipient address; returns the number queued"""
+    return enqueue_messages(
+        ((recipient, subject, body) for recipient in recipients),
+        html_body=html_body,
+        from_email=from_email,
+    )
+
+
+def enqueue_messages(messages, html_body='', from_email=None):
+    """
+    Queue (recipient, subject, body) tuples from any iterable, in chunked bulk inserts.
+
+    A tuple may carry its own HTML alternative as a fourth item.
+    """
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    now = timezone.now()
+    queued = 0
+    batch = []
+    for recipient, subject, body, *html in messages:
+        if not recipient:
+            continue
+        batch.append(OutboxMessage(
+            recipient=recipient,
+            subject=subject[:255],
+            body=body,
+            html_body=html[0] if html else html_body,
+            from_email=from_email,
+            next_attempt_at=now,
+        ))
+        if len(batch) >= ENQUEUE_CHUNK_SIZE:
+            OutboxMessage.objects.bulk_create(batch)
+            queued += len(batch)
+            batch = []
+    if batch:
+        OutboxMessage.objects.bulk_create(batch)
+        queued += len(batch)
+    return queued
+
+
+def claim_batch(batch_size, now=None, max_attempts=None):
+    """Reserve up to batch_size due messages for this worker, counting an attempt for each, and return them"""
+    now = now or timezone.now()
+    if max_attempts is None:
+        max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+    with transaction.atomic():
+        # An expired claim on the last attempt means the worker died sending it
+        OutboxMessage.objects.filter(
+            status='sending', next_attempt_at__lte=now, attempts__gte=max_attempts,
+        ).update(status='failed', last_error='Delivery did not finish within the claim timeout')
+        due = OutboxMessage.objects.filter(
+            status__in=['pending', 'sending'],
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at', 'pk')
+        if db_connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('pk', flat=True)[:batch_size])
+        OutboxMessage.objects.filter(pk__in=ids).update(
+            status='sending', next_attempt_at=now + CLAIM_TIMEOUT, attempts=F('attempts') + 1
+        )
+    return list(OutboxMessage.objects.filter(pk__in=ids).order_by('pk'))
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 60)
+    ceiling = getattr(settings, 'OUTBOX_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), ceiling))
+
+
+class RateLimiter:
+    """Space calls at least 1/rate seconds apart; a rate of 0 disables the limit"""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1 / rate if rate else 0
+        self.clock = clock
+        self.sleep = sleep
+        self.last = None
+
+    def wait(self):
+        if self.interval and self.last is not None:
+            remaining = self.last + self.interval - self.clock()
+            if remaining > 0:
+                self.sleep(remaining)
+        self.last = self.clock()
+
+
+def send_batch(messages, connection, limiter=None, max_attempts=None):
+    """Deliver claimed messages over `connection`; returns {'sent', 'retried', 'failed'}"""
+    if max_attempts is None:
+        max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+    totals = {'sent': 0, 'retried': 0, 'failed': 0}
+    sent_ids = []
+    for message in messages:
+        if limiter is not None:
+            limiter.wait()
+        email = EmailMultiAlternatives(
+            message.subject, message.body, message.from_email or None, [message.recipient], connection=connection
+        )
+        if message.html_body:
+            email.attach_alternative(message.html_body, 'text/html')
+        try:
+            # A no-op while the connection is up; reconnects after a failure closed it
+            connection.open()
+            email.send()
+        except Exception as e:
+            connection.close()
+            _record_failure(message, e, max_attempts, totals)
+        else:
+            sent_ids.append(message.pk)
+
+    if sent_ids:
+        OutboxMessage.objects.filter(pk__in=sent_ids).update(status='sent', sent_at=timezone.now(), last_error='')
+        totals['sent'] = len(sent_ids)
+    return totals
+
+
+def _record_failure(message, error, max_attempts, totals):
+    # claim_batch already counted this attempt
+    attempts = message.attempts
+    if attempts >= max_attempts:
+        status, next_attempt_at = 'failed', timezone.now()
+        totals['failed'] += 1
+        logger.error('Giving up on outbox message %s to %s: %s', message.pk, message.recipient, error)
+    else:
+        status, next_attempt_at = 'pending', timezone.now() + retry_delay(attempts)
+        totals['retried'] += 1
+        logger.warning('Outbox message %s to %s failed, retrying at %s: %s', message.pk, message.recipient, next_attempt_at, error)
+    OutboxMessage.objects.filter(pk=message.pk).update(
+        status=status, next_attempt_at=next_attempt_at, last_error=str(error)[:1000]
+    )
+
+
+def send_outbox(batch_size=None, rate_limit=None, max_attempts=None, progress=None):
+    """Deliver every due message, batch by batch, over one connection; returns the summed totals"""
+    if batch_size is None:
+        batch_size = getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+    if rate_limit is None:
+        rate_limit = getattr(settings, 'OUTBOX_RATE_LIMIT', 10)
+    # Producers turn deferred work (e.g. password reset requests) into outbox messages first
+    for producer in getattr(settings, 'OUTBOX_PRODUCERS', []):
+        import_string(producer)()
+
+    limiter = RateLimiter(rate_limit)
+    totals = {'sent': 0, 'retried': 0, 'failed': 0}
+    connection = get_connection()
+    try:
+        while True:
+            messages = claim_batch(batch_size, max_attempts=max_attempts)
+            if not messages:
+                break
+            result = send_batch(messages, connection, limiter, max_attempts)
+            for key, value in result.items():
+                totals[key] += value
+            if progress is not None:
+                progress(totals)
+    finally:
+        connection.close()
+    return totals
@@ -0,0 +1,208 @@
+import socketserver
+import threading
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Lecturer, Student
+from courses.models import Course, Enrollment, Semester
+from .digest import record_event, send_digest
+from .models import NotificationEvent, OutboxMessage
+from .outbox import RateLimiter, claim_batch, enqueue, send_outbox
+
+User = get_user_model()
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: accepts every message except for rejected recipients"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost SMTP stand-in')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip().strip('<>')
+                if address in self.server.rejected:
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                self.server.delivered.extend(recipients)
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPStandInHandler)
+        self.connections = 0
+        self.delivered = []
+        self.rejected = set()
+
+
+class OutboxTest(TestCase):
+    def setUp(self):
+        self.server = SMTPStandIn()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.smtp = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.server.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+        )
+
+    def test_worker_delivers_over_one_connection(self):
+        recipients = [f'student{i}@example.com' for i in range(5)]
+        self.assertEqual(enqueue('Subject', 'Body', recipients + ['']), 5)
+
+        with self.smtp:
+            totals = send_outbox(batch_size=2, rate_limit=0)
+        self.assertEqual(totals, {'sent': 5, 'retried': 0, 'failed': 0})
+        self.assertEqual(sorted(self.server.delivered), recipients)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(OutboxMessage.objects.filter(status='sent', attempts=1).count(), 5)
+
+    @override_settings(OUTBOX_RETRY_BASE_SECONDS=60)
+    def test_failures_back_off_then_fail(self):
+        self.server.rejected.add('bounce@example.com')
+        enqueue('Subject', 'Body', ['bounce@example.com', 'ok@example.com'])
+
+        with self.smtp:
+            totals = send_outbox(rate_limit=0, max_attempts=2)
+        self.assertEqual(totals, {'sent': 1, 'retried': 1, 'failed': 0})
+        self.assertEqual(self.server.delivered, ['ok@example.com'])
+        bounced = OutboxMessage.objects.get(recipient='bounce@example.com')
+        self.assertEqual((bounced.status, bounced.attempts), ('pending', 1))
+        self.assertGreater(bounced.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+        # Not due yet; once it is, the second failure is final
+        with self.smtp:
+            self.assertEqual(send_outbox(rate_limit=0, max_attempts=2)['retried'], 0)
+        OutboxMessage.objects.filter(pk=bounced.pk).update(next_attempt_at=timezone.now())
+        with self.smtp:
+            self.assertEqual(send_outbox(rate_limit=0, max_attempts=2)['failed'], 1)
+        bounced.refresh_from_db()
+        self.assertEqual((bounced.status, bounced.attempts), ('failed', 2))
+        self.assertIn('No such user', bounced.last_error)
+
+    def test_crashed_sends_use_up_attempts(self):
+        enqueue('Subject', 'Body', ['crash@example.com'])
+        for attempt in (1, 2):
+            # The worker claims the message and dies before recording an outcome
+            message, = claim_batch(10, max_attempts=2)
+            self.assertEqual(message.attempts, attempt)
+            OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(claim_batch(10, max_attempts=2), [])
+        self.assertEqual(OutboxMessage.objects.get().status, 'failed')
+
+    def test_rate_limiter_spaces_sends(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(4, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.wait()
+        self.assertEqual(sleeps, [0.25, 0.25])
+
+
+class DigestTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='lecturer@example.com', username='lecturer', password='password123', role='lecturer')
+        lecturer = Lecturer.objects.create(user=self.user, employee_id='L001', department='CS', qualification='PhD')
+        semester = Semester.objects.create(name='Fall', year=2023, start_date=date(2023, 9, 1), end_date=date(2023, 12, 31))
+        self.courses = [
+            Course.objects.create(code=code, name=f'Course {code}', lecturer=lecturer, semester=semester)
+            for code in ['CS101', 'CS102']
+        ]
+        for i in range(3):
+            student_user = User.objects.create_user(email=f's{i}@example.com', username=f's{i}', first_name=f'S{i}', password='password123')
+            student = Student.objects.create(user=student_user, student_id=f'S{i}')
+            # s0 takes both courses, s1 only CS101, s2 none
+            for course in self.courses[:2 - i]:
+                Enrollment.objects.create(student=student, course=course)
+
+    def test_schedule_add_records_event_without_mail(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('courses:schedule_add', args=[self.courses[0].pk]), {
+            'day': 'Monday', 'start_time': '09:00', 'end_time': '10:00', 'room': 'A1',
+        })
+        event = NotificationEvent.objects.get()
+        self.assertEqual((event.kind, event.message), ('schedule_added', 'New class: Monday 09:00-10:00 in room A1'))
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertEqual(mail.outbox, [])
+
+    def test_one_digest_per_enrolled_student(self):
+        record_event('schedule_added', self.courses[0], 'New class: Monday 09:00-10:00 in room A1')
+        record_event('schedule_added', self.courses[0], 'New class: Friday 14:00-15:00 in room B2')
+        record_event('course_created', self.courses[1], 'New course: 3 credits')
+
+        # Events, roster, one bulk insert and one update, plus the savepoint pair
+        with self.assertNumQueries(6):
+            result = send_digest()
+        self.assertEqual(result, {'events': 3, 'courses': 2, 'recipients': 2, 'held': 0})
+
+        digests = {message.recipient: message.body for message in OutboxMessage.objects.all()}
+        self.assertEqual(sorted(digests), ['s0@example.com', 's1@example.com'])
+        self.assertIn('Dear S0,', digests['s0@example.com'])
+        self.assertIn('Friday 14:00-15:00', digests['s0@example.com'])
+        self.assertIn('CS102 - Course CS102', digests['s0@example.com'])
+        self.assertNotIn('CS102', digests['s1@example.com'])
+
+        # Digested events are not sent again
+        self.assertEqual(send_digest()['events'], 0)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+    def test_event_waits_for_first_enrollment(self):
+        lecturer = self.courses[0].lecturer
+        course = Course.objects.create(code='CS103', name='Course CS103', lecturer=lecturer, semester=self.courses[0].semester)
+        record_event('course_created', course, 'New course: 3 credits')
+        self.assertEqual(send_digest(), {'events': 1, 'courses': 1, 'recipients': 0, 'held': 1})
+
+        Enrollment.objects.create(student=Student.objects.get(student_id='S2'), course=course)
+        self.assertEqual(send_digest()['recipients'], 1)
+        self.assertIn('CS103', OutboxMessage.objects.get(recipient='s2@example.com').body)
+        self.assertEqual(send_digest()['events'], 0)
+
+    @override_settings(NOTIFICATION_EVENT_MAX_AGE_DAYS=7)
+    def test_unreached_events_expire(self):
+        course = Course.objects.create(code='CS103', name='Course CS103', lecturer=self.courses[0].lecturer, semester=self.courses[0].semester)
+        record_event('course_created', course, 'New course: 3 credits')
+        self.assertEqual(send_digest(timezone.now() + timedelta(days=8))['held'], 0)
+        self.assertFalse(NotificationEvent.objects.filter(digested_at__isnull=True).exists())